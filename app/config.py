@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,5 +9,96 @@ class Settings:
     FB_APP_SECRET: str = os.getenv("FB_APP_SECRET")
     FB_REDIRECT_URI: str = os.getenv("FB_REDIRECT_URI")
     FB_API_VERSION: str = os.getenv("FB_API_VERSION", "v23.0")
+    FB_GRAPH_URL: str = os.getenv("FB_GRAPH_URL", "https://graph.facebook.com")
+    FB_GRAPH_VIDEO_URL: str = os.getenv("FB_GRAPH_VIDEO_URL", "https://graph-video.facebook.com")
 
-settings = Settings()
\ No newline at end of file
+    # Inbound request deadlines, shortened by an X-Request-Timeout header (see app/deadline.py)
+    REQUEST_TIMEOUT: float = float(os.getenv("REQUEST_TIMEOUT", "30"))
+    UPLOAD_REQUEST_TIMEOUT: float = float(os.getenv("UPLOAD_REQUEST_TIMEOUT", "900"))
+    STREAM_REQUEST_TIMEOUT: float = float(os.getenv("STREAM_REQUEST_TIMEOUT", "600"))  # NDJSON listings
+
+    # Shared Graph HTTP client (see app/services/facebook/client.py)
+    GRAPH_MAX_CONNECTIONS: int = int(os.getenv("GRAPH_MAX_CONNECTIONS", "100"))
+    GRAPH_MAX_KEEPALIVE: int = int(os.getenv("GRAPH_MAX_KEEPALIVE", "20"))
+    GRAPH_KEEPALIVE_EXPIRY: float = float(os.getenv("GRAPH_KEEPALIVE_EXPIRY", "30"))
+    GRAPH_TIMEOUT: float = float(os.getenv("GRAPH_TIMEOUT", "30"))
+    GRAPH_HTTP2: bool = os.getenv("GRAPH_HTTP2", "false").lower() == "true"
+
+    # In-process cache for read-only Graph endpoints (see app/services/facebook/cache.py)
+    GRAPH_CACHE_MAX_ENTRIES: int = int(os.getenv("GRAPH_CACHE_MAX_ENTRIES", "5000"))
+    GRAPH_CACHE_STALE_SECONDS: float = float(os.getenv("GRAPH_CACHE_STALE_SECONDS", "60"))
+
+    # Outbound pacing from Graph usage headers (see app/services/facebook/rate_limit.py)
+    GRAPH_RATE_SLOW_PCT: float = float(os.getenv("GRAPH_RATE_SLOW_PCT", "75"))
+    GRAPH_RATE_BLOCK_PCT: float = float(os.getenv("GRAPH_RATE_BLOCK_PCT", "95"))
+    GRAPH_RATE_MAX_SPACING: float = float(os.getenv("GRAPH_RATE_MAX_SPACING", "2"))
+    GRAPH_RATE_MAX_WAIT: float = float(os.getenv("GRAPH_RATE_MAX_WAIT", "30"))
+
+    # Retries of transient Graph failures (see app/services/facebook/retry.py)
+    GRAPH_RETRY_ATTEMPTS: int = int(os.getenv("GRAPH_RETRY_ATTEMPTS", "3"))
+    GRAPH_RETRY_BASE_DELAY: float = float(os.getenv("GRAPH_RETRY_BASE_DELAY", "0.2"))
+    GRAPH_RETRY_MAX_DELAY: float = float(os.getenv("GRAPH_RETRY_MAX_DELAY", "5"))
+    GRAPH_RETRY_BUDGET: float = float(os.getenv("GRAPH_RETRY_BUDGET", "10"))
+
+    # Circuit breakers per Graph endpoint family (see app/services/facebook/circuit_breaker.py)
+    GRAPH_BREAKER_WINDOW: float = float(os.getenv("GRAPH_BREAKER_WINDOW", "30"))
+    GRAPH_BREAKER_MIN_CALLS: int = int(os.getenv("GRAPH_BREAKER_MIN_CALLS", "20"))
+    GRAPH_BREAKER_ERROR_RATE: float = float(os.getenv("GRAPH_BREAKER_ERROR_RATE", "0.5"))
+    GRAPH_BREAKER_SLOW_SECONDS: float = float(os.getenv("GRAPH_BREAKER_SLOW_SECONDS", "10"))
+    GRAPH_BREAKER_SLOW_RATE: float = float(os.getenv("GRAPH_BREAKER_SLOW_RATE", "0.5"))
+    GRAPH_BREAKER_OPEN_SECONDS: float = float(os.getenv("GRAPH_BREAKER_OPEN_SECONDS", "30"))
+
+    # Media uploads are spooled to disk before going to Graph (see app/services/uploads.py)
+    UPLOAD_SPOOL_DIR: str = os.getenv("UPLOAD_SPOOL_DIR", tempfile.gettempdir())
+    UPLOAD_MAX_BYTES: int = int(os.getenv("UPLOAD_MAX_BYTES", str(4 * 1024 ** 3)))  # Graph video limit
+    UPLOAD_CHUNK_BYTES: int = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 ** 2)))
+
+    # Threads for blocking facebook_business SDK calls (see app/services/facebook/sdk.py)
+    SDK_MAX_WORKERS: int = int(os.getenv("SDK_MAX_WORKERS", "8"))
+
+    # (account, sha256) -> image_hash / video_id index (see app/services/facebook/media_index.py)
+    MEDIA_INDEX_PATH: str = os.getenv("MEDIA_INDEX_PATH", "data/media_index.db")
+    MEDIA_INDEX_MAX_ENTRIES: int = int(os.getenv("MEDIA_INDEX_MAX_ENTRIES", "100000"))
+    MEDIA_INDEX_TTL_DAYS: float = float(os.getenv("MEDIA_INDEX_TTL_DAYS", "30"))
+
+    # User/token store (see app/storage.py): "sqlite" or "memory"
+    USER_STORE_BACKEND: str = os.getenv("USER_STORE_BACKEND", "sqlite")
+    USER_STORE_PATH: str = os.getenv("USER_STORE_PATH", "data/users.db")
+    USER_CACHE_MAX_ENTRIES: int = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "30"))  # max staleness across workers
+
+    # Idempotency-Key replay store for create/publish routes (see app/services/idempotency.py)
+    IDEMPOTENCY_DB_PATH: str = os.getenv("IDEMPOTENCY_DB_PATH", "data/idempotency.db")
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "100000"))
+    IDEMPOTENCY_TTL_HOURS: float = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+    IDEMPOTENCY_WAIT: float = float(os.getenv("IDEMPOTENCY_WAIT", "30"))  # duplicate waiting on the original
+    IDEMPOTENCY_STALE_AFTER: float = float(os.getenv("IDEMPOTENCY_STALE_AFTER", "120"))
+
+    # Repeated /oauth/callback with the same code, on any worker (see app/oauth/fb_token_service.py)
+    OAUTH_CALLBACK_DB_PATH: str = os.getenv("OAUTH_CALLBACK_DB_PATH", "data/oauth_callbacks.db")
+    OAUTH_CALLBACK_REPLAY_SECONDS: float = float(os.getenv("OAUTH_CALLBACK_REPLAY_SECONDS", "30"))
+
+    # Local mirror of campaigns/adsets/ads/creatives per ad account (see app/services/facebook/mirror.py)
+    MIRROR_ENABLED: bool = os.getenv("MIRROR_ENABLED", "true").lower() == "true"
+    MIRROR_DB_PATH: str = os.getenv("MIRROR_DB_PATH", "data/mirror.db")
+    MIRROR_MAX_AGE: float = float(os.getenv("MIRROR_MAX_AGE", "60"))  # freshness bound for reads
+    MIRROR_FULL_SYNC_HOURS: float = float(os.getenv("MIRROR_FULL_SYNC_HOURS", "24"))
+    MIRROR_ACCESS_TTL: float = float(os.getenv("MIRROR_ACCESS_TTL", "900"))
+    MIRROR_PAGE_SIZE: int = int(os.getenv("MIRROR_PAGE_SIZE", "500"))
+
+    # Background jobs (see app/jobs/)
+    JOBS_DB_PATH: str = os.getenv("JOBS_DB_PATH", "data/jobs.db")
+    JOBS_MAX_WORKERS: int = int(os.getenv("JOBS_MAX_WORKERS", "4"))
+    JOBS_POLL_INTERVAL: float = float(os.getenv("JOBS_POLL_INTERVAL", "1"))
+    JOBS_STALE_AFTER: float = float(os.getenv("JOBS_STALE_AFTER", "60"))
+    JOBS_MAX_ATTEMPTS: int = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+    JOBS_RETENTION_HOURS: float = float(os.getenv("JOBS_RETENTION_HOURS", "168"))  # finished jobs kept
+
+    # Compression of large JSON responses (see app/services/encoding.py)
+    RESPONSE_COMPRESS_MIN_BYTES: int = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+    RESPONSE_GZIP_LEVEL: int = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+    RESPONSE_BROTLI_QUALITY: int = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+    # Encoded bodies kept for repeated reads of the same data (see app/services/conditional.py)
+    RESPONSE_ENCODED_CACHE_BYTES: int = int(os.getenv("RESPONSE_ENCODED_CACHE_BYTES", str(64 * 1024 ** 2)))
+
+settings = Settings()
@@ -0,0 +1,116 @@
+"""
+Request-scoped deadlines.
+
+DeadlineMiddleware gives every inbound request a deadline: the route's
+default timeout, shortened by the client's `X-Request-Timeout: <seconds>`
+header when it won't wait that long. Outbound Graph calls and SDK uploads
+check `remaining()` and stop with DeadlineExceeded (504) once it has
+passed, instead of finishing work nobody is waiting for.
+
+Code running outside a request (background jobs, cache refreshes) has no
+deadline.
+"""
+import asyncio
+import contextvars
+import time
+from urllib.parse import parse_qs
+
+from app.config import settings
+
+DEADLINE_HEADER = b"x-request-timeout"
+
+# Path prefix -> default timeout in seconds; everything else gets REQUEST_TIMEOUT
+ROUTE_TIMEOUTS = {
+    "/facebook/media/upload": settings.UPLOAD_REQUEST_TIMEOUT,
+    "/facebook/launch/video": settings.UPLOAD_REQUEST_TIMEOUT,
+}
+
+# Path -> timeout when the request asks for a streamed body (`?stream=true`)
+STREAM_ROUTE_TIMEOUTS = {
+    "/ad_accounts": settings.STREAM_REQUEST_TIMEOUT,
+}
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The inbound request's deadline passed before the work finished."""
+
+    def __init__(self):
+        super().__init__("Request deadline exceeded")
+
+
+def remaining() -> float | None:
+    """Seconds left before the current request's deadline (None outside a request)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def check():
+    if remaining() == 0:
+        raise DeadlineExceeded()
+
+
+def detach():
+    """Drop the deadline in the current context (e.g. work shared by several requests)."""
+    _deadline.set(None)
+
+
+async def wait(awaitable):
+    """Await `awaitable`, giving up with DeadlineExceeded at the deadline."""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left == 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded()
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded() from None
+
+
+def _streaming(query_string: bytes) -> bool:
+    values = parse_qs(query_string.decode("latin-1")).get("stream", [])
+    return bool(values) and values[-1].lower() in ("1", "true", "yes", "on")
+
+
+def route_timeout(path: str, query_string: bytes = b"") -> float:
+    stream_timeout = STREAM_ROUTE_TIMEOUTS.get(path.rstrip("/"))
+    if stream_timeout is not None and _streaming(query_string):
+        return stream_timeout
+    for prefix, timeout in ROUTE_TIMEOUTS.items():
+        if path.startswith(prefix):
+            return timeout
+    return settings.REQUEST_TIMEOUT
+
+
+class DeadlineMiddleware:
+    """ASGI middleware setting the deadline of each inbound request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timeout = route_timeout(scope["path"], scope.get("query_string", b""))
+        for name, value in scope["headers"]:
+            if name == DEADLINE_HEADER:
+                try:
+                    requested = float(value)
+                except ValueError:
+                    break
+                if requested > 0:
+                    timeout = min(timeout, requested)
+                break
+
+        token = _deadline.set(time.monotonic() + timeout)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
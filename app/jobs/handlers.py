@@ -0,0 +1,110 @@
+import asyncio
+import os
+
+from app.jobs.queue import job_manager, JobContext
+from app.services.facebook.batch import GraphBatch, MAX_BATCH_SIZE
+from app.services.facebook.cache import graph_cache
+from app.services.facebook.client import FAIL_FAST_ERRORS
+from app.services.facebook.media import upload_media_file
+from app.services.facebook.pipeline import launch_video_ad, PipelineError
+from app.services.facebook.video_upload import VideoUploadError
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_spooled_file(payload: dict):
+    _remove(payload["path"])
+
+
+def _remove_spooled_video(payload: dict):
+    _remove(payload["video_path"])
+
+
+# Spooled files are removed by the manager once the job is over (see JobManager.handler)
+@job_manager.handler("media_upload", cleanup=_remove_spooled_file)
+async def media_upload_job(payload: dict, ctx: JobContext):
+    # payload: account_id, access_token, media_type, path, sha256, filename
+    def on_progress(bytes_done, total_bytes, session):
+        ctx.progress(bytes_done=bytes_done, total_bytes=total_bytes, state={"resume_session": session})
+
+    try:
+        return await upload_media_file(
+            account_id=payload["account_id"],
+            access_token=payload["access_token"],
+            media_type=payload["media_type"],
+            path=payload["path"],
+            sha256=payload["sha256"],
+            title=payload.get("filename"),
+            resume=ctx.state.get("resume_session"),
+            on_progress=on_progress,
+        )
+    except VideoUploadError as e:
+        ctx.progress(state={"resume_session": e.session})
+        raise
+    except FAIL_FAST_ERRORS as e:
+        if getattr(e, "resume_session", None):
+            ctx.progress(state={"resume_session": e.resume_session})
+        raise
+
+
+@job_manager.handler("launch_video", cleanup=_remove_spooled_video)
+async def launch_video_job(payload: dict, ctx: JobContext):
+    # payload: the launch_video_ad arguments, with the spooled video at video_path
+    def on_progress(report):
+        ctx.progress(
+            stages={name: entry["status"] for name, entry in report["stages"].items()},
+            state={"report": report},
+        )
+
+    shutting_down = False
+    try:
+        return await launch_video_ad(
+            **payload,
+            on_progress=on_progress,
+            resume=ctx.state.get("report"),
+        )
+    except PipelineError as e:
+        ctx.progress(state={"report": e.report})
+        raise
+    except FAIL_FAST_ERRORS as e:
+        if getattr(e, "report", None):
+            ctx.progress(state={"report": e.report})
+        raise
+    except asyncio.CancelledError:
+        shutting_down = True
+        raise
+    finally:
+        if not shutting_down:
+            graph_cache.invalidate(payload["access_token"])
+
+
+@job_manager.handler("bulk_status")
+async def bulk_status_job(payload: dict, ctx: JobContext):
+    # payload: access_token, object_ids, status ("PAUSED" / "ACTIVE")
+    object_ids = payload["object_ids"]
+    done = ctx.state.get("done", 0)
+    failed = ctx.state.get("failed", [])
+
+    try:
+        while done < len(object_ids):
+            chunk = object_ids[done:done + MAX_BATCH_SIZE]
+            batch = GraphBatch()
+            for object_id in chunk:
+                batch.add("POST", object_id, body={"status": payload["status"]})
+
+            results = await batch.execute(payload["access_token"])
+            failed += [
+                {"id": object_id, "error": r.get("error")}
+                for object_id, r in zip(chunk, results) if not r["success"]
+            ]
+            done += len(chunk)
+            ctx.progress(done=done, total=len(object_ids), state={"done": done, "failed": failed})
+    finally:
+        graph_cache.invalidate(payload["access_token"])
+
+    return {"updated": len(object_ids) - len(failed), "failed": failed}
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+
+from app.config import settings
+from app.jobs.store import JobStore
+
+# Payload fields dropped once a job has finished
+_SECRET_FIELDS = {"access_token"}
+
+logger = logging.getLogger(__name__)
+
+
+class JobContext:
+    """
+    Passed to job handlers. `state` is the checkpoint saved by a previous
+    attempt (empty on the first run); `progress()` records progress and,
+    optionally, a new checkpoint. Writes are coalesced so handlers can
+    call it from tight loops and sync callbacks.
+    """
+
+    def __init__(self, store: JobStore, job: dict):
+        self.store = store
+        self.job_id = job["id"]
+        self.attempt = job["attempts"]
+        self.state = job["state"] or {}
+        self._progress = job["progress"] or {}
+        self._dirty = False
+        self._flush_task: asyncio.Task | None = None
+
+    def progress(self, state: dict | None = None, **progress):
+        self._progress.update(progress)
+        if state is not None:
+            self.state = state
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        while self._dirty:
+            self._dirty = False
+            await self.store.update(self.job_id, progress=self._progress, state=self.state)
+
+
+class JobManager:
+    """
+    Bounded pool of background workers pulling jobs from the shared JobStore.
+    Handlers are registered per job kind with `@job_manager.handler("kind")`.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int,
+        poll_interval: float,
+        stale_after: float,
+        max_attempts: int,
+        retention_hours: float,
+    ):
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_hours * 3600
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers = {}
+        self.cleanups = {}
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+
+    def handler(self, kind: str, cleanup=None):
+        """
+        Register the handler of a job kind. `cleanup(payload)` releases what a
+        payload holds (e.g. spooled files) once the job will never run again:
+        after it succeeds or fails, when it is given up, or when submit fails.
+        """
+        def register(func):
+            self.handlers[kind] = func
+            if cleanup is not None:
+                self.cleanups[kind] = cleanup
+            return func
+        return register
+
+    def _cleanup(self, kind: str, payload: dict):
+        cleanup = self.cleanups.get(kind)
+        if cleanup is not None:
+            cleanup(payload)
+
+    async def submit(self, kind: str, payload: dict) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        try:
+            job_id = await self.store.create(kind, payload)
+        except BaseException:
+            self._cleanup(kind, payload)
+            raise
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Unfinished jobs go back to the queue and resume from their checkpoint
+        await self.store.release(self.owner)
+
+    async def _heartbeat(self):
+        # Must outlive any store error (e.g. SQLite busy): once it stops, this
+        # worker's running jobs look stale and another worker runs them again
+        while True:
+            await asyncio.sleep(self.stale_after / 3)
+            try:
+                await self.store.heartbeat(self.owner)
+                await self.store.purge(finished_before=time.time() - self.retention_seconds)
+            except Exception:
+                logger.exception("Job heartbeat failed; retrying")
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self.store.claim(self.owner, stale_before=time.time() - self.stale_after)
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+                await self._run(job)
+            except Exception:
+                logger.exception("Job worker iteration failed; continuing")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _finish(self, job: dict, **fields):
+        """Store the outcome; the payload loses its access token once the job is over."""
+        self._cleanup(job["kind"], job["payload"])
+        payload = {k: v for k, v in job["payload"].items() if k not in _SECRET_FIELDS}
+        await self.store.update(job["id"], payload=payload, **fields)
+
+    async def _run(self, job: dict):
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            await self._finish(job, status="failed", error=f"Unknown job kind '{job['kind']}'")
+            return
+        if job["attempts"] > self.max_attempts:
+            await self._finish(job, status="failed", error="Gave up after too many attempts")
+            return
+
+        ctx = JobContext(self.store, job)
+        try:
+            result = await handler(job["payload"], ctx)
+        except asyncio.CancelledError:
+            raise  # shutting down: stop() releases the job, which resumes with its payload intact
+        except Exception as e:
+            await ctx.flush()
+            await self._finish(job, status="failed", error=str(e))
+            return
+
+        await ctx.flush()
+        await self._finish(job, status="succeeded", result=result)
+
+
+job_store = JobStore(settings.JOBS_DB_PATH)
+
+job_manager = JobManager(
+    job_store,
+    workers=settings.JOBS_MAX_WORKERS,
+    poll_interval=settings.JOBS_POLL_INTERVAL,
+    stale_after=settings.JOBS_STALE_AFTER,
+    max_attempts=settings.JOBS_MAX_ATTEMPTS,
+    retention_hours=settings.JOBS_RETENTION_HOURS,
+)
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.jobs.queue import job_store
+from app.jobs.store import TERMINAL_STATUSES
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+SSE_POLL_INTERVAL = 0.5
+
+
+def _public(job: dict) -> dict:
+    # payload/state hold access tokens and internal checkpoints; never expose them
+    return {
+        "id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "result": job["result"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    job = await job_store.get(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return _public(job)
+
+
+async def _job_events(job_id: str):
+    last_update = None
+    while True:
+        job = await job_store.get(job_id)
+        if job is None:
+            # Purged (past JOBS_RETENTION_HOURS) while the stream was open
+            yield f"event: gone\ndata: {json.dumps({'id': job_id, 'status': 'gone'})}\n\n"
+            return
+        if job["updated_at"] != last_update:
+            last_update = job["updated_at"]
+            yield f"event: {job['status']}\ndata: {json.dumps(_public(job))}\n\n"
+        if job["status"] in TERMINAL_STATUSES:
+            return
+        await asyncio.sleep(SSE_POLL_INTERVAL)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Server-Sent Events: one event per job update, ending when the job
+    succeeds or fails (or with a `gone` event if it is purged meanwhile).
+    """
+    if not await job_store.get(job_id):
+        raise HTTPException(404, "Job not found")
+    return StreamingResponse(
+        _job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
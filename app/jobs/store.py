@@ -0,0 +1,162 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from starlette.concurrency import run_in_threadpool
+
+TERMINAL_STATUSES = {"succeeded", "failed"}
+
+_JSON_COLUMNS = ("payload", "state", "progress", "result")
+
+
+class JobStore:
+    """
+    Jobs in a SQLite file (WAL mode) shared by every worker process.
+    A running job carries its owner and a heartbeat; when the heartbeat goes
+    stale (worker crashed or restarted) any worker can claim it again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10, isolation_level=None)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    state TEXT,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    owner TEXT,
+                    heartbeat_at REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        return self._db
+
+    @staticmethod
+    def _row(row: sqlite3.Row | None) -> dict | None:
+        if row is None:
+            return None
+        job = dict(row)
+        for column in _JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job[column] else None
+        return job
+
+    def _create(self, kind: str, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn().execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), now, now),
+            )
+        return job_id
+
+    def _get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def _claim(self, owner: str, stale_before: float) -> dict | None:
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT id FROM jobs "
+                    "WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (stale_before,),
+                ).fetchone()
+                if row is None:
+                    db.execute("COMMIT")
+                    return None
+                db.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, attempts = attempts + 1, "
+                    "heartbeat_at = ?, updated_at = ? WHERE id = ?",
+                    (owner, now, now, row["id"]),
+                )
+                job = db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return self._row(job)
+
+    def _update(self, job_id: str, **fields):
+        for column in _JSON_COLUMNS:
+            if column in fields:
+                fields[column] = json.dumps(fields[column])
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._conn().execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+            )
+
+    def _heartbeat(self, owner: str):
+        with self._lock:
+            self._conn().execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = 'running'",
+                (time.time(), owner),
+            )
+
+    def _release(self, owner: str):
+        with self._lock:
+            self._conn().execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, updated_at = ? "
+                "WHERE owner = ? AND status = 'running'",
+                (time.time(), owner),
+            )
+
+    def _purge(self, finished_before: float):
+        with self._lock:
+            self._conn().execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(TERMINAL_STATUSES))}) AND updated_at < ?",
+                (*sorted(TERMINAL_STATUSES), finished_before),
+            )
+
+    async def create(self, kind: str, payload: dict) -> str:
+        return await run_in_threadpool(self._create, kind, payload)
+
+    async def get(self, job_id: str) -> dict | None:
+        return await run_in_threadpool(self._get, job_id)
+
+    async def claim(self, owner: str, stale_before: float) -> dict | None:
+        return await run_in_threadpool(self._claim, owner, stale_before)
+
+    async def update(self, job_id: str, **fields):
+        await run_in_threadpool(self._update, job_id, **fields)
+
+    async def heartbeat(self, owner: str):
+        await run_in_threadpool(self._heartbeat, owner)
+
+    async def release(self, owner: str):
+        """Put this worker's running jobs back in the queue (graceful shutdown)."""
+        await run_in_threadpool(self._release, owner)
+
+    async def purge(self, finished_before: float):
+        """Delete succeeded / failed jobs last updated before `finished_before`."""
+        await run_in_threadpool(self._purge, finished_before)
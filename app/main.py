@@ -1,17 +1,86 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app import metrics
+from app.deadline import DeadlineExceeded, DeadlineMiddleware
 from app.oauth.router import router as oauth_router
 from app.media.router import router as media_router
 from app.routers.ad_accounts import router as ad_accounts_router
 from app.services.facebook_routes import router as facebook_router
+from app.jobs.router import router as jobs_router
+from app.jobs.queue import job_manager
+from app.jobs import handlers as job_handlers  # noqa: F401 (registers job handlers)
+from app.services.facebook.client import start_graph_client, close_graph_client
+from app.services.facebook.circuit_breaker import GraphCircuitOpenError
+from app.services.facebook.rate_limit import GraphRateLimitError
+from app.services.facebook.retry import RetryBudgetMiddleware
+from app.services.facebook.sdk import shutdown_sdk_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_graph_client()
+    await job_manager.start()
+    lag_monitor = asyncio.create_task(metrics.monitor_event_loop_lag())
+    yield
+    lag_monitor.cancel()
+    await job_manager.stop()
+    await close_graph_client()
+    shutdown_sdk_executor()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(RetryBudgetMiddleware)
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+def _error_content(exc: Exception) -> dict:
+    """`detail`, plus what an interrupted upload / launch needs to resume, when it carries it."""
+    content = {"detail": str(exc)}
+    for name in ("resume_session", "report"):
+        if getattr(exc, name, None) is not None:
+            content[name] = getattr(exc, name)
+    return content
+
+
+@app.exception_handler(GraphRateLimitError)
+async def graph_rate_limit_handler(request: Request, exc: GraphRateLimitError):
+    return JSONResponse(
+        status_code=429,
+        content=_error_content(exc),
+        headers={"Retry-After": str(int(exc.retry_after) + 1)},
+    )
+
+
+@app.exception_handler(GraphCircuitOpenError)
+async def graph_circuit_open_handler(request: Request, exc: GraphCircuitOpenError):
+    return JSONResponse(
+        status_code=503,
+        content=_error_content(exc),
+        headers={"Retry-After": str(int(exc.retry_after) + 1)},
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(status_code=504, content=_error_content(exc))
 
-app = FastAPI()
 
 app.include_router(oauth_router)
 # app.include_router(media_router)
 app.include_router(ad_accounts_router)
 
 app.include_router(facebook_router)
+app.include_router(jobs_router)
 
 @app.get("/")
 def root():
-    return {"message": "Facebook OAuth API is running"}
\ No newline at end of file
+    return {"message": "Facebook OAuth API is running"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1 +0,0 @@
-user_sessions = {}  # user_id: {access_token, pages, ad_accounts}
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Minimal in-process metrics with Prometheus text output, served on /metrics.
+
+Metrics are per worker process (Prometheus scrapes each one, or sums them).
+Everything here is plain dict/list arithmetic on the event loop thread,
+cheap enough to leave on in production.
+"""
+import asyncio
+import bisect
+import re
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_REGISTRY = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        _REGISTRY.append(self)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels):
+        series = self._values.get(labels)
+        if series is None:
+            # per-bucket counts (last slot is +Inf), sum
+            series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    return "\n".join(line for metric in _REGISTRY for line in metric.render()) + "\n"
+
+
+# Inbound HTTP ---------------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Inbound request latency", ("method", "route", "status"),
+)
+
+# Outbound Graph -------------------------------------------------------------
+
+GRAPH_REQUEST_SECONDS = Histogram(
+    "graph_request_duration_seconds", "Graph API call latency", ("method", "endpoint", "status"),
+)
+GRAPH_ERRORS = Counter(
+    "graph_errors_total", "Graph API errors by Graph error code", ("endpoint", "code"),
+)
+GRAPH_BYTES_SENT = Counter("graph_bytes_sent_total", "Request body bytes sent to Graph", ("endpoint",))
+GRAPH_BYTES_RECEIVED = Counter("graph_bytes_received_total", "Response body bytes received from Graph", ("endpoint",))
+GRAPH_RETRIES = Counter("graph_retries_total", "Graph calls retried, by reason", ("endpoint", "reason"))
+GRAPH_RETRY_WAIT_SECONDS = Counter("graph_retry_wait_seconds_total", "Time spent backing off before retries", ("endpoint",))
+GRAPH_RETRY_GIVEUPS = Counter(
+    "graph_retry_giveups_total", "Retryable Graph failures returned without retrying", ("endpoint", "why"),
+)
+GRAPH_BREAKER_STATE = Gauge(
+    "graph_circuit_breaker_state", "Breaker state per endpoint family (0 closed, 1 half-open, 2 open)", ("family",),
+)
+GRAPH_BREAKER_OPENED = Counter("graph_circuit_breaker_opened_total", "Times a breaker opened", ("family",))
+GRAPH_BREAKER_REJECTED = Counter(
+    "graph_circuit_breaker_rejected_total", "Calls failed fast by an open breaker", ("family",),
+)
+GRAPH_IN_FLIGHT = Gauge("graph_requests_in_flight", "Graph calls currently using a pooled connection")
+GRAPH_POOL_MAX = Gauge("graph_pool_max_connections", "Connection limit of the shared Graph client")
+
+# Event loop -------------------------------------------------------------------
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds", "Delay between when a timer should fire and when it does",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+_ID_RE = re.compile(r"\d+")
+_URL_RE = re.compile(r"^https?://[^/]+/(v\d+\.\d+/)?")
+
+
+def graph_endpoint(path: str) -> str:
+    """Low-cardinality label for a Graph path: `act_123/adsets` -> `act_:id/adsets`."""
+    path = _URL_RE.sub("", path).split("?", 1)[0].strip("/")
+    return _ID_RE.sub(":id", path) or "/"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency per route template and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"], route, status)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Run as a background task for the lifetime of the app."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(loop.time() - expected, 0))
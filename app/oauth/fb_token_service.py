@@ -1,12 +1,16 @@
-import httpx
-from app.config import settings
+import asyncio
+import hashlib
+import json
+import time
 
-FB_VERSION = settings.FB_API_VERSION
+from fastapi import HTTPException
 
+from app.config import settings
+from app.services.facebook.client import get_graph_client
+from app.services.idempotency import IdempotencyStore
 
-async def exchange_code_for_token(code: str) -> dict:
-    url = f"https://graph.facebook.com/{FB_VERSION}/oauth/access_token"
 
+async def exchange_code_for_token(code: str) -> dict:
     params = {
         "client_id": settings.FB_APP_ID,
         "redirect_uri": settings.FB_REDIRECT_URI,
@@ -14,14 +18,10 @@ async def exchange_code_for_token(code: str) -> dict:
         "code": code,
     }
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, params=params)
-        return r.json()
+    return await get_graph_client().get("oauth/access_token", params=params)
 
 
 async def exchange_for_long_lived_token(short_token: str) -> dict:
-    url = f"https://graph.facebook.com/{FB_VERSION}/oauth/access_token"
-
     params = {
         "grant_type": "fb_exchange_token",
         "client_id": settings.FB_APP_ID,
@@ -29,43 +29,105 @@ async def exchange_for_long_lived_token(short_token: str) -> dict:
         "fb_exchange_token": short_token,
     }
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, params=params)
-        return r.json()
+    return await get_graph_client().get("oauth/access_token", params=params)
 
 
 async def get_facebook_user(access_token: str) -> dict:
-    url = f"https://graph.facebook.com/{FB_VERSION}/me"
-
     params = {
         "access_token": access_token,
         "fields": "id,name,email",
     }
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, params=params)
-        return r.json()
+    return await get_graph_client().get("me", params=params)
 
 
-async def finalize_oauth(code: str) -> dict:
+async def _timed(timings: dict, step: str, coro):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[step] = round((time.perf_counter() - start) * 1000, 1)
+
+
+async def _finalize_oauth(code: str) -> dict:
+    timings = {}
+
     # Step 1: Code → Short-lived token
-    short = await exchange_code_for_token(code)
+    short = await _timed(timings, "code_exchange", exchange_code_for_token(code))
 
     if "access_token" not in short:
         raise Exception(f"Token error: {short}")
 
     short_token = short["access_token"]
 
-    # Step 2: Short-lived → Long-lived
-    long_token_data = await exchange_for_long_lived_token(short_token)
-    long_token = long_token_data["access_token"]
+    # Step 2 + 3 at once: Short-lived → Long-lived, and user info
+    # (/me works with the short-lived token, no need to wait for the long one)
+    long_token_data, user = await asyncio.gather(
+        _timed(timings, "long_lived_exchange", exchange_for_long_lived_token(short_token)),
+        _timed(timings, "user_info", get_facebook_user(short_token)),
+    )
 
-    # Step 3: Fetch user info
-    user = await get_facebook_user(long_token)
+    if "access_token" not in long_token_data:
+        raise Exception(f"Token error: {long_token_data}")
 
     return {
         "user_id": user.get("id"),
         "name": user.get("name"),
         "email": user.get("email"),
-        "access_token": long_token,
+        "access_token": long_token_data["access_token"],
+        "timings": timings,
     }
+
+
+# A code can only be exchanged once, so a repeated callback (double click,
+# browser retry) on any worker gets the first result instead of failing.
+# Results carry the long-lived token, so they are only kept for
+# OAUTH_CALLBACK_REPLAY_SECONDS.
+callback_results = IdempotencyStore(
+    path=settings.OAUTH_CALLBACK_DB_PATH,
+    max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+    ttl_hours=settings.OAUTH_CALLBACK_REPLAY_SECONDS / 3600,
+    stale_after=settings.REQUEST_TIMEOUT,
+)
+_POLL_INTERVAL = 0.25
+
+# Callbacks this worker is completing right now
+_running: dict[str, asyncio.Task] = {}
+
+
+async def _finalize_and_store(key: str, code: str) -> dict:
+    try:
+        result = await _finalize_oauth(code)
+    except BaseException:
+        await callback_results.abort(key)
+        raise
+    await callback_results.finish(key, 200, result)
+    return result
+
+
+async def finalize_oauth(code: str) -> dict:
+    """
+    Returns the user + long-lived token, and `timings` (ms per step).
+    """
+    key = hashlib.sha256(code.encode()).hexdigest()
+    give_up_at = time.monotonic() + settings.OAUTH_CALLBACK_REPLAY_SECONDS
+
+    while True:
+        task = _running.get(key)
+        if task is not None:
+            # shield: a duplicate going away must not cancel the exchange
+            return dict(await asyncio.shield(task))
+
+        row = await callback_results.begin(key, "")
+        if row is None:
+            break
+        if row["status_code"] is not None:
+            return json.loads(row["response"])
+        # Being completed on another worker
+        if time.monotonic() >= give_up_at:
+            raise HTTPException(status_code=409, detail="This login is still being completed")
+        await asyncio.sleep(_POLL_INTERVAL)
+
+    task = _running[key] = asyncio.ensure_future(_finalize_and_store(key, code))
+    task.add_done_callback(lambda _: _running.pop(key, None))
+    return dict(await asyncio.shield(task))
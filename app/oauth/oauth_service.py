@@ -1,12 +1,12 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from app.storage import get_user
+from app.storage import aget_user
 
 router = APIRouter(prefix="/media", tags=["Media"])
 
 
 @router.post("/upload")
 async def upload_media(user_id: str, file: UploadFile = File(...)):
-    user = get_user(user_id)
+    user = await aget_user(user_id)
     if not user:
         raise HTTPException(401, "User not authenticated with Facebook")
 
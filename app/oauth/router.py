@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Response
 from app.config import settings
 from app.oauth.fb_token_service import finalize_oauth
 from app.schemas import OAuthURLResponse, FacebookUser
-from app.storage import save_user
+from app.storage import asave_user
 
 router = APIRouter(prefix="/oauth", tags=["OAuth"])
 
@@ -21,9 +21,15 @@ async def generate_oauth_url():
 
 
 @router.get("/callback", response_model=FacebookUser)
-async def oauth_callback(code: str):
+async def oauth_callback(code: str, response: Response):
     data = await finalize_oauth(code)
 
-    save_user(data["user_id"], data)
+    # Latency breakdown per step, visible in browser dev tools
+    timings = data.pop("timings", {})
+    response.headers["Server-Timing"] = ", ".join(
+        f"{step};dur={ms}" for step, ms in timings.items()
+    )
+
+    await asave_user(data["user_id"], data)
 
     return FacebookUser(**data)
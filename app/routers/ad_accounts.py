@@ -1,12 +1,46 @@
-from fastapi import APIRouter, Query
-from app.services.fb_ad_service import get_user_ad_accounts
+from typing import Optional
+
+import httpx
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from app.deadline import DeadlineExceeded
+from app.services.facebook.circuit_breaker import GraphCircuitOpenError
+from app.services.facebook.client import GraphAPIError
+from app.services.facebook.rate_limit import GraphRateLimitError
+from app.services.facebook.fields import resolve_fields
+from app.services.conditional import conditional_json
+from app.services.encoding import dumps
+from app.services.fb_ad_service import get_user_ad_accounts, iter_user_ad_accounts
 
 router = APIRouter(prefix="/ad_accounts", tags=["ad_accounts"])
 
+
+async def _ndjson_ad_accounts(access_token: str, fields: str):
+    try:
+        async for account in iter_user_ad_accounts(access_token, fields):
+            yield dumps(account) + b"\n"
+    except (GraphAPIError, GraphRateLimitError, GraphCircuitOpenError, DeadlineExceeded, httpx.HTTPError) as e:
+        # Headers are already sent, so report the failure as the last line
+        yield dumps({"error": str(e)}) + b"\n"
+
+
 @router.get("/")
-async def fetch_ad_accounts(access_token: str = Query(..., description="User's Facebook access token")):
+async def fetch_ad_accounts(
+    request: Request,
+    access_token: str = Query(..., description="User's Facebook access token"),
+    stream: bool = Query(False, description="Stream accounts as NDJSON, one per line"),
+    fields: Optional[str] = Query(None, description="Comma-separated ad account fields"),
+):
     """
     Get Facebook Ad Accounts for a user.
     """
-    accounts = get_user_ad_accounts(access_token)
-    return accounts
\ No newline at end of file
+    fields = resolve_fields("ad_account", fields)
+
+    if stream:
+        return StreamingResponse(
+            _ndjson_ad_accounts(access_token, fields),
+            media_type="application/x-ndjson",
+        )
+
+    accounts = await get_user_ad_accounts(access_token, fields)
+    return conditional_json(request, accounts, "ad_accounts")
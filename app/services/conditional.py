@@ -0,0 +1,106 @@
+import hashlib
+from collections import OrderedDict
+
+from fastapi import Request, Response
+
+from app.config import settings
+from app.services.encoding import compress, dumps, negotiate_encoding, should_compress
+from app.services.facebook.cache import CACHE_TTLS
+
+# Responses carry the user's token in the URL and user-specific data,
+# so only the browser (not shared caches) may store them.
+CACHE_CONTROL = {
+    route: f"private, max-age={ttl}, must-revalidate" for route, ttl in CACHE_TTLS.items()
+}
+
+class EncodedBodies:
+    """
+    Graph cache hits hand back the same dict object, so remember its encoding
+    by identity and skip serializing + hashing (+ compressing) it again on
+    every poll. LRU bounded by entry count and by the bytes of the bodies
+    and compressed variants it holds (the data itself is normally shared
+    with graph_cache / the mirror's views).
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # id(data) -> [data, body, etag, {content-encoding: compressed body}]
+        self._entries: OrderedDict[int, list] = OrderedDict()
+        self.bytes = 0
+
+    def encode(self, data) -> tuple[bytes, str, dict[str, bytes]]:
+        entry = self._entries.get(id(data))
+        if entry is not None and entry[0] is data:
+            self._entries.move_to_end(id(data))
+            return entry[1], entry[2], entry[3]
+
+        body = dumps(data)
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        variants = {}
+        self._drop(id(data))
+        if len(body) <= self.max_bytes:
+            self._entries[id(data)] = [data, body, etag, variants]
+            self.bytes += len(body)
+            self._evict()
+        return body, etag, variants
+
+    def compressed(self, data, body: bytes, variants: dict[str, bytes], encoding: str) -> bytes:
+        if encoding not in variants:
+            variants[encoding] = compress(body, encoding)
+            entry = self._entries.get(id(data))
+            if entry is not None and entry[3] is variants:
+                self.bytes += len(variants[encoding])
+                self._evict()
+        return variants[encoding]
+
+    def _drop(self, key: int):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[1]) + sum(len(v) for v in entry[3].values())
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+
+
+_encoded = EncodedBodies(max_entries=512, max_bytes=settings.RESPONSE_ENCODED_CACHE_BYTES)
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = set()
+    for tag in if_none_match.split(","):
+        # "<hash>-gzip" / "<hash>-br" name the same content as "<hash>"
+        tag = tag.strip().removeprefix("W/").strip('"')
+        candidates.add(tag.split("-", 1)[0])
+    return "*" in candidates or etag in candidates
+
+
+def conditional_json(request: Request, data, route: str) -> Response:
+    """
+    JSON response with an ETag over the body and the route's Cache-Control.
+    Answers `304 Not Modified` when the client's If-None-Match still matches.
+    Bodies above RESPONSE_COMPRESS_MIN_BYTES are sent br/gzip-encoded when
+    the client accepts it.
+    """
+    if isinstance(data, dict) and "error" in data:
+        return Response(dumps(data), media_type="application/json")
+
+    body, etag, variants = _encoded.encode(data)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding")) if should_compress(body) else None
+    headers = {
+        # each content-coding is its own representation, so its own strong ETag
+        "ETag": f'"{etag}-{encoding}"' if encoding else f'"{etag}"',
+        "Cache-Control": CACHE_CONTROL[route],
+        "Vary": "Accept-Encoding",
+    }
+
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding:
+        body = _encoded.compressed(data, body, variants, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,81 @@
+"""
+Response body encoding: JSON without FastAPI's jsonable_encoder pass, and
+Content-Encoding negotiation for large bodies.
+
+Graph responses are already plain JSON (dicts, lists, str, numbers), so
+there is nothing for jsonable_encoder to convert; it only costs a full
+copy of the tree. `orjson` and `brotli` are optional: without them we fall
+back to stdlib json and gzip-only.
+"""
+import gzip
+import json
+
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def dumps(data) -> bytes:
+    """Compact UTF-8 JSON for data that is already JSON-shaped."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits, non-str keys: stdlib handles those
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """Return this from a route to skip jsonable_encoder on plain Graph data."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+# Server preference when the client accepts several with the same q-value
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Best Content-Encoding we support for an Accept-Encoding header, or None."""
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0)
+
+
+def should_compress(body: bytes) -> bool:
+    return len(body) >= settings.RESPONSE_COMPRESS_MIN_BYTES
@@ -1,13 +1,10 @@
-from fastapi import APIRouter, Form
-from pydantic import BaseModel
-import httpx
+from fastapi import APIRouter
+from app.services.facebook.client import get_graph_client
 
 router = APIRouter(prefix="/facebook", tags=["Facebook Ads"])
 
-FB_API_URL = "https://graph.facebook.com/v22.0"
-
 async def create_video_ad(account_id, adset_id, page_id, ad_name, video_id, thumbnail_hash, message, link, access_token):
-    url = f"{FB_API_URL}/act_{account_id}/ads"
+    path = f"act_{account_id}/ads"
 
     payload = {
         "name": ad_name,
@@ -32,10 +29,48 @@ async def create_video_ad(account_id, adset_id, page_id, ad_name, video_id, thum
         "status": "PAUSED"
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            url,
-            params={"access_token": access_token},
-            json=payload
-        )
-        return response.json()
\ No newline at end of file
+    return await get_graph_client().post(
+        path,
+        params={"access_token": access_token},
+        json=payload
+    )
+
+async def create_video_creative(account_id, page_id, ad_name, message, link, video_id, thumbnail_hash, access_token):
+    creative_payload = {
+        "name": ad_name,
+        "object_story_spec": {
+            "page_id": page_id,
+            "video_data": {
+                "video_id": video_id,
+                "title": ad_name,
+                "message": message,
+                "image_hash": thumbnail_hash,
+                "call_to_action": {"type": "LEARN_MORE", "value": {"link": link}},
+            },
+        },
+    }
+
+    return await get_graph_client().post(
+        f"act_{account_id}/adcreatives",
+        params={"access_token": access_token},
+        json=creative_payload,
+    )
+
+
+async def create_ad(account_id, adset_id, ad_name, creative_id, access_token, tracking_specs=None, status="PAUSED"):
+    publish_payload = {
+        "name": ad_name,
+        "adset_id": adset_id,
+        "creative": {"creative_id": creative_id},
+        "tracking_specs": tracking_specs or [],
+        "status": status,
+    }
+
+    return await get_graph_client().post(
+        f"act_{account_id}/ads",
+        params={
+            "access_token": access_token,
+            "fields": "status,effective_status,issues_info",
+        },
+        json=publish_payload,
+    )
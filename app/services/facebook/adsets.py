@@ -1,9 +1,7 @@
-import httpx
-
-FB_API_URL = "https://graph.facebook.com/v22.0"
+from app.services.facebook.client import get_graph_client
 
 async def create_adset(account_id, campaign_id, name, daily_budget, start_time, end_time, access_token, targeting=None):
-    url = f"{FB_API_URL}/act_{account_id}/adsets"
+    path = f"act_{account_id}/adsets"
 
     # Default targeting if none provided
     if targeting is None:
@@ -28,10 +26,8 @@ async def create_adset(account_id, campaign_id, name, daily_budget, start_time,
         # "bid_strategy": "LOWEST_COST_WITHOUT_CAP"  # automatic bidding
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            url,
-            params={"access_token": access_token},
-            json=payload
-        )
-        return response.json()
\ No newline at end of file
+    return await get_graph_client().post(
+        path,
+        params={"access_token": access_token},
+        json=payload
+    )
\ No newline at end of file
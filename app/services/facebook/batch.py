@@ -0,0 +1,132 @@
+import json
+from urllib.parse import quote
+
+from app.metrics import graph_endpoint
+from app.services.facebook.client import get_graph_client, GraphAPIError
+from app.services.facebook.retry import is_safe_post
+
+MAX_BATCH_SIZE = 50  # Graph rejects batches with more operations
+
+
+def ref(name: str, path: str = "$.id") -> str:
+    """
+    JSONPath reference to an earlier operation's result,
+    e.g. ref("create_campaign") -> "{result=create_campaign:$.id}"
+    """
+    return f"{{result={name}:{path}}}"
+
+
+def _encode_body(body: dict) -> str:
+    # Batch bodies are form-encoded strings; nested values are sent as JSON.
+    # `{result=...}` references must survive encoding so Graph can substitute them.
+    parts = []
+    for key, value in body.items():
+        if not isinstance(value, str):
+            value = json.dumps(value)
+        parts.append(f"{quote(key)}={quote(value, safe='{}=:$.*[]')}")
+    return "&".join(parts)
+
+
+class GraphBatch:
+    """
+    Packs up to 50 Graph operations into a single `POST /` call.
+    Operations can reference each other with `depends_on` + `ref(...)`.
+    """
+
+    def __init__(self):
+        self.operations: list[dict] = []
+
+    def add(
+        self,
+        method: str,
+        relative_url: str,
+        body: dict | None = None,
+        name: str | None = None,
+        depends_on: str | None = None,
+        omit_response_on_success: bool | None = None,
+    ) -> str | None:
+        if len(self.operations) >= MAX_BATCH_SIZE:
+            raise ValueError(f"A Graph batch can hold at most {MAX_BATCH_SIZE} operations")
+
+        operation = {"method": method.upper(), "relative_url": relative_url.lstrip("/")}
+        if body:
+            operation["body"] = _encode_body(body)
+        if name:
+            operation["name"] = name
+            # Graph drops responses of named operations by default; keep them
+            # so every operation gets a result
+            if omit_response_on_success is None:
+                omit_response_on_success = False
+        if depends_on:
+            operation["depends_on"] = depends_on
+        if omit_response_on_success is not None:
+            operation["omit_response_on_success"] = omit_response_on_success
+
+        self.operations.append(operation)
+        return name
+
+    @property
+    def retry_safe(self) -> bool:
+        """Reads and updates of existing objects only, so resending the batch is harmless."""
+        return all(
+            op["method"] == "GET" or (op["method"] == "POST" and is_safe_post(graph_endpoint(op["relative_url"])))
+            for op in self.operations
+        )
+
+    def __len__(self):
+        return len(self.operations)
+
+    async def execute(self, access_token: str) -> list[dict]:
+        """
+        Send the batch and return one result per operation, in order.
+        A failing operation does not fail the whole batch.
+        """
+        data = await get_graph_client().post(
+            "",
+            data={"access_token": access_token, "batch": json.dumps(self.operations)},
+            retry_safe=self.retry_safe,
+        )
+
+        if isinstance(data, dict) and "error" in data:
+            raise GraphAPIError(data["error"])
+
+        results = []
+        succeeded = {}  # operation name -> success, to resolve omitted responses
+        for op, response in zip(self.operations, data):
+            result = _parse_result(op, response, succeeded.get(op.get("depends_on"), True))
+            if op.get("name"):
+                succeeded[op["name"]] = result["success"]
+            results.append(result)
+        return results
+
+
+def _parse_result(operation: dict, response: dict | None, dependency_ok: bool = True) -> dict:
+    result = {
+        "name": operation.get("name"),
+        "method": operation["method"],
+        "relative_url": operation["relative_url"],
+    }
+
+    # Graph returns null both for operations skipped because a dependency
+    # failed and for successful ones sent with omit_response_on_success
+    if response is None:
+        if operation.get("omit_response_on_success") and dependency_ok:
+            result.update(code=None, success=True, body=None)
+        else:
+            result.update(code=None, success=False, error="Not executed (dependency failed)")
+        return result
+
+    try:
+        body = json.loads(response.get("body") or "null")
+    except ValueError:
+        body = response.get("body")
+
+    result["code"] = response.get("code")
+    result["body"] = body
+
+    if isinstance(body, dict) and "error" in body:
+        result.update(success=False, error=body["error"].get("message", "Unknown Facebook Error"))
+    else:
+        result["success"] = 200 <= (result["code"] or 0) < 300
+
+    return result
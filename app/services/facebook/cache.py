@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import itertools
+import time
+from collections import OrderedDict
+
+from app import deadline
+from app.config import settings
+from app.services.facebook.client import get_graph_client, GraphClient
+
+# Seconds a cached read stays fresh, per route
+CACHE_TTLS = {
+    "pages": 60,
+    "ad_accounts": 300,
+    "campaign": 30,
+    "adsets": 30,
+    "campaigns": 30,
+    "ads": 30,
+}
+
+
+def token_hash(access_token: str) -> str:
+    # Never keep raw tokens in cache keys
+    return hashlib.sha256(access_token.encode()).hexdigest()
+
+
+class GraphCache:
+    """
+    Bounded LRU cache of Graph GET responses with per-entry TTL.
+    Expired entries are still served for `stale_seconds` while a background
+    task refreshes them (stale-while-revalidate).
+    """
+
+    def __init__(self, max_entries: int, stale_seconds: float):
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self._entries: OrderedDict[tuple, tuple[object, float]] = OrderedDict()
+        # Bumped on every invalidation so in-flight fetches don't store stale data.
+        # Values come from one counter and never repeat; tokens evicted from this
+        # LRU fall back to `_generation_floor`, which only grows, so a fetch (or
+        # mirror sync) started before an eviction never looks current after it.
+        self._generations: OrderedDict[str, int] = OrderedDict()
+        self._generation_counter = itertools.count(1)
+        self._generation_floor = 0
+        self._refreshing: dict[tuple, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def key(self, access_token: str, path: str, params: dict | None = None) -> tuple:
+        params = tuple(sorted(
+            (k, str(v)) for k, v in (params or {}).items() if k != "access_token"
+        ))
+        return (token_hash(access_token), path.strip("/"), params)
+
+    async def get_or_fetch(self, key: tuple, fetch, ttl: float):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            now = time.monotonic()
+            if now < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if now < expires_at + self.stale_seconds:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing[key] = asyncio.create_task(self._refresh(key, fetch, ttl))
+                return value
+
+        self.misses += 1
+        generation = self._generation(key[0])
+        value = await fetch()
+        self._store(key, value, ttl, generation)
+        return value
+
+    async def _refresh(self, key: tuple, fetch, ttl: float):
+        deadline.detach()  # outlives the request that noticed the stale entry
+        generation = self._generation(key[0])
+        try:
+            value = await fetch()
+            self._store(key, value, ttl, generation)
+        except Exception:
+            pass  # keep serving the stale value until it ages out
+        finally:
+            self._refreshing.pop(key, None)
+
+    def _store(self, key: tuple, value, ttl: float, generation: int):
+        if isinstance(value, dict) and "error" in value:
+            return  # never cache Graph errors
+        if self._generation(key[0]) != generation:
+            return  # invalidated while the fetch was in flight
+
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _generation(self, th: str) -> int:
+        return self._generations.get(th, self._generation_floor)
+
+    def generation(self, access_token: str) -> int:
+        """Changed by every invalidate() for this token (i.e. after each write)."""
+        return self._generation(token_hash(access_token))
+
+    def invalidate(self, access_token: str):
+        """Drop every cached read made with this token (call after writes)."""
+        th = token_hash(access_token)
+        self._generations[th] = next(self._generation_counter)
+        self._generations.move_to_end(th)
+        while len(self._generations) > self.max_entries:
+            _, evicted = self._generations.popitem(last=False)
+            self._generation_floor = max(self._generation_floor, evicted)
+        for key in [k for k in self._entries if k[0] == th]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+
+graph_cache = GraphCache(
+    max_entries=settings.GRAPH_CACHE_MAX_ENTRIES,
+    stale_seconds=settings.GRAPH_CACHE_STALE_SECONDS,
+)
+
+
+async def cached_get(path: str, params: dict, ttl: float, client: GraphClient | None = None):
+    """GET through the shared Graph client, served from `graph_cache` when possible."""
+    client = client or get_graph_client()
+    key = graph_cache.key(params["access_token"], path, params)
+    return await graph_cache.get_or_fetch(key, lambda: client.get(path, params=params), ttl)
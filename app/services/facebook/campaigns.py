@@ -1,7 +1,7 @@
-import httpx
 from fastapi import HTTPException
+from app.services.facebook.client import get_graph_client
+from app.services.facebook.retry import error_status
 
-FB_API_URL = "https://graph.facebook.com/v22.0"
 VALID_OBJECTIVES = [
     "APP_INSTALLS", "BRAND_AWARENESS", "EVENT_RESPONSES", "LEAD_GENERATION",
     "LINK_CLICKS", "LOCAL_AWARENESS", "MESSAGES", "OFFER_CLAIMS", "PAGE_LIKES",
@@ -21,7 +21,7 @@ async def create_campaign(account_id: str, name: str, objective: str, access_tok
             detail=f"Invalid objective '{objective}'. Must be one of: {', '.join(VALID_OBJECTIVES)}"
         )
 
-    url = f"{FB_API_URL}/act_{account_id}/campaigns"
+    path = f"act_{account_id}/campaigns"
 
     payload = {
         "name": name,
@@ -30,15 +30,11 @@ async def create_campaign(account_id: str, name: str, objective: str, access_tok
         "special_ad_categories": special_ad_categories
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            url,
-            params={"access_token": access_token},
-            json=payload,
-            timeout=30
-        )
-
-    data = response.json()
+    data = await get_graph_client().post(
+        path,
+        params={"access_token": access_token},
+        json=payload,
+    )
 
     # Handle Facebook API errors
     if "error" in data:
@@ -50,7 +46,7 @@ async def create_campaign(account_id: str, name: str, objective: str, access_tok
         error_type = data['error'].get('type', 'N/A')
         
         raise HTTPException(
-            status_code=400,
+            status_code=error_status(data['error']),
             detail=f"Facebook API Error ({error_type} {error_code}): {facebook_error_message}"
         )
     
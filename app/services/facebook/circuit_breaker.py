@@ -0,0 +1,149 @@
+import time
+from collections import deque
+
+from app.config import settings
+from app import metrics
+
+# Breakers are per endpoint family, so an upload outage doesn't stop reads
+FAMILIES = ("oauth", "reads", "writes", "uploads")
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_OAUTH_ENDPOINTS = {"oauth/access_token", "me"}
+_UPLOAD_SUFFIXES = ("advideos", "adimages")
+
+
+class GraphCircuitOpenError(Exception):
+    """Raised instead of calling Graph while a family's breaker is open."""
+
+    def __init__(self, family: str, retry_after: float):
+        self.family = family
+        self.retry_after = retry_after
+        super().__init__(f"Graph API {family} calls are failing, retry in {retry_after:.0f}s")
+
+
+def endpoint_family(method: str, endpoint: str) -> str:
+    """Breaker family of a call from its metrics endpoint label (see metrics.graph_endpoint)."""
+    if endpoint in _OAUTH_ENDPOINTS:
+        return "oauth"
+    if endpoint.endswith(_UPLOAD_SUFFIXES):
+        return "uploads"
+    return "writes" if method != "GET" else "reads"
+
+
+class _Breaker:
+    def __init__(self):
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.calls: deque[tuple[float, bool, bool]] = deque()  # (time, failed, slow)
+
+
+class CircuitBreaker:
+    """
+    Per-family breaker over a sliding window of recent Graph calls.
+
+    - closed: calls go through; once the window holds `min_calls` calls and
+      the share of failures (transport errors, 5xx, transient Graph errors)
+      or of calls slower than `slow_seconds` reaches its threshold, it opens
+    - open: calls fail at once with GraphCircuitOpenError for `open_seconds`
+    - half-open: one probe call at a time goes through; success closes the
+      breaker, failure opens it again
+    """
+
+    def __init__(
+        self,
+        window: float,
+        min_calls: int,
+        error_rate: float,
+        slow_seconds: float,
+        slow_rate: float,
+        open_seconds: float,
+    ):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self._breakers = {family: _Breaker() for family in FAMILIES}
+        for family in FAMILIES:
+            metrics.GRAPH_BREAKER_STATE.set(0, family)
+
+    def _set_state(self, family: str, breaker: _Breaker, state: str):
+        if state == OPEN:
+            breaker.opened_at = time.monotonic()
+            metrics.GRAPH_BREAKER_OPENED.inc(family)
+        if state == CLOSED:
+            breaker.calls.clear()
+        breaker.state = state
+        breaker.probing = False
+        metrics.GRAPH_BREAKER_STATE.set(_STATE_VALUES[state], family)
+
+    def allow(self, family: str):
+        """Raise GraphCircuitOpenError unless a call in `family` may go out now."""
+        breaker = self._breakers[family]
+        if breaker.state == OPEN:
+            remaining = breaker.opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                metrics.GRAPH_BREAKER_REJECTED.inc(family)
+                raise GraphCircuitOpenError(family, remaining)
+            self._set_state(family, breaker, HALF_OPEN)
+
+        if breaker.state == HALF_OPEN:
+            if breaker.probing:
+                metrics.GRAPH_BREAKER_REJECTED.inc(family)
+                raise GraphCircuitOpenError(family, 1)
+            breaker.probing = True
+
+    def record(self, family: str, failed: bool | None, seconds: float):
+        """Outcome of an allowed call; `failed=None` (cancelled) only frees the probe slot."""
+        breaker = self._breakers[family]
+        if failed is None:
+            breaker.probing = False
+            return
+
+        slow = seconds >= self.slow_seconds
+        if breaker.state == HALF_OPEN:
+            self._set_state(family, breaker, OPEN if failed or slow else CLOSED)
+            return
+        if breaker.state == OPEN:
+            return  # a call that started before the breaker opened
+
+        now = time.monotonic()
+        calls = breaker.calls
+        calls.append((now, failed, slow))
+        while calls and calls[0][0] < now - self.window:
+            calls.popleft()
+
+        if len(calls) >= self.min_calls:
+            failures = sum(1 for _, f, _ in calls if f)
+            slow_calls = sum(1 for _, _, s in calls if s)
+            if failures / len(calls) >= self.error_rate or slow_calls / len(calls) >= self.slow_rate:
+                self._set_state(family, breaker, OPEN)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        snapshot = {}
+        for family, breaker in self._breakers.items():
+            calls = [c for c in breaker.calls if c[0] >= now - self.window]
+            snapshot[family] = {
+                "state": breaker.state,
+                "calls": len(calls),
+                "failures": sum(1 for _, f, _ in calls if f),
+                "slow": sum(1 for _, _, s in calls if s),
+            }
+            if breaker.state == OPEN:
+                snapshot[family]["retry_after"] = round(max(breaker.opened_at + self.open_seconds - now, 0), 1)
+        return snapshot
+
+
+circuit_breaker = CircuitBreaker(
+    window=settings.GRAPH_BREAKER_WINDOW,
+    min_calls=settings.GRAPH_BREAKER_MIN_CALLS,
+    error_rate=settings.GRAPH_BREAKER_ERROR_RATE,
+    slow_seconds=settings.GRAPH_BREAKER_SLOW_SECONDS,
+    slow_rate=settings.GRAPH_BREAKER_SLOW_RATE,
+    open_seconds=settings.GRAPH_BREAKER_OPEN_SECONDS,
+)
@@ -1,13 +1,305 @@
-import requests
+import asyncio
+import contextvars
+import importlib.util
+import time
+from contextlib import contextmanager
+
 import httpx
+from app.config import settings
+from app import deadline, metrics
+from app.services.facebook import retry
+from app.services.facebook.circuit_breaker import GraphCircuitOpenError, circuit_breaker, endpoint_family
+from app.services.facebook.rate_limit import GraphRateLimitError, call_scope, rate_limiter
+from app.services.facebook.retry import retry_policy
 
-FB_GRAPH_URL = "https://graph.facebook.com/v24.0"
+FB_GRAPH_URL = f"{settings.FB_GRAPH_URL}/{settings.FB_API_VERSION}"
 
-async def fb_get(path: str, params: dict):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{FB_GRAPH_URL}/{path}", params=params)
+# Errors with their own answer (429 / 503 + Retry-After / 504, see app/main.py):
+# multi-step services let them through instead of wrapping them
+FAIL_FAST_ERRORS = (GraphRateLimitError, GraphCircuitOpenError, deadline.DeadlineExceeded)
+
+
+class GraphAPIError(Exception):
+    """Raised when Graph answers with an `error` object."""
+
+    def __init__(self, error: dict):
+        self.error = error
+        super().__init__(error.get("message", "Unknown Facebook Error"))
+
+
+class WriteLog:
+    """What the Graph writes (non-GET calls) made inside `track_writes()` may have done."""
+
+    def __init__(self):
+        self.applied = False  # a write got a success response
+        self.unknown = False  # a write may or may not have reached Graph
+
+    @property
+    def clean(self) -> bool:
+        """No write can have changed anything on Graph."""
+        return not (self.applied or self.unknown)
+
+    def record(self, result: httpx.Response | BaseException):
+        if isinstance(result, httpx.Response):
+            if result.status_code < 400:
+                self.applied = True
+            elif retry.classify(result) == "transient":
+                self.unknown = True  # Graph failed while (maybe) acting on it
+        elif not (isinstance(result, httpx.TransportError) and retry.classify_exception(result) == "not_sent"):
+            self.unknown = True  # dropped connection, timeout, deadline, cancellation
+
+
+_write_log: contextvars.ContextVar[WriteLog | None] = contextvars.ContextVar("graph_write_log", default=None)
+
+
+@contextmanager
+def track_writes():
+    """Record the outcome of every Graph write made in this context (and tasks it starts)."""
+    log = WriteLog()
+    token = _write_log.set(log)
+    try:
+        yield log
+    finally:
+        _write_log.reset(token)
+
+
+def _access_token(path: str, kwargs: dict) -> str | None:
+    """Token a call is made with: in its params / form body, or in a paging URL."""
+    for name in ("params", "data"):
+        values = kwargs.get(name)
+        if isinstance(values, dict) and values.get("access_token"):
+            return values["access_token"]
+    if "access_token=" in path:
+        return httpx.URL(path).params.get("access_token")
+    return None
+
+
+class GraphClient:
+    """
+    One pooled httpx client for every call to the Graph API.
+    Created once in the app lifespan so connections (and TLS sessions)
+    to graph.facebook.com are reused across requests.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
+        # HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+        http2 = settings.GRAPH_HTTP2 and importlib.util.find_spec("h2") is not None
+
+        self.base_url = FB_GRAPH_URL
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=http2,
+            timeout=settings.GRAPH_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.GRAPH_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GRAPH_MAX_KEEPALIVE,
+                keepalive_expiry=settings.GRAPH_KEEPALIVE_EXPIRY,
+            ),
+            transport=transport,
+        )
+        metrics.GRAPH_POOL_MAX.set(settings.GRAPH_MAX_CONNECTIONS)
+
+        # Single-flight: identical concurrent GETs share one in-flight request
+        # (key -> [task, number of callers waiting on it])
+        self._inflight: dict[tuple, list] = {}
+        self.coalesced = 0
+
+    async def request(self, method: str, path: str, retry_safe: bool = False, **kwargs) -> httpx.Response:
+        """
+        Send one Graph call, retrying transient failures per `retry_policy`.
+        Pass `retry_safe=True` for a POST that may be repeated without
+        side effects. After the last try, the last response is returned
+        (or its transport error raised). Raises DeadlineExceeded once the
+        inbound request's deadline has passed.
+        """
+        endpoint = metrics.graph_endpoint(path)
+        family = endpoint_family(method, endpoint)
+        scope = call_scope(path, _access_token(path, kwargs))
+        attempt = 1
+        delay = retry_policy.base_delay
+        while True:
+            deadline.check()
+            try:
+                # Wait (or fail with GraphRateLimitError) while the account/app is near its quota;
+                # never past the deadline, and a retry only as long as the retry budget allows
+                max_wait = deadline.remaining() if attempt == 1 else retry.remaining_budget()
+                await rate_limiter.acquire(scope, max_wait=max_wait)
+                # Fail fast while this family of Graph endpoints is down
+                circuit_breaker.allow(family)
+            except (GraphRateLimitError, GraphCircuitOpenError) as e:
+                if attempt == 1:
+                    raise
+                metrics.GRAPH_RETRY_GIVEUPS.inc(
+                    endpoint, "rate_limit" if isinstance(e, GraphRateLimitError) else "circuit_open",
+                )
+                break
+
+            start = time.perf_counter()
+            failed = None
+            write_log = _write_log.get() if method != "GET" else None
+            try:
+                result = await deadline.wait(self._send(method, path, endpoint, scope, **kwargs))
+                reason = retry.classify(result)
+                failed = reason == "transient"
+            except httpx.TransportError as e:
+                result = e
+                reason = retry.classify_exception(e)
+                failed = True
+            except BaseException as e:
+                if write_log is not None:
+                    write_log.record(e)
+                raise
+            finally:
+                circuit_breaker.record(family, failed, time.perf_counter() - start)
+            if write_log is not None:
+                write_log.record(result)
+
+            if reason is None or not retry_policy.retryable(reason, method, endpoint, retry_safe):
+                break
+            if attempt >= retry_policy.max_attempts:
+                metrics.GRAPH_RETRY_GIVEUPS.inc(endpoint, "attempts")
+                break
+            delay = retry_policy.backoff(delay)
+            budget = retry.remaining_budget()
+            if budget is not None and delay >= budget:
+                metrics.GRAPH_RETRY_GIVEUPS.inc(endpoint, "budget")
+                break
+
+            metrics.GRAPH_RETRIES.inc(endpoint, reason)
+            metrics.GRAPH_RETRY_WAIT_SECONDS.inc(endpoint, amount=delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def _send(self, method: str, path: str, endpoint: str, scope: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        status = "error"
+        metrics.GRAPH_IN_FLIGHT.inc()
+        try:
+            response = await self.http.request(method, path.lstrip("/"), **kwargs)
+            status = response.status_code
+        finally:
+            metrics.GRAPH_IN_FLIGHT.dec()
+            metrics.GRAPH_REQUEST_SECONDS.observe(time.perf_counter() - start, method, endpoint, status)
+
+        metrics.GRAPH_BYTES_SENT.inc(endpoint, amount=int(response.request.headers.get("content-length", 0)))
+        metrics.GRAPH_BYTES_RECEIVED.inc(endpoint, amount=len(response.content))
+        if response.status_code >= 400:
+            metrics.GRAPH_ERRORS.inc(endpoint, retry.graph_error(response).get("code", "unknown"))
+
+        rate_limiter.record(scope, response)
+        return response
+
+    async def _get(self, path: str, params: dict | None = None, **kwargs) -> dict:
+        response = await self.request("GET", path, params=params, **kwargs)
+        return response.json()
+
+    async def get(self, path: str, params: dict | None = None, **kwargs) -> dict:
+        # Only plain GETs are coalesced; anything with extra options runs on its own
+        if set(kwargs) - {"timeout"}:
+            return await self._get(path, params=params, **kwargs)
+
+        key = (path.lstrip("/"), tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+        else:
+            shared = self._inflight[key] = [asyncio.ensure_future(self._shared_get(path, params, **kwargs)), 0]
+            shared[0].add_done_callback(lambda _, shared=shared: self._forget(key, shared))
+
+        task = shared[0]
+        shared[1] += 1
+        try:
+            # shield: one caller giving up must not cancel the request for the others,
+            # but once every caller has given up (deadline, disconnect) nobody needs it
+            return await deadline.wait(asyncio.shield(task))
+        finally:
+            shared[1] -= 1
+            if shared[1] == 0 and not task.done():
+                # Forget it first, so a caller arriving now starts a fresh request
+                # instead of joining one that is being cancelled
+                self._forget(key, shared)
+                task.cancel()
+
+    def _forget(self, key: tuple, shared: list):
+        if self._inflight.get(key) is shared:
+            del self._inflight[key]
+
+    async def _shared_get(self, path: str, params: dict | None, **kwargs) -> dict:
+        # Serves every coalesced caller, so no single caller's deadline applies;
+        # each one waits up to its own (see get())
+        deadline.detach()
+        return await self._get(path, params=params, **kwargs)
+
+    async def post(self, path: str, params: dict | None = None, **kwargs) -> dict:
+        response = await self.request("POST", path, params=params, **kwargs)
         return response.json()
 
-def fb_post(path: str, payload: dict):
-    url = f"{FB_GRAPH_URL}/{path}"
-    return requests.post(url, data=payload).json()
+    async def paginate(self, path: str, params: dict | None = None, **kwargs):
+        """
+        Yield every item of a Graph edge, following `paging.next` cursors
+        one page at a time so the full list is never held in memory.
+        """
+        data = await self.get(path, params=params, **kwargs)
+        while True:
+            if "error" in data:
+                raise GraphAPIError(data["error"])
+
+            for item in data.get("data", []):
+                yield item
+
+            next_url = data.get("paging", {}).get("next")
+            if not next_url:
+                return
+            # `next` is an absolute URL that already carries the params
+            data = await self.get(next_url, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "coalesced": self.coalesced,
+            "rate_limits": rate_limiter.snapshot(),
+            "circuit_breakers": circuit_breaker.snapshot(),
+        }
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+_graph_client: GraphClient | None = None
+
+
+async def start_graph_client(transport: httpx.AsyncBaseTransport | None = None) -> GraphClient:
+    global _graph_client
+    if _graph_client is None:
+        _graph_client = GraphClient(transport=transport)
+    return _graph_client
+
+
+async def close_graph_client():
+    global _graph_client
+    if _graph_client is not None:
+        await _graph_client.aclose()
+        _graph_client = None
+
+
+def get_graph_client() -> GraphClient:
+    """
+    FastAPI dependency (and plain accessor for services).
+    Falls back to creating the client lazily when used outside the lifespan.
+    """
+    global _graph_client
+    if _graph_client is None:
+        _graph_client = GraphClient()
+    return _graph_client
+
+
+async def fb_get(path: str, params: dict):
+    return await get_graph_client().get(path, params=params)
+
+
+async def fb_post(path: str, payload: dict):
+    return await get_graph_client().post(path, data=payload)
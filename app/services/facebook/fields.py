@@ -0,0 +1,65 @@
+from fastapi import HTTPException
+
+# Fields clients may ask for through `?fields=`, per Graph object type
+ALLOWED_FIELDS = {
+    "campaign": {
+        "id", "name", "account_id", "objective", "status", "effective_status",
+        "configured_status", "created_time", "updated_time", "start_time", "stop_time",
+        "daily_budget", "lifetime_budget", "budget_remaining", "spend_cap",
+        "bid_strategy", "buying_type", "special_ad_categories", "issues_info",
+    },
+    "adset": {
+        "id", "name", "account_id", "campaign_id", "status", "effective_status",
+        "configured_status", "created_time", "updated_time", "start_time", "end_time",
+        "daily_budget", "lifetime_budget", "budget_remaining", "bid_amount",
+        "bid_strategy", "billing_event", "optimization_goal", "targeting", "issues_info",
+    },
+    "ad": {
+        "id", "name", "account_id", "campaign_id", "adset_id", "status", "effective_status",
+        "configured_status", "created_time", "updated_time", "creative", "tracking_specs",
+        "issues_info",
+    },
+    "creative": {
+        "id", "name", "account_id", "status", "title", "body", "object_type",
+        "object_story_spec", "call_to_action_type", "thumbnail_url", "video_id", "image_hash",
+    },
+    "ad_account": {
+        "id", "account_id", "name", "account_status", "disable_reason", "currency",
+        "timezone_id", "timezone_name", "timezone_offset_hours_utc", "amount_spent",
+        "balance", "spend_cap", "min_daily_budget", "business", "owner", "created_time",
+    },
+}
+
+# What each route returned before `fields` was selectable
+DEFAULT_FIELDS = {
+    "campaign": "id,name,objective,status,effective_status,created_time",
+    "adset": "id,name,campaign_id,status",
+    "ad": "id,name,adset_id,campaign_id,status,effective_status,creative",
+    "creative": "id,name,title,body,thumbnail_url",
+    "ad_account": (
+        "name,account_id,account_status,disable_reason,"
+        "timezone_id,timezone_name,timezone_offset_hours_utc,"
+        "currency,id"
+    ),
+}
+
+
+def resolve_fields(object_type: str, requested: str | None) -> str:
+    """
+    Validate a comma-separated `fields` value against the allow-list.
+    `id` is always included, and the result is sorted so equivalent
+    requests share a cache entry.
+    """
+    if not requested:
+        return DEFAULT_FIELDS[object_type]
+
+    fields = {field.strip() for field in requested.split(",") if field.strip()}
+    unknown = sorted(fields - ALLOWED_FIELDS[object_type])
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {object_type} fields: {', '.join(unknown)}. "
+                   f"Allowed: {', '.join(sorted(ALLOWED_FIELDS[object_type]))}",
+        )
+
+    return ",".join(sorted(fields | {"id"}))
@@ -1,21 +1,154 @@
-from facebook_business.api import FacebookAdsApi
-from facebook_business.adobjects.adimage import AdImage
-from facebook_business.adobjects.advideo import AdVideo
+import json
+import time
 
-def upload_media_service(account_id: str, media_type: str, access_token: str, temp_path: str):
-    FacebookAdsApi.init(access_token=access_token)
+from app import deadline
+from app.services.facebook.cache import CACHE_TTLS, cached_get
+from app.services.facebook.circuit_breaker import circuit_breaker
+from app.services.facebook.client import get_graph_client
+from app.services.facebook.sdk import new_api, run_sdk
+from app.services.facebook.video_upload import upload_video
+from app.services.facebook.media_index import media_index
+from app.services.facebook.rate_limit import THROTTLE_ERROR_CODES
+from app.services.facebook.retry import TRANSIENT_ERROR_CODES
+
+# Graph's "object does not exist" error
+_MISSING_OBJECT_CODE = 100
+
+
+def upload_media_service(
+    account_id: str, media_type: str, access_token: str, temp_path: str, timeout: float | None = None,
+):
+    """
+    Blocking SDK upload; call it through `run_sdk` from async code.
+    """
+    # Imported on first use: the SDK object model is heavy and only this path needs it
+    from facebook_business.adobjects.adimage import AdImage
+    from facebook_business.adobjects.advideo import AdVideo
+
+    api = new_api(access_token, timeout=timeout)
 
     if media_type.lower() == "image":
-        image = AdImage(parent_id=account_id)
+        image = AdImage(parent_id=account_id, api=api)
         image[AdImage.Field.filename] = temp_path
         image.remote_create()
         return {"image_hash": image[AdImage.Field.hash]}
 
     elif media_type.lower() == "video":
-        video = AdVideo(parent_id=account_id)
+        video = AdVideo(parent_id=account_id, api=api)
         video[AdVideo.Field.filepath] = temp_path
         video.remote_create()
         return {"video_id": video[AdVideo.Field.id]}
 
     else:
         return {"error": "Invalid media_type. Must be 'image' or 'video'."}
+
+
+def _sdk_failed(exc: Exception) -> bool:
+    """Whether an SDK error counts against the `uploads` breaker, as client.request() counts its calls."""
+    if not callable(getattr(exc, "api_error_code", None)):
+        return True  # no Graph answer: connection error, timeout
+    # FacebookRequestError: only outages, not throttling or a rejected file
+    if exc.api_error_code() in THROTTLE_ERROR_CODES:
+        return False
+    return bool(
+        exc.api_transient_error()
+        or exc.api_error_code() in TRANSIENT_ERROR_CODES
+        or (exc.http_status() or 0) >= 500
+    )
+
+
+async def _sdk_upload(**kwargs) -> dict:
+    """`upload_media_service` on the SDK pool, behind the same `uploads` breaker as chunked video uploads."""
+    circuit_breaker.allow("uploads")
+    start = time.perf_counter()
+    failed = None
+    try:
+        result = await run_sdk(upload_media_service, **kwargs)
+        failed = False
+        return result
+    except Exception as e:
+        if not isinstance(e, deadline.DeadlineExceeded):
+            failed = _sdk_failed(e)
+        raise
+    finally:
+        circuit_breaker.record("uploads", failed, time.perf_counter() - start)
+
+
+async def _usable(account_id: str, media_type: str, known: dict, access_token: str) -> bool | None:
+    """
+    Whether a deduplicated upload result may be handed to this caller: True
+    when the token can read the asset in the account, False when Graph says
+    the asset is gone, None when neither is confirmed (upload as usual).
+    """
+    graph = get_graph_client()
+    if media_type.lower() == "image":
+        # Scoped to the account, so this checks access and existence at once
+        data = await graph.get(f"act_{account_id}/adimages", params={
+            "hashes": json.dumps([known["image_hash"]]),
+            "fields": "hash,status",
+            "access_token": access_token,
+        })
+        if "error" in data:
+            return None
+        return any(
+            image.get("hash") == known["image_hash"] and image.get("status") != "DELETED"
+            for image in data.get("data", [])
+        )
+
+    account = await cached_get(
+        f"act_{account_id}", {"fields": "id", "access_token": access_token}, CACHE_TTLS["ad_accounts"],
+    )
+    if "error" in account:
+        return None
+    data = await graph.get(known["video_id"], params={"fields": "id", "access_token": access_token})
+    if "error" in data:
+        return False if data["error"].get("code") == _MISSING_OBJECT_CODE else None
+    return True
+
+
+async def upload_media_file(
+    account_id: str,
+    access_token: str,
+    media_type: str,
+    path: str,
+    sha256: str,
+    title: str | None = None,
+    resume: dict | None = None,
+    on_progress=None,
+):
+    """
+    Upload a spooled file to the ad account (numeric id, no `act_` prefix).
+    Returns the stored result when these exact bytes were uploaded before
+    (and the token can still read the asset in the account), otherwise
+    uploads videos through the chunked uploader and images through the SDK.
+    Raises VideoUploadError when a video upload fails.
+    """
+    # Same bytes already uploaded to this account: reuse the hash / video id
+    known = await media_index.lookup(account_id, media_type, sha256)
+    if known is not None:
+        usable = await _usable(account_id, media_type, known, access_token)
+        if usable:
+            return {**known, "deduplicated": True}
+        if usable is False:
+            await media_index.forget(account_id, media_type, sha256)
+
+    if media_type.lower() == "video":
+        result = await upload_video(
+            account_id=f"act_{account_id}",
+            access_token=access_token,
+            path=path,
+            title=title,
+            resume=resume,
+            on_progress=on_progress,
+        )
+    else:
+        result = await _sdk_upload(
+            account_id=f"act_{account_id}",
+            media_type=media_type,
+            access_token=access_token,
+            temp_path=path,
+            timeout=deadline.remaining(),
+        )
+
+    await media_index.store(account_id, media_type, sha256, result)
+    return result
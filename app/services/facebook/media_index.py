@@ -0,0 +1,137 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+
+class MediaIndex:
+    """
+    Persistent map of (account_id, media_type, sha256 of the file) to the
+    Graph upload result (`image_hash` / `video_id`), so re-uploading the same
+    bytes to the same account skips the network upload.
+
+    Entries older than `ttl_days` are dropped, and once the index grows past
+    `max_entries` the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_days: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS media_index (
+                    account_id TEXT NOT NULL,
+                    media_type TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    PRIMARY KEY (account_id, media_type, sha256)
+                )
+                """
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS media_index_last_used ON media_index (last_used_at)"
+            )
+        return self._db
+
+    def _lookup(self, account_id: str, media_type: str, sha256: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            row = db.execute(
+                "SELECT result, created_at FROM media_index "
+                "WHERE account_id = ? AND media_type = ? AND sha256 = ?",
+                (account_id, media_type, sha256),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                db.execute(
+                    "DELETE FROM media_index WHERE account_id = ? AND media_type = ? AND sha256 = ?",
+                    (account_id, media_type, sha256),
+                )
+                db.commit()
+                return None
+            db.execute(
+                "UPDATE media_index SET last_used_at = ? "
+                "WHERE account_id = ? AND media_type = ? AND sha256 = ?",
+                (now, account_id, media_type, sha256),
+            )
+            db.commit()
+            return json.loads(row[0])
+
+    def _store(self, account_id: str, media_type: str, sha256: str, result: dict):
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO media_index VALUES (?, ?, ?, ?, ?, ?)",
+                (account_id, media_type, sha256, json.dumps(result), now, now),
+            )
+            db.execute("DELETE FROM media_index WHERE created_at < ?", (now - self.ttl_seconds,))
+            db.execute(
+                "DELETE FROM media_index WHERE rowid IN ("
+                "  SELECT rowid FROM media_index ORDER BY last_used_at DESC LIMIT -1 OFFSET ?"
+                ")",
+                (self.max_entries,),
+            )
+            db.commit()
+
+    def _forget(self, account_id: str, media_type: str, sha256: str):
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "DELETE FROM media_index WHERE account_id = ? AND media_type = ? AND sha256 = ?",
+                (account_id, media_type, sha256),
+            )
+            db.commit()
+
+    async def lookup(self, account_id: str, media_type: str, sha256: str) -> dict | None:
+        result = await run_in_threadpool(self._lookup, account_id, media_type.lower(), sha256)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    async def store(self, account_id: str, media_type: str, sha256: str, result: dict):
+        if "error" in result:
+            return
+        await run_in_threadpool(self._store, account_id, media_type.lower(), sha256, result)
+
+    async def forget(self, account_id: str, media_type: str, sha256: str):
+        """Drop an entry whose asset Graph no longer has."""
+        await run_in_threadpool(self._forget, account_id, media_type.lower(), sha256)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+media_index = MediaIndex(
+    path=settings.MEDIA_INDEX_PATH,
+    max_entries=settings.MEDIA_INDEX_MAX_ENTRIES,
+    ttl_days=settings.MEDIA_INDEX_TTL_DAYS,
+)
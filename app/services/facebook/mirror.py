@@ -0,0 +1,449 @@
+"""
+Local mirror of each ad account's campaigns, adsets, ads and creatives.
+
+Objects live in a SQLite file (WAL mode, shared by every worker) with the
+fields in MIRRORED_FIELDS, so most `?fields=` selections can be answered
+locally. Reads go through `account_mirror`:
+
+- a (account, object type) synced less than MIRROR_MAX_AGE seconds ago is
+  served straight from SQLite; older ones are synced first
+- syncs are incremental: only objects with `updated_time` after the newest
+  one already mirrored are fetched (Graph `filtering`, cursor paging).
+  Creatives have no `updated_time`, so only those referenced by mirrored
+  ads but not mirrored yet are fetched
+- incremental syncs also ask for DELETED / ARCHIVED objects (Graph leaves
+  them out of listings otherwise) and drop them from the mirror
+- every MIRROR_FULL_SYNC_HOURS a full sync re-lists the edge and drops
+  objects Graph no longer returns (e.g. deleted creatives)
+- heavy nested fields (targeting, object_story_spec, ...) are not
+  mirrored; a `?fields=` selection asking for one is read live
+- a token only reads an account it synced successfully within
+  MIRROR_ACCESS_TTL seconds, so one user's mirror never answers another's
+  token that lacks access
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from starlette.concurrency import run_in_threadpool
+
+from app import deadline
+from app.config import settings
+from app.services.facebook.cache import graph_cache, token_hash
+from app.services.facebook.client import get_graph_client, GraphAPIError
+from app.services.facebook.fields import ALLOWED_FIELDS
+
+# object type -> ad account edge
+EDGES = {"campaign": "campaigns", "adset": "adsets", "ad": "ads", "creative": "adcreatives"}
+PARENT_FIELDS = {"adset": "campaign_id", "ad": "adset_id"}
+
+# Re-fetch a little before the newest updated_time we have, in case Graph's
+# clock and the order objects reach us don't line up exactly
+_CURSOR_OVERLAP = 60
+_IDS_PER_CALL = 50
+
+# In-memory bookkeeping per worker; evicted entries only cost a sync or a re-read
+_GENERATIONS_MAX = 10_000
+_VIEWS_MAX = 256
+
+# Large nested specs: syncing them for every object of every account costs far
+# more than reading them live for the few requests that select them
+_UNMIRRORED_FIELDS = {"targeting", "object_story_spec", "tracking_specs", "issues_info"}
+MIRRORED_FIELDS = {object_type: ALLOWED_FIELDS[object_type] - _UNMIRRORED_FIELDS for object_type in EDGES}
+
+# Every effective_status, so incremental syncs also see objects deleted or
+# archived since the last one (listings leave those out by default)
+_GONE_STATUSES = {"DELETED", "ARCHIVED"}
+_LIVE_STATUSES = ["ACTIVE", "PAUSED", "IN_PROCESS", "WITH_ISSUES"]
+EFFECTIVE_STATUSES = {
+    "campaign": [*_LIVE_STATUSES, *sorted(_GONE_STATUSES)],
+    "adset": [*_LIVE_STATUSES, "CAMPAIGN_PAUSED", *sorted(_GONE_STATUSES)],
+    "ad": [
+        *_LIVE_STATUSES, "CAMPAIGN_PAUSED", "ADSET_PAUSED", "DISAPPROVED", "PENDING_REVIEW",
+        "PREAPPROVED", "PENDING_BILLING_INFO", *sorted(_GONE_STATUSES),
+    ],
+}
+
+
+def _timestamp(value: str | None) -> float | None:
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z").timestamp()
+
+
+def _project(obj: dict, fields: list[str]) -> dict:
+    return {field: obj[field] for field in fields if field in obj}
+
+
+class MirrorStore:
+    """SQLite side of the mirror; every method is blocking (run in the threadpool)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10, isolation_level=None)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS objects (
+                    type TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    account_id TEXT NOT NULL,
+                    parent_id TEXT,
+                    updated_time REAL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (type, id)
+                );
+                CREATE INDEX IF NOT EXISTS objects_account ON objects (account_id, type, updated_time);
+                CREATE INDEX IF NOT EXISTS objects_parent ON objects (type, parent_id);
+
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    account_id TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    synced_at REAL NOT NULL,
+                    full_synced_at REAL NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (account_id, type)
+                );
+
+                CREATE TABLE IF NOT EXISTS access (
+                    token_hash TEXT NOT NULL,
+                    account_id TEXT NOT NULL,
+                    verified_at REAL NOT NULL,
+                    PRIMARY KEY (token_hash, account_id)
+                );
+                """
+            )
+        return self._db
+
+    def state(self, account_id: str, object_type: str, th: str) -> dict | None:
+        """Sync state of (account, type) plus when `th` last proved access to the account."""
+        with self._lock:
+            db = self._conn()
+            row = db.execute(
+                "SELECT synced_at, full_synced_at, version FROM sync_state WHERE account_id = ? AND type = ?",
+                (account_id, object_type),
+            ).fetchone()
+            access = db.execute(
+                "SELECT verified_at FROM access WHERE token_hash = ? AND account_id = ?", (th, account_id),
+            ).fetchone()
+        if row is None:
+            return None
+        return {**dict(row), "verified_at": access[0] if access else 0.0}
+
+    def cursor(self, account_id: str, object_type: str) -> float | None:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT MAX(updated_time) FROM objects WHERE account_id = ? AND type = ?",
+                (account_id, object_type),
+            ).fetchone()
+        return row[0]
+
+    def upsert(self, account_id: str, object_type: str, objects: list[dict]) -> int:
+        """Store objects; returns how many were new or changed."""
+        parent_field = PARENT_FIELDS.get(object_type)
+        rows = [
+            (
+                object_type, obj["id"], account_id, obj.get(parent_field) if parent_field else None,
+                _timestamp(obj.get("updated_time")), json.dumps(obj, sort_keys=True),
+            )
+            for obj in objects
+        ]
+        with self._lock:
+            db = self._conn()
+            before = db.total_changes
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.executemany(
+                    "INSERT INTO objects (type, id, account_id, parent_id, updated_time, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (type, id) DO UPDATE SET account_id = excluded.account_id, "
+                    "parent_id = excluded.parent_id, updated_time = excluded.updated_time, data = excluded.data "
+                    "WHERE objects.data != excluded.data",
+                    rows,
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            return db.total_changes - before
+
+    def delete(self, account_id: str, object_type: str, ids: set[str]) -> int:
+        with self._lock:
+            db = self._conn()
+            before = db.total_changes
+            db.execute(
+                "DELETE FROM objects WHERE account_id = ? AND type = ? AND id IN (SELECT value FROM json_each(?))",
+                (account_id, object_type, json.dumps(sorted(ids))),
+            )
+            return db.total_changes - before
+
+    def delete_missing(self, account_id: str, object_type: str, seen_ids: set[str]) -> int:
+        with self._lock:
+            db = self._conn()
+            before = db.total_changes
+            db.execute(
+                "DELETE FROM objects WHERE account_id = ? AND type = ? "
+                "AND id NOT IN (SELECT value FROM json_each(?))",
+                (account_id, object_type, json.dumps(sorted(seen_ids))),
+            )
+            return db.total_changes - before
+
+    def finish_sync(self, account_id: str, object_type: str, th: str, started_at: float, full: bool, changed: bool):
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "INSERT INTO sync_state (account_id, type, synced_at, full_synced_at, version) "
+                    "VALUES (?, ?, ?, ?, 1) "
+                    "ON CONFLICT (account_id, type) DO UPDATE SET synced_at = excluded.synced_at, "
+                    "full_synced_at = CASE WHEN ? THEN excluded.full_synced_at ELSE sync_state.full_synced_at END, "
+                    "version = sync_state.version + ?",
+                    (account_id, object_type, started_at, started_at, full, int(changed)),
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO access (token_hash, account_id, verified_at) VALUES (?, ?, ?)",
+                    (th, account_id, started_at),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def missing_creative_ids(self, account_id: str) -> list[str]:
+        """Creatives referenced by this account's mirrored ads but not mirrored themselves."""
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT DISTINCT json_extract(data, '$.creative.id') FROM objects "
+                "WHERE account_id = ? AND type = 'ad' AND json_extract(data, '$.creative.id') IS NOT NULL "
+                "AND json_extract(data, '$.creative.id') NOT IN (SELECT id FROM objects WHERE type = 'creative')",
+                (account_id,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def list(self, account_id: str, object_type: str, fields: list[str]) -> list[dict]:
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT data FROM objects WHERE account_id = ? AND type = ? ORDER BY updated_time DESC, id",
+                (account_id, object_type),
+            ).fetchall()
+        return [_project(json.loads(row[0]), fields) for row in rows]
+
+    def get(self, object_type: str, object_id: str) -> tuple[str, dict] | None:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT account_id, data FROM objects WHERE type = ? AND id = ?", (object_type, object_id),
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+
+class AccountMirror:
+    def __init__(self, store: MirrorStore, max_age: float, full_sync_hours: float, access_ttl: float, page_size: int):
+        self.store = store
+        self.max_age = max_age
+        self.full_sync_seconds = full_sync_hours * 3600
+        self.access_ttl = access_ttl
+        self.page_size = page_size
+        # Single-flight: one sync per (account, type) at a time in this worker
+        self._syncs: dict[tuple[str, str], asyncio.Task] = {}
+        # (token hash, account, type) -> graph_cache generation when it last synced;
+        # a write through this worker bumps the generation and forces a sync (LRU)
+        self._generations: OrderedDict[tuple[str, str, str], int] = OrderedDict()
+        # Projected lists by (account, type, fields), valid while the sync version is
+        # unchanged and for at most `max_age` seconds (LRU)
+        self._views: OrderedDict[tuple, tuple[int, float, dict]] = OrderedDict()
+        self.reads = 0
+        self.syncs = 0
+        self.full_syncs = 0
+        self.objects_written = 0
+
+    def _fresh(self, state: dict | None, access_token: str, account_id: str, object_type: str) -> bool:
+        if state is None:
+            return False
+        now = time.time()
+        key = (token_hash(access_token), account_id, object_type)
+        generation = self._generations.get(key)
+        if generation is not None:
+            self._generations.move_to_end(key)
+        return (
+            now - state["synced_at"] < self.max_age
+            and now - state["verified_at"] < self.access_ttl
+            and generation == graph_cache.generation(access_token)
+        )
+
+    async def ensure_fresh(self, account_id: str, object_type: str, access_token: str) -> dict:
+        """Sync (account, type) unless it is within the freshness bound; returns its state."""
+        th = token_hash(access_token)
+        state = await run_in_threadpool(self.store.state, account_id, object_type, th)
+        if self._fresh(state, access_token, account_id, object_type):
+            return state
+
+        key = (account_id, object_type)
+        task = self._syncs.get(key)
+        if task is None:
+            task = self._syncs[key] = asyncio.ensure_future(self._sync_detached(account_id, object_type, access_token))
+            task.add_done_callback(lambda _: self._syncs.pop(key, None))
+        # shield: a caller hitting its deadline must not abort a sync that other
+        # callers (and the next read) will use
+        await deadline.wait(asyncio.shield(task))
+
+        state = await run_in_threadpool(self.store.state, account_id, object_type, th)
+        if not self._fresh(state, access_token, account_id, object_type):
+            # The sync ran with another token: prove this one can read the account
+            await self.sync(account_id, object_type, access_token)
+            state = await run_in_threadpool(self.store.state, account_id, object_type, th)
+        return state
+
+    async def _sync_detached(self, account_id: str, object_type: str, access_token: str):
+        deadline.detach()
+        await self.sync(account_id, object_type, access_token)
+
+    async def sync(self, account_id: str, object_type: str, access_token: str, full: bool = False) -> int:
+        """Bring (account, type) up to date from Graph; returns how many objects changed."""
+        th = token_hash(access_token)
+        generation = graph_cache.generation(access_token)
+        started_at = time.time()
+        state = await run_in_threadpool(self.store.state, account_id, object_type, th)
+        full = full or state is None or started_at - state["full_synced_at"] > self.full_sync_seconds
+
+        if object_type == "creative":
+            changed, seen = await self._sync_creatives(account_id, access_token, full)
+        else:
+            changed, seen = await self._sync_edge(account_id, object_type, access_token, full)
+
+        if full:
+            changed += await run_in_threadpool(self.store.delete_missing, account_id, object_type, seen)
+            self.full_syncs += 1
+        await run_in_threadpool(self.store.finish_sync, account_id, object_type, th, started_at, full, changed > 0)
+        self._generations[(th, account_id, object_type)] = generation
+        self._generations.move_to_end((th, account_id, object_type))
+        while len(self._generations) > _GENERATIONS_MAX:
+            self._generations.popitem(last=False)
+        self.syncs += 1
+        self.objects_written += changed
+        return changed
+
+    async def _sync_edge(self, account_id: str, object_type: str, access_token: str, full: bool):
+        params = {
+            "fields": ",".join(sorted(MIRRORED_FIELDS[object_type])),
+            "limit": self.page_size,
+            "access_token": access_token,
+        }
+        if not full:
+            cursor = await run_in_threadpool(self.store.cursor, account_id, object_type)
+            if cursor is not None:
+                params["filtering"] = json.dumps([
+                    {"field": "updated_time", "operator": "GREATER_THAN", "value": int(cursor) - _CURSOR_OVERLAP},
+                    {"field": "effective_status", "operator": "IN", "value": EFFECTIVE_STATUSES[object_type]},
+                ])
+
+        changed, seen, page, gone = 0, set(), [], set()
+        async for obj in get_graph_client().paginate(f"act_{account_id}/{EDGES[object_type]}", params=params):
+            if obj.get("effective_status") in _GONE_STATUSES:
+                gone.add(obj["id"])
+                continue
+            page.append(obj)
+            seen.add(obj["id"])
+            if len(page) >= self.page_size:
+                changed += await run_in_threadpool(self.store.upsert, account_id, object_type, page)
+                page = []
+        if page:
+            changed += await run_in_threadpool(self.store.upsert, account_id, object_type, page)
+        if gone:
+            changed += await run_in_threadpool(self.store.delete, account_id, object_type, gone)
+        return changed, seen
+
+    async def _sync_creatives(self, account_id: str, access_token: str, full: bool):
+        if full:
+            return await self._sync_edge(account_id, "creative", access_token, full=True)
+
+        # Creatives can't be filtered by updated_time; they are (mostly) immutable,
+        # so fetch the ones new ads point at
+        await self.ensure_fresh(account_id, "ad", access_token)
+        missing = await run_in_threadpool(self.store.missing_creative_ids, account_id)
+        changed = 0
+        fields = ",".join(sorted(MIRRORED_FIELDS["creative"]))
+        for i in range(0, len(missing), _IDS_PER_CALL):
+            ids = missing[i:i + _IDS_PER_CALL]
+            data = await get_graph_client().get(
+                "", params={"ids": ",".join(ids), "fields": fields, "access_token": access_token},
+            )
+            if "error" in data:
+                raise GraphAPIError(data["error"])
+            changed += await run_in_threadpool(self.store.upsert, account_id, "creative", list(data.values()))
+        return changed, set()
+
+    @staticmethod
+    def covers(object_type: str, fields: str) -> bool:
+        """Whether a `fields` selection can be answered from the mirror."""
+        return set(fields.split(",")) <= MIRRORED_FIELDS[object_type]
+
+    async def list(self, account_id: str, object_type: str, access_token: str, fields: str) -> dict:
+        """Every mirrored object of one type in the account, as `{"data": [...]}` (or `{"error": ...}`)."""
+        try:
+            state = await self.ensure_fresh(account_id, object_type, access_token)
+        except GraphAPIError as e:
+            return {"error": e.error}
+        self.reads += 1
+
+        key = (account_id, object_type, fields)
+        view = self._views.get(key)
+        if view is not None and view[0] == state["version"] and time.monotonic() - view[1] < self.max_age:
+            # Same dict object as last time, so conditional_json reuses its encoding too
+            self._views.move_to_end(key)
+            return view[2]
+
+        data = {"data": await run_in_threadpool(self.store.list, account_id, object_type, fields.split(","))}
+        self._views[key] = (state["version"], time.monotonic(), data)
+        self._views.move_to_end(key)
+        while len(self._views) > _VIEWS_MAX:
+            self._views.popitem(last=False)
+        return data
+
+    async def get(self, object_type: str, object_id: str, access_token: str, fields: str) -> dict | None:
+        """One mirrored object, or None when it isn't mirrored (or can't be refreshed): read it live."""
+        if not self.covers(object_type, fields):
+            return None
+        found = await run_in_threadpool(self.store.get, object_type, object_id)
+        if found is None:
+            return None
+        try:
+            await self.ensure_fresh(found[0], object_type, access_token)
+        except GraphAPIError:
+            return None
+        found = await run_in_threadpool(self.store.get, object_type, object_id)
+        if found is None:
+            return None  # deleted by a full sync
+        self.reads += 1
+        return _project(found[1], fields.split(","))
+
+    def stats(self) -> dict:
+        return {
+            "reads": self.reads,
+            "syncs": self.syncs,
+            "full_syncs": self.full_syncs,
+            "objects_written": self.objects_written,
+            "syncing": len(self._syncs),
+        }
+
+
+account_mirror = AccountMirror(
+    MirrorStore(settings.MIRROR_DB_PATH),
+    max_age=settings.MIRROR_MAX_AGE,
+    full_sync_hours=settings.MIRROR_FULL_SYNC_HOURS,
+    access_ttl=settings.MIRROR_ACCESS_TTL,
+    page_size=settings.MIRROR_PAGE_SIZE,
+)
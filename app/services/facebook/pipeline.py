@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+from app.services.facebook.client import FAIL_FAST_ERRORS, GraphAPIError
+from app.services.facebook.campaigns import create_campaign
+from app.services.facebook.adsets import create_adset
+from app.services.facebook.ads import create_video_creative, create_ad
+from app.services.facebook.media import upload_media_file
+
+STAGES = ["campaign", "adset", "media_upload", "creative", "ad"]
+
+
+class PipelineError(Exception):
+    """A stage failed; `report` shows what was created before it did."""
+
+    def __init__(self, message: str, report: dict):
+        self.report = report
+        super().__init__(message)
+
+
+def _error_message(exc: BaseException) -> str:
+    detail = getattr(exc, "detail", None)  # HTTPException from create_campaign
+    return str(detail or exc)
+
+
+async def launch_video_ad(
+    account_id: str,
+    access_token: str,
+    campaign: dict,
+    adset: dict,
+    creative: dict,
+    ad: dict,
+    video_path: str,
+    video_sha256: str,
+    on_progress=None,
+    resume: dict | None = None,
+) -> dict:
+    """
+    Create campaign → adset → creative → ad for one video, overlapping the
+    independent stages:
+
+        campaign ──> adset ───────────┐
+        media_upload ──> creative ────┴──> ad
+
+    Returns the created ids and a per-stage timing report.
+    `on_progress(report)` is called as stages start and finish; passing a
+    saved report back as `resume` skips the stages that already finished.
+    Raises PipelineError, or one of FAIL_FAST_ERRORS carrying the `report`.
+    """
+    started = time.perf_counter()
+    report = {"stages": {name: {"status": "pending"} for name in STAGES}}
+    if resume:
+        report.update({k: v for k, v in resume.items() if k.endswith("_id")})
+        for name, entry in resume.get("stages", {}).items():
+            if entry.get("status") == "done":
+                report["stages"][name] = dict(entry)
+
+    def done(name: str) -> bool:
+        return report["stages"][name]["status"] == "done"
+
+    async def stage(name: str, coro):
+        entry = report["stages"][name]
+        entry["status"] = "running"
+        if on_progress:
+            on_progress(report)
+        stage_start = time.perf_counter()
+        try:
+            result = await coro
+            if isinstance(result, dict) and "error" in result:
+                raise GraphAPIError(result["error"])
+            entry["status"] = "done"
+            return result
+        except BaseException as e:
+            entry["status"] = "failed"
+            entry["error"] = _error_message(e)
+            raise
+        finally:
+            entry["ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+            if on_progress:
+                on_progress(report)
+
+    async def campaign_then_adset():
+        if not done("campaign"):
+            created = await stage("campaign", create_campaign(
+                account_id, campaign["name"], campaign["objective"], access_token,
+            ))
+            report["campaign_id"] = created["id"]
+
+        if not done("adset"):
+            created = await stage("adset", create_adset(
+                account_id=account_id,
+                campaign_id=report["campaign_id"],
+                access_token=access_token,
+                **adset,
+            ))
+            report["adset_id"] = created["id"]
+
+    async def media_then_creative():
+        if not done("media_upload"):
+            uploaded = await stage("media_upload", upload_media_file(
+                account_id, access_token, "video", video_path, video_sha256, title=creative["ad_name"],
+            ))
+            report["video_id"] = uploaded["video_id"]
+
+        if not done("creative"):
+            created = await stage("creative", create_video_creative(
+                account_id=account_id,
+                video_id=report["video_id"],
+                access_token=access_token,
+                **creative,
+            ))
+            report["creative_id"] = created["id"]
+
+    results = await asyncio.gather(campaign_then_adset(), media_then_creative(), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+
+    if not errors and not done("ad"):
+        try:
+            created = await stage("ad", create_ad(
+                account_id=account_id,
+                adset_id=report["adset_id"],
+                creative_id=report["creative_id"],
+                access_token=access_token,
+                **ad,
+            ))
+            report["ad_id"] = created["id"]
+        except Exception as e:
+            errors.append(e)
+
+    for entry in report["stages"].values():
+        if entry["status"] == "pending":
+            entry["status"] = "skipped"
+    report["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    if errors:
+        fail_fast = next((e for e in errors if isinstance(e, FAIL_FAST_ERRORS)), None)
+        if fail_fast is not None:
+            # Keeps its own status (429 / 503 / 504); the report still lets the caller resume
+            fail_fast.report = report
+            raise fail_fast
+        raise PipelineError(_error_message(errors[0]), report)
+    return report
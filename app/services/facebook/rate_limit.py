@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+
+import httpx
+from app.config import settings
+
+# Graph error codes that mean "throttled" (app, user, ad account, business use case)
+THROTTLE_ERROR_CODES = {4, 17, 32, 613, 80000, 80003, 80004, 80014}
+
+_ACCOUNT_RE = re.compile(r"act_(\d+)")
+
+APP_SCOPE = "app"
+
+# Scopes kept before idle ones (not blocked, no recent usage) are dropped
+_MAX_SCOPES = 1024
+_IDLE_SECONDS = 300
+
+
+class GraphRateLimitError(Exception):
+    """Raised instead of calling Graph when the wait for quota is too long."""
+
+    def __init__(self, scope: str, retry_after: float):
+        self.scope = scope
+        self.retry_after = retry_after
+        super().__init__(f"Graph rate limit reached for {scope}, retry in {retry_after:.0f}s")
+
+
+def call_scope(path: str, access_token: str | None = None) -> str:
+    """
+    Rate-limit scope of a call: `act_<id>` for ad account calls, else the
+    calling token (`token:<hash>`), so one user's user/page throttling
+    never holds back anyone else.
+    """
+    match = _ACCOUNT_RE.search(path)
+    if match:
+        return f"act_{match.group(1)}"
+    if access_token:
+        return f"token:{hashlib.sha256(access_token.encode()).hexdigest()[:16]}"
+    return APP_SCOPE
+
+
+def _header_json(response: httpx.Response, name: str):
+    raw = response.headers.get(name)
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+class RateLimitScheduler:
+    """
+    Reads Graph usage headers and paces outbound calls per scope: one per
+    ad account, one per token for other calls, one per business
+    (business use case usage) and `app`.
+
+    - usage below `slow_pct`: calls go straight through
+    - usage between `slow_pct` and `block_pct`: calls are spaced out,
+      more the closer usage gets to the limit
+    - usage above `block_pct` or a throttling error: calls wait until
+      Graph's `estimated_time_to_regain_access` / reset time has passed
+
+    A call waits on its own scope, on the businesses its scope was last seen
+    charged to, and on `app` (only blocked by X-App-Usage itself).
+    """
+
+    def __init__(self, slow_pct: float, block_pct: float, max_spacing: float, max_wait: float):
+        self.slow_pct = slow_pct
+        self.block_pct = block_pct
+        self.max_spacing = max_spacing
+        self.max_wait = max_wait
+        self.usage: dict[str, dict] = {}
+        self._blocked_until: dict[str, float] = {}
+        self._next_slot: dict[str, float] = {}
+        # call scope -> `buc:<business id>` scopes its calls were charged to
+        self._businesses: dict[str, set[str]] = {}
+        self.delayed_calls = 0
+
+    def _pct(self, scope: str) -> float:
+        return self.usage.get(scope, {}).get("pct", 0.0)
+
+    def _limits(self, scope: str) -> list[str]:
+        return [scope, APP_SCOPE, *self._businesses.get(scope, ())]
+
+    def _delay(self, scope: str, now: float) -> tuple[float, float | None]:
+        """Seconds to wait, and the next slot to reserve for `scope` if the call goes ahead."""
+        limits = self._limits(scope)
+        wait = max(self._blocked_until.get(s, 0) for s in limits) - now
+
+        pct = max(self._pct(s) for s in limits)
+        if pct < self.slow_pct:
+            return max(wait, 0.0), None
+
+        # Reserve the next slot so queued calls leave one at a time
+        ratio = min(1.0, (pct - self.slow_pct) / max(self.block_pct - self.slow_pct, 1))
+        slot = max(now + max(wait, 0), self._next_slot.get(scope, 0))
+        return max(slot - now, 0.0), slot + ratio * self.max_spacing
+
+    async def acquire(self, scope: str, max_wait: float | None = None):
+        delay, next_slot = self._delay(scope, time.monotonic())
+        if delay > (self.max_wait if max_wait is None else min(max_wait, self.max_wait)):
+            raise GraphRateLimitError(scope, delay)  # without taking the slot
+        if next_slot is not None:
+            self._next_slot[scope] = next_slot
+        if delay <= 0:
+            return
+        self.delayed_calls += 1
+        await asyncio.sleep(delay)
+
+    def record(self, scope: str, response: httpx.Response):
+        now = time.monotonic()
+        regain_seconds = 0.0
+
+        app_usage = _header_json(response, "x-app-usage")
+        if isinstance(app_usage, dict):
+            self._update(APP_SCOPE, app_usage, now, max(
+                app_usage.get("call_count", 0),
+                app_usage.get("total_cputime", 0),
+                app_usage.get("total_time", 0),
+            ))
+
+        account_usage = _header_json(response, "x-ad-account-usage")
+        if isinstance(account_usage, dict) and scope.startswith("act_"):
+            self._update(scope, account_usage, now, account_usage.get("acc_id_util_pct", 0))
+            regain_seconds = max(regain_seconds, float(account_usage.get("reset_time_duration", 0) or 0))
+
+        buc_usage = _header_json(response, "x-business-use-case-usage")
+        if isinstance(buc_usage, dict):
+            for business_id, values in buc_usage.items():
+                entries = [e for e in values if isinstance(e, dict)] if isinstance(values, list) else []
+                if not entries:
+                    continue
+                business = f"buc:{business_id}"
+                self._businesses.setdefault(scope, set()).add(business)
+                self._update(business, {"business_use_case": entries}, now, max(
+                    max(e.get("call_count", 0), e.get("total_cputime", 0), e.get("total_time", 0))
+                    for e in entries
+                ))
+                minutes = max(float(e.get("estimated_time_to_regain_access", 0) or 0) for e in entries)
+                if minutes or self._pct(business) >= self.block_pct:
+                    self._block(business, now + (minutes * 60 or 60.0))
+
+        throttled = response.status_code >= 400 and self._is_throttle_error(response)
+        if throttled or self._pct(scope) >= self.block_pct:
+            # No hint from Graph: back off for a minute rather than hammering it
+            self._block(scope, now + (regain_seconds or 60.0))
+        if self._pct(APP_SCOPE) >= self.block_pct:
+            self._block(APP_SCOPE, now + 60.0)
+
+        if len(self._scopes()) > _MAX_SCOPES:
+            self._prune(now)
+
+    def _block(self, scope: str, until: float):
+        self._blocked_until[scope] = max(self._blocked_until.get(scope, 0), until)
+
+    def _scopes(self) -> set[str]:
+        return set(self.usage) | set(self._blocked_until) | set(self._next_slot) | set(self._businesses)
+
+    def _prune(self, now: float):
+        """Forget scopes that are not blocked and reported no usage for a while."""
+        for scope in self._scopes():
+            if (
+                scope != APP_SCOPE
+                and self._blocked_until.get(scope, 0) <= now
+                and self.usage.get(scope, {}).get("updated_at", 0) < now - _IDLE_SECONDS
+            ):
+                self.usage.pop(scope, None)
+                self._blocked_until.pop(scope, None)
+                self._next_slot.pop(scope, None)
+                self._businesses.pop(scope, None)
+
+    def _update(self, scope: str, headers: dict, now: float, pct):
+        entry = self.usage.setdefault(scope, {})
+        pct = float(pct or 0)
+        if entry.get("updated_at") == now:
+            # Several headers from the same response: keep the tightest one
+            pct = max(pct, entry["pct"])
+        entry.update(headers)
+        entry["pct"] = pct
+        entry["updated_at"] = now
+
+    @staticmethod
+    def _is_throttle_error(response: httpx.Response) -> bool:
+        try:
+            code = response.json().get("error", {}).get("code")
+        except (ValueError, AttributeError):
+            return False
+        return code in THROTTLE_ERROR_CODES
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "delayed_calls": self.delayed_calls,
+            "scopes": {
+                scope: {
+                    **{k: v for k, v in self.usage.get(scope, {}).items() if k != "updated_at"},
+                    "blocked_for_seconds": round(max(self._blocked_until.get(scope, 0) - now, 0), 1),
+                }
+                for scope in set(self.usage) | set(self._blocked_until)
+            },
+        }
+
+
+rate_limiter = RateLimitScheduler(
+    slow_pct=settings.GRAPH_RATE_SLOW_PCT,
+    block_pct=settings.GRAPH_RATE_BLOCK_PCT,
+    max_spacing=settings.GRAPH_RATE_MAX_SPACING,
+    max_wait=settings.GRAPH_RATE_MAX_WAIT,
+)
@@ -0,0 +1,128 @@
+"""
+Which Graph failures are worth retrying, and how long to wait between tries.
+
+GraphClient.request() runs every call through `retry_policy`:
+
+- throttling errors and requests that never left (connect/pool errors)
+  are retried for any method; Graph did not act on them
+- transient errors (code 1/2, `is_transient`, 5xx) and dropped connections
+  are retried for GETs, POSTs to allow-listed endpoints, and calls whose
+  caller passes `retry_safe=True`; a create may already have happened
+- waits use decorrelated jitter, and all retries made for one inbound
+  request share a time budget (RetryBudgetMiddleware)
+"""
+import contextvars
+import random
+import time
+
+import httpx
+from app import deadline
+from app.config import settings
+from app.services.facebook.rate_limit import THROTTLE_ERROR_CODES
+
+# "An unknown error occurred" / "Service temporarily unavailable"
+TRANSIENT_ERROR_CODES = {1, 2}
+
+# POSTs that only update an existing object (`POST /<id>` with new field
+# values) land in the same state however many times they are sent.
+SAFE_POST_ENDPOINTS = {":id"}
+
+_retry_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("graph_retry_deadline", default=None)
+
+
+def graph_error(response: httpx.Response) -> dict:
+    """The `error` object of a Graph response, or {}."""
+    try:
+        error = response.json().get("error")
+    except (ValueError, AttributeError):
+        return {}
+    return error if isinstance(error, dict) else {}
+
+
+def classify(response: httpx.Response) -> str | None:
+    """Retry reason for a failed response ("throttled" / "transient"), or None."""
+    if response.status_code < 400:
+        return None
+    error = graph_error(response)
+    code = error.get("code")
+    if code in THROTTLE_ERROR_CODES:
+        return "throttled"
+    if "is_transient" in error:
+        return "transient" if error["is_transient"] else None
+    if code in TRANSIENT_ERROR_CODES or response.status_code >= 500:
+        return "transient"
+    return None
+
+
+def classify_exception(exc: httpx.TransportError) -> str:
+    """Retry reason for a transport error: "not_sent" if Graph never saw the request."""
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return "not_sent"
+    return "network"
+
+
+def error_status(error: dict) -> int:
+    """HTTP status to answer our client with for a Graph error object."""
+    code = error.get("code")
+    if code in THROTTLE_ERROR_CODES:
+        return 429
+    if error.get("is_transient") or code in TRANSIENT_ERROR_CODES:
+        return 503
+    return 400
+
+
+def is_safe_post(endpoint: str) -> bool:
+    return endpoint in SAFE_POST_ENDPOINTS
+
+
+def remaining_budget() -> float | None:
+    """
+    Seconds of retry budget left for the current inbound request, capped by
+    its deadline (None outside a request).
+    """
+    budget = _retry_deadline.get()
+    left = deadline.remaining()
+    if budget is not None:
+        budget = max(budget - time.monotonic(), 0.0)
+        left = budget if left is None else min(left, budget)
+    return left
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def retryable(self, reason: str, method: str, endpoint: str, retry_safe: bool = False) -> bool:
+        if reason in ("throttled", "not_sent"):
+            return True
+        return method == "GET" or retry_safe or (method == "POST" and is_safe_post(endpoint))
+
+    def backoff(self, previous: float) -> float:
+        """Decorrelated jitter: random between base and 3x the previous wait, capped."""
+        return min(self.max_delay, random.uniform(self.base_delay, max(previous, self.base_delay) * 3))
+
+
+class RetryBudgetMiddleware:
+    """ASGI middleware: no new Graph retries once a request has run GRAPH_RETRY_BUDGET seconds."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        token = _retry_deadline.set(time.monotonic() + settings.GRAPH_RETRY_BUDGET)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _retry_deadline.reset(token)
+
+
+retry_policy = RetryPolicy(
+    max_attempts=settings.GRAPH_RETRY_ATTEMPTS,
+    base_delay=settings.GRAPH_RETRY_BASE_DELAY,
+    max_delay=settings.GRAPH_RETRY_MAX_DELAY,
+)
@@ -0,0 +1,48 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from app import deadline
+from app.config import settings
+
+# The SDK is blocking; keep it on its own bounded pool so a few slow uploads
+# can't starve the event loop or the default threadpool used by FastAPI.
+_sdk_executor = ThreadPoolExecutor(
+    max_workers=settings.SDK_MAX_WORKERS,
+    thread_name_prefix="fb-sdk",
+)
+
+
+def new_api(access_token: str, timeout: float | None = None):
+    """
+    A FacebookAdsApi bound to one user's token. Pass it as `api=` to SDK
+    objects instead of FacebookAdsApi.init(), which swaps the process-wide
+    default under every other concurrent request. `timeout` applies to
+    each HTTP call the SDK makes.
+    """
+    # Imported on first use so workers that never upload through the SDK don't load it
+    from facebook_business.api import FacebookAdsApi
+    from facebook_business.session import FacebookSession
+
+    session = FacebookSession(
+        app_id=settings.FB_APP_ID,
+        app_secret=settings.FB_APP_SECRET,
+        access_token=access_token,
+        timeout=timeout,
+    )
+    return FacebookAdsApi(session, api_version=settings.FB_API_VERSION)
+
+
+async def run_sdk(func, *args, **kwargs):
+    """
+    Run a blocking SDK call on the SDK thread pool. Stops waiting for it at
+    the request deadline (the thread can't be interrupted; pass
+    `deadline.remaining()` as the SDK timeout so it gives up soon after).
+    """
+    deadline.check()
+    loop = asyncio.get_running_loop()
+    return await deadline.wait(loop.run_in_executor(_sdk_executor, functools.partial(func, *args, **kwargs)))
+
+
+def shutdown_sdk_executor():
+    _sdk_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,154 @@
+import os
+
+import httpx
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.services.facebook.client import FAIL_FAST_ERRORS, get_graph_client, GraphAPIError
+
+
+class VideoUploadError(Exception):
+    """
+    A chunked upload failed part-way. `session` holds what Graph already
+    acknowledged; pass it back as `resume=` to continue from there.
+    """
+
+    def __init__(self, message: str, session: dict):
+        self.session = session
+        super().__init__(message)
+
+
+class UploadSession(BaseModel):
+    """Where an interrupted upload stands: the next byte range Graph asked for."""
+
+    upload_session_id: str
+    video_id: str
+    file_size: int = Field(gt=0)
+    start_offset: int = Field(ge=0)
+    end_offset: int = Field(ge=0)
+
+    @model_validator(mode="after")
+    def _check_range(self):
+        if not self.start_offset <= self.end_offset <= self.file_size:
+            raise ValueError("start_offset <= end_offset <= file_size must hold")
+        return self
+
+
+# Transfers Graph may answer without moving its offsets before we give up
+_MAX_STALLED_TRANSFERS = 3
+
+# Graph refusing a call or answering something we can't use
+_UPLOAD_ERRORS = (httpx.TransportError, GraphAPIError, KeyError, TypeError, ValueError)
+
+
+def _read_chunk(path: str, offset: int, size: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+async def _post(url: str, data: dict, **kwargs) -> dict:
+    result = await get_graph_client().post(url, data=data, **kwargs)
+    if "error" in result:
+        raise GraphAPIError(result["error"])
+    return result
+
+
+async def upload_video(
+    account_id: str,
+    access_token: str,
+    path: str,
+    title: str | None = None,
+    on_progress=None,
+    resume: dict | None = None,
+) -> dict:
+    """
+    Upload a video with Graph's `upload_phase=start/transfer/finish` protocol.
+
+    - each transfer sends the byte range Graph asked for in its previous
+      answer (`start_offset`/`end_offset`); the upload is done when they meet
+    - a failed chunk is retried on its own (GraphClient retry policy)
+      instead of restarting the file
+    - on failure, VideoUploadError.session can be passed as `resume` to
+      continue from the range Graph asked for last; FAIL_FAST_ERRORS are
+      raised as they are, with the same dict as their `resume_session`
+    - `on_progress(bytes_done, total_bytes, session)` is called after each
+      chunk; `session` can be saved and passed back as `resume` later
+    """
+    url = f"{settings.FB_GRAPH_VIDEO_URL}/{settings.FB_API_VERSION}/{account_id}/advideos"
+    file_size = os.path.getsize(path)
+
+    session = None
+    if resume:
+        try:
+            session = UploadSession.model_validate(resume).model_dump()
+        except ValidationError:
+            session = None  # e.g. saved by an older version: start over
+        if session and session["file_size"] != file_size:
+            session = None
+    if session is None:
+        start = await _post(url, {
+            "access_token": access_token,
+            "upload_phase": "start",
+            "file_size": file_size,
+        })
+        session = {
+            "upload_session_id": start["upload_session_id"],
+            "video_id": start["video_id"],
+            "file_size": file_size,
+            "start_offset": int(start["start_offset"]),
+            "end_offset": int(start["end_offset"]),
+        }
+
+    def progress():
+        if on_progress:
+            on_progress(session["start_offset"], file_size, session)
+
+    progress()
+    stalled = 0
+    while session["start_offset"] < session["end_offset"]:
+        start_offset, end_offset = session["start_offset"], session["end_offset"]
+        try:
+            chunk = await run_in_threadpool(_read_chunk, path, start_offset, end_offset - start_offset)
+            # Re-sending a chunk at the same offset is harmless
+            answer = await _post(
+                url,
+                {
+                    "access_token": access_token,
+                    "upload_phase": "transfer",
+                    "upload_session_id": session["upload_session_id"],
+                    "start_offset": start_offset,
+                },
+                files={"video_file_chunk": (os.path.basename(path), chunk, "application/octet-stream")},
+                retry_safe=True,
+            )
+            next_start, next_end = int(answer["start_offset"]), int(answer["end_offset"])
+        except FAIL_FAST_ERRORS as e:
+            e.resume_session = dict(session)
+            raise
+        except _UPLOAD_ERRORS as e:
+            raise VideoUploadError(f"Video upload failed: {e}", session)
+
+        stalled = stalled + 1 if next_start <= start_offset else 0
+        if stalled >= _MAX_STALLED_TRANSFERS:
+            raise VideoUploadError(f"Video upload is not advancing past byte {start_offset}", session)
+        session["start_offset"], session["end_offset"] = next_start, next_end
+        progress()
+
+    finish = {
+        "access_token": access_token,
+        "upload_phase": "finish",
+        "upload_session_id": session["upload_session_id"],
+    }
+    if title:
+        finish["title"] = title
+    try:
+        await _post(url, finish, retry_safe=True)
+    except FAIL_FAST_ERRORS as e:
+        e.resume_session = dict(session)
+        raise
+    except (httpx.TransportError, GraphAPIError) as e:
+        raise VideoUploadError(f"Video upload failed to finish: {e}", session)
+
+    return {"video_id": session["video_id"]}
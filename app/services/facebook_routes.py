@@ -1,25 +1,36 @@
-from fastapi import APIRouter, UploadFile, File, Form, Query, HTTPException
-import httpx
-from pydantic import BaseModel
+from fastapi import APIRouter, UploadFile, File, Form, Query, HTTPException, Depends, Request, Header
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
 from typing import Optional, Dict, Any, List
-import tempfile
-import shutil
-import os
+import json
+import logging
 
-from facebook_business.api import FacebookAdsApi
-from facebook_business.adobjects.adimage import AdImage
-from facebook_business.adobjects.advideo import AdVideo
 
-
-from app.services.facebook.client import fb_get
+from app.config import settings
+from app.services.facebook.client import get_graph_client, GraphClient, GraphAPIError
+from app.services.facebook.batch import GraphBatch, MAX_BATCH_SIZE
+from app.services.facebook.cache import cached_get, graph_cache, CACHE_TTLS
+from app.services.facebook.fields import resolve_fields
 from app.services.facebook.campaigns import create_campaign
 from app.services.facebook.adsets import create_adset
-from app.services.facebook.ads import create_video_ad
-from app.services.facebook.media import upload_media_service
+from app.services.facebook.ads import create_video_ad, create_video_creative, create_ad
+from app.services.facebook.media import upload_media_file
+from app.services.facebook.media_index import media_index
+from app.services.facebook.mirror import account_mirror, EDGES
+from app.deadline import DeadlineExceeded
+from app.services.facebook.circuit_breaker import GraphCircuitOpenError
+from app.services.facebook.rate_limit import GraphRateLimitError
+from app.services.facebook.retry import error_status
+from app.services.facebook.pipeline import launch_video_ad, PipelineError
+from app.services.facebook.video_upload import UploadSession, VideoUploadError
+from app.services.uploads import spooled_upload, spool_upload
+from app.services.conditional import conditional_json
+from app.services.encoding import FastJSONResponse
+from app.services.idempotency import run_idempotent
+from app.jobs.queue import job_manager
 
 router = APIRouter(prefix="/facebook", tags=["Facebook Ads"])
-
-FB_API_URL = "https://graph.facebook.com/v22.0"
+logger = logging.getLogger(__name__)
 
 ### Request Models -----------------------------
 class CampaignInput(BaseModel):
@@ -55,16 +66,97 @@ class MediaUploadInput(BaseModel):
     media_type: str  # "video" or "image"
     file_path: str   # local path or S3 path
 
+class BatchOperationInput(BaseModel):
+    method: str = "GET"
+    relative_url: str          # e.g. "act_123/campaigns"
+    body: Optional[Dict[str, Any]] = None
+    name: Optional[str] = None        # referenced as {result=<name>:$.id}
+    depends_on: Optional[str] = None
+    omit_response_on_success: Optional[bool] = None
+
+class BatchInput(BaseModel):
+    access_token: str
+    operations: List[BatchOperationInput]
+
+class BulkStatusInput(BaseModel):
+    access_token: str
+    object_ids: List[str]      # campaign / adset / ad ids
+    status: str = "PAUSED"
+
+
+def _accepted(job_id: str):
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}",
+            "events_url": f"/jobs/{job_id}/events",
+        },
+    )
+
 
 ### ROUTES -------------------------------------
 @router.get("/pages")
-async def get_pages(access_token: str):
-    return await fb_get("me/accounts", {"access_token": access_token})
+async def get_pages(request: Request, access_token: str):
+    data = await cached_get("me/accounts", {"access_token": access_token}, CACHE_TTLS["pages"])
+    return conditional_json(request, data, "pages")
 
 
 @router.get("/ad_accounts")
-async def get_ad_accounts(access_token: str):
-    return await fb_get("me/adaccounts", {"access_token": access_token})
+async def get_ad_accounts(request: Request, access_token: str):
+    data = await cached_get("me/adaccounts", {"access_token": access_token}, CACHE_TTLS["ad_accounts"])
+    return conditional_json(request, data, "ad_accounts")
+
+
+@router.get("/graph/stats")
+async def graph_stats(graph: GraphClient = Depends(get_graph_client)):
+    """
+    Diagnostics for the shared Graph client: coalesced calls, cache hit counts,
+    media upload dedup hit ratio and current Graph rate-limit usage per ad account / app.
+    """
+    return {
+        **graph.stats(),
+        "cache": graph_cache.stats(),
+        "media_dedup": media_index.stats(),
+        "mirror": account_mirror.stats(),
+    }
+
+
+async def list_account_objects(account_id: str, object_type: str, access_token: str, fields: str, graph: GraphClient):
+    """
+    Every object of one type in an ad account: from the local mirror (see
+    app/services/facebook/mirror.py) or, with MIRROR_ENABLED off or fields
+    the mirror doesn't keep, from Graph.
+    """
+    if settings.MIRROR_ENABLED and account_mirror.covers(object_type, fields):
+        data = await account_mirror.list(account_id, object_type, access_token, fields)
+    else:
+        edge = EDGES[object_type]
+        params = {"fields": fields, "access_token": access_token}
+        data = await cached_get(f"act_{account_id}/{edge}", params, CACHE_TTLS[edge], client=graph)
+
+    if "error" in data:
+        raise HTTPException(status_code=error_status(data["error"]), detail=data["error"]["message"])
+    return data
+
+
+@router.post("/mirror/sync")
+async def sync_mirror(account_id: str, access_token: str, full: bool = False):
+    """
+    Sync an ad account's campaigns, adsets, ads and creatives into the local
+    mirror now (e.g. right after changes made outside this service) instead
+    of on the next stale read. `full` re-lists everything and drops deleted objects.
+    """
+    if not settings.MIRROR_ENABLED:
+        raise HTTPException(status_code=404, detail="The account mirror is disabled")
+
+    changed = {}
+    try:
+        for object_type in EDGES:
+            changed[object_type] = await account_mirror.sync(account_id, object_type, access_token, full=full)
+    except GraphAPIError as e:
+        raise HTTPException(status_code=error_status(e.error), detail=str(e))
+    return {"account_id": account_id, "full": full, "changed": changed}
 
 
 @router.post("/campaigns/create")
@@ -72,11 +164,16 @@ async def api_create_campaign(
     account_id: str,
     name: str,
     objective: str = "OUTCOME_ENGAGEMENT",
-    access_token: str = ""
+    access_token: str = "",
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    
-    # Await the async create_campaign function
-    return await create_campaign(account_id, name, objective, access_token, special_ad_categories=["NONE"])
+    async def create():
+        result = await create_campaign(account_id, name, objective, access_token, special_ad_categories=["NONE"])
+        graph_cache.invalidate(access_token)
+        return result
+
+    params = {"account_id": account_id, "name": name, "objective": objective}
+    return await run_idempotent(idempotency_key, "campaigns/create", access_token, params, create)
 
 
 class CampaignGetInput(BaseModel):
@@ -85,32 +182,55 @@ class CampaignGetInput(BaseModel):
 
 
 @router.get("/campaigns/get")
-async def api_get_campaign(campaign_id: str, access_token: str):
+async def api_get_campaign(
+    request: Request,
+    campaign_id: str,
+    access_token: str,
+    fields: Optional[str] = Query(None, description="Comma-separated campaign fields"),
+    graph: GraphClient = Depends(get_graph_client),
+):
     """
     Get campaign details by campaign ID
     """
-    import httpx
-
-    FB_API_URL = "https://graph.facebook.com/v22.0"
-    url = f"{FB_API_URL}/{campaign_id}"
-
     params = {
-        "fields": "id,name,objective,status,effective_status,created_time",
+        "fields": resolve_fields("campaign", fields),
         "access_token": access_token
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params)
-        data = response.json()
+    data = None
+    if settings.MIRROR_ENABLED:
+        data = await account_mirror.get("campaign", campaign_id, access_token, params["fields"])
+    if data is None:
+        data = await cached_get(campaign_id, params, CACHE_TTLS["campaign"], client=graph)
 
     if "error" in data:
-        raise HTTPException(status_code=400, detail=data["error"]["message"])
+        raise HTTPException(status_code=error_status(data["error"]), detail=data["error"]["message"])
 
-    return data
+    return conditional_json(request, data, "campaign")
+
+
+@router.get("/campaigns/list")
+async def list_campaigns(
+    request: Request,
+    account_id: str = Query(...),
+    access_token: str = Query(...),
+    fields: Optional[str] = Query(None, description="Comma-separated campaign fields"),
+    graph: GraphClient = Depends(get_graph_client),
+):
+    """
+    List all Campaigns for a given ad account.
+    account_id should NOT include 'act_' prefix; only the numeric ID.
+    """
+    fields = resolve_fields("campaign", fields)
+    data = await list_account_objects(account_id, "campaign", access_token, fields, graph)
+    return conditional_json(request, data, "campaigns")
 
 
 @router.post("/adsets/create")
-async def api_create_adset(data: AdSetInput):
+async def api_create_adset(
+    data: AdSetInput,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
     # If no targeting provided, use a default broad audience
     targeting = data.targeting or {
         "geo_locations": {"countries": ["US"]},  # Minimum required
@@ -119,75 +239,73 @@ async def api_create_adset(data: AdSetInput):
         "genders": [1, 2]
     }
 
-    return await create_adset(
-        account_id=data.account_id,
-        campaign_id=data.campaign_id,
-        name=data.name,
-        daily_budget=data.daily_budget,
-        start_time=data.start_time,
-        end_time=data.end_time,
-        access_token=data.access_token,
-        targeting=targeting  # Pass targeting to service
-    )
+    async def create():
+        result = await create_adset(
+            account_id=data.account_id,
+            campaign_id=data.campaign_id,
+            name=data.name,
+            daily_budget=data.daily_budget,
+            start_time=data.start_time,
+            end_time=data.end_time,
+            access_token=data.access_token,
+            targeting=targeting  # Pass targeting to service
+        )
+        graph_cache.invalidate(data.access_token)
+        return result
+
+    params = data.model_dump(exclude={"access_token"})
+    return await run_idempotent(idempotency_key, "adsets/create", data.access_token, params, create)
 
 @router.get("/adsets/list")
-async def list_adsets(account_id: str = Query(...), access_token: str = Query(...)):
+async def list_adsets(
+    request: Request,
+    account_id: str = Query(...),
+    access_token: str = Query(...),
+    fields: Optional[str] = Query(None, description="Comma-separated adset fields"),
+    graph: GraphClient = Depends(get_graph_client),
+):
     """
     List all Ad Sets for a given ad account.
     account_id should NOT include 'act_' prefix; only the numeric ID.
     """
-    url = f"{FB_API_URL}/act_{account_id}/adsets"
-
-    params = {
-        "fields": "id,name,campaign_id,status",
-        "access_token": access_token
-    }
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params)
-        data = response.json()
-
-    if "error" in data:
-        raise HTTPException(status_code=400, detail=data["error"]["message"])
-
-    return data
+    fields = resolve_fields("adset", fields)
+    data = await list_account_objects(account_id, "adset", access_token, fields, graph)
+    return conditional_json(request, data, "adsets")
 
 @router.get("/adsets/verify/{adset_id}")
 async def verify_adset_ownership(
     adset_id: str,
     your_account_id: str = Query(...),
-    access_token: str = Query(...)
+    access_token: str = Query(...),
+    graph: GraphClient = Depends(get_graph_client),
 ):
     """
     Verify if an adset belongs to a specific ad account.
     """
 
-    url = f"{FB_API_URL}/{adset_id}"
     params = {
         "fields": "id,account_id,name,status,campaign_id",
         "access_token": access_token,
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params)
-        data = response.json()
+    data = await graph.get(adset_id, params=params)
 
     # Handle API errors
     if "error" in data:
         raise HTTPException(
-            status_code=400,
+            status_code=error_status(data["error"]),
             detail=data["error"]["message"],
         )
 
     adset_account = data.get("account_id")
 
-    return {
+    return FastJSONResponse({
         "adset_id": adset_id,
         "adset_account_id": adset_account,
         "your_account_id": your_account_id,
         "belongs_to_you": (adset_account == f"act_{your_account_id}"),
         "adset_details": data,
-    }
+    })
 
 @router.post("/media/upload")
 async def upload_media(
@@ -196,22 +314,45 @@ async def upload_media(
     access_token: str = Form(...),
     media_type: str = Form(...),  # "image" or "video"
     file: UploadFile = File(...),
+    resume_session: Optional[str] = Form(None),  # JSON from a failed video upload's error
+    background: bool = Query(False, description="Return 202 with a job id instead of waiting"),
 ):
-    # Save uploaded file temporarily
-    ext = file.filename.split(".")[-1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{ext}") as temp:
-        temp.write(await file.read())
-        temp_path = temp.name
-
-    # Call service
-    result = upload_media_service(
-        account_id=f"act_{account_id}",
-        media_type=media_type,
-        access_token=access_token,
-        temp_path=temp_path,
-    )
-
-    return result
+    resume = None
+    if resume_session:
+        try:
+            resume = UploadSession.model_validate_json(resume_session).model_dump()
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail={
+                "message": "Invalid resume_session",
+                "errors": e.errors(include_url=False, include_context=False),
+            })
+
+    if background:
+        temp_path, sha256 = await spool_upload(file)  # removed once the job is over (see JobManager.handler)
+        job_id = await job_manager.submit("media_upload", {
+            "account_id": account_id,
+            "access_token": access_token,
+            "media_type": media_type,
+            "path": temp_path,
+            "sha256": sha256,
+            "filename": file.filename,
+        })
+        return _accepted(job_id)
+
+    # Spool the upload to disk in chunks; the temp file is removed once Graph is done
+    async with spooled_upload(file) as (temp_path, sha256):
+        try:
+            return await upload_media_file(
+                account_id=account_id,
+                access_token=access_token,
+                media_type=media_type,
+                path=temp_path,
+                sha256=sha256,
+                title=file.filename,
+                resume=resume,
+            )
+        except VideoUploadError as e:
+            raise HTTPException(status_code=502, detail={"message": str(e), "resume_session": e.session})
 
 
 @router.post("/adcreatives/create/video")
@@ -226,32 +367,24 @@ async def create_video_ad_creative_simple(
     thumbnail_hash: str = Form(...),
 ):
     try:
-        creative_payload = {
-            "name": ad_name,
-            "object_story_spec": {
-                "page_id": page_id,
-                "video_data": {
-                    "video_id": video_id,
-                    "title": ad_name,
-                    "message": message,
-                    "image_hash": thumbnail_hash,
-                    "call_to_action": {"type": "LEARN_MORE", "value": {"link": link}},
-                },
-            },
-        }
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{FB_API_URL}/act_{account_id}/adcreatives",
-                params={"access_token": access_token},
-                json=creative_payload,
-            )
-            data = response.json()
-            if "error" in data:
-                raise HTTPException(status_code=400, detail=data["error"]["message"])
+        data = await create_video_creative(
+            account_id=account_id,
+            page_id=page_id,
+            ad_name=ad_name,
+            message=message,
+            link=link,
+            video_id=video_id,
+            thumbnail_hash=thumbnail_hash,
+            access_token=access_token,
+        )
+        graph_cache.invalidate(access_token)
+        if "error" in data:
+            raise HTTPException(status_code=error_status(data["error"]), detail=data["error"]["message"])
 
         return {"creative_id": data.get("id"), "creative_data": data}
 
+    except (HTTPException, GraphRateLimitError, GraphCircuitOpenError, DeadlineExceeded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -266,20 +399,43 @@ async def api_create_video_ad(
     thumbnail_hash: str = Form(...),
     message: str = Form(...),
     link: str = Form(...),
-    access_token: str = Form(...)
+    access_token: str = Form(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    result = await create_video_ad(
-        account_id=account_id,
-        adset_id=adset_id,
-        page_id=page_id,
-        ad_name=ad_name,
-        video_id=video_id,
-        thumbnail_hash=thumbnail_hash,
-        message=message,
-        link=link,
-        access_token=access_token
-    )
-    return result
+    params = {
+        "account_id": account_id,
+        "adset_id": adset_id,
+        "page_id": page_id,
+        "ad_name": ad_name,
+        "video_id": video_id,
+        "thumbnail_hash": thumbnail_hash,
+        "message": message,
+        "link": link,
+    }
+
+    async def create():
+        result = await create_video_ad(access_token=access_token, **params)
+        graph_cache.invalidate(access_token)
+        return result
+
+    return await run_idempotent(idempotency_key, "ads/create/videoAds", access_token, params, create)
+
+
+@router.get("/ads/list")
+async def list_ads(
+    request: Request,
+    account_id: str = Query(...),
+    access_token: str = Query(...),
+    fields: Optional[str] = Query(None, description="Comma-separated ad fields"),
+    graph: GraphClient = Depends(get_graph_client),
+):
+    """
+    List all Ads for a given ad account.
+    account_id should NOT include 'act_' prefix; only the numeric ID.
+    """
+    fields = resolve_fields("ad", fields)
+    data = await list_account_objects(account_id, "ad", access_token, fields, graph)
+    return conditional_json(request, data, "ads")
 
 
 @router.post("/ads/publish")
@@ -291,40 +447,164 @@ async def publish_ad(
     access_token: str = Form(...),
     tracking_specs: str = Form("[]"),   # JSON string like JS version
     status: str = Form("PAUSED"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    try:
-        # Convert tracking_specs JSON string → Python list
-        import json
+    async def publish():
         try:
-            tracking_specs_parsed = json.loads(tracking_specs)
-        except:
-            tracking_specs_parsed = []
-
-        publish_payload = {
-            "name": ad_name,
-            "adset_id": adset_id,
-            "creative": {"creative_id": creative_id},
-            "tracking_specs": tracking_specs_parsed,
-            "status": status,
-        }
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{FB_API_URL}/act_{account_id}/ads",
-                params={
-                    "access_token": access_token,
-                    "fields": "status,effective_status,issues_info",
-                },
-                json=publish_payload,
+            # Convert tracking_specs JSON string → Python list
+            try:
+                tracking_specs_parsed = json.loads(tracking_specs)
+            except:
+                tracking_specs_parsed = []
+
+            data = await create_ad(
+                account_id=account_id,
+                adset_id=adset_id,
+                ad_name=ad_name,
+                creative_id=creative_id,
+                access_token=access_token,
+                tracking_specs=tracking_specs_parsed,
+                status=status,
             )
+            graph_cache.invalidate(access_token)
+            logger.debug("Publish ad response: %s", data)
 
-        data = response.json()
-        print("FB DEBUG RESPONSE:", data)  # helpful logger
+            if "error" in data:
+                raise HTTPException(status_code=error_status(data["error"]), detail=data)
 
-        if "error" in data:
-            raise HTTPException(status_code=400, detail=data)
+            return data
 
-        return data
+        except (HTTPException, GraphRateLimitError, GraphCircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    params = {
+        "account_id": account_id,
+        "adset_id": adset_id,
+        "ad_name": ad_name,
+        "creative_id": creative_id,
+        "tracking_specs": tracking_specs,
+        "status": status,
+    }
+    return await run_idempotent(idempotency_key, "ads/publish", access_token, params, publish)
+
+
+@router.post("/launch/video")
+async def launch_video_ad_pipeline(
+    account_id: str = Form(...),
+    page_id: str = Form(...),
+    access_token: str = Form(...),
+    campaign_name: str = Form(...),
+    objective: str = Form("OUTCOME_ENGAGEMENT"),
+    adset_name: str = Form(...),
+    daily_budget: int = Form(...),
+    start_time: str = Form(...),
+    end_time: str = Form(...),
+    targeting: Optional[str] = Form(None),   # JSON, defaults to a broad US audience
+    ad_name: str = Form(...),
+    message: str = Form(...),
+    link: str = Form(...),
+    thumbnail_hash: str = Form(...),
+    tracking_specs: str = Form("[]"),
+    status: str = Form("PAUSED"),
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="Return 202 with a job id instead of waiting"),
+):
+    """
+    Campaign, adset, video upload, creative and ad in one request.
+    The upload runs alongside campaign/adset creation; the response includes
+    every created id and a per-stage timing report.
+    """
+    try:
+        targeting_parsed = json.loads(targeting) if targeting else None
+        tracking_specs_parsed = json.loads(tracking_specs)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="targeting and tracking_specs must be valid JSON")
+
+    spec = {
+        "account_id": account_id,
+        "access_token": access_token,
+        "campaign": {"name": campaign_name, "objective": objective},
+        "adset": {
+            "name": adset_name,
+            "daily_budget": daily_budget,
+            "start_time": start_time,
+            "end_time": end_time,
+            "targeting": targeting_parsed,
+        },
+        "creative": {
+            "page_id": page_id,
+            "ad_name": ad_name,
+            "message": message,
+            "link": link,
+            "thumbnail_hash": thumbnail_hash,
+        },
+        "ad": {"ad_name": ad_name, "tracking_specs": tracking_specs_parsed, "status": status},
+    }
+
+    if background:
+        temp_path, sha256 = await spool_upload(file)  # removed once the job is over (see JobManager.handler)
+        job_id = await job_manager.submit("launch_video", {**spec, "video_path": temp_path, "video_sha256": sha256})
+        return _accepted(job_id)
+
+    async with spooled_upload(file) as (temp_path, sha256):
+        try:
+            report = await launch_video_ad(**spec, video_path=temp_path, video_sha256=sha256)
+        except PipelineError as e:
+            raise HTTPException(status_code=502, detail={"message": str(e), "report": e.report})
+        finally:
+            graph_cache.invalidate(access_token)
+
+    return report
+
+
+@router.post("/bulk/status")
+async def bulk_update_status(data: BulkStatusInput):
+    """
+    Pause (or re-activate) many campaigns / adsets / ads in the background,
+    50 per Graph batch call. Poll GET /jobs/{job_id} for progress.
+    """
+    if not data.object_ids:
+        raise HTTPException(status_code=400, detail="No object_ids given")
+
+    job_id = await job_manager.submit("bulk_status", data.model_dump())
+    return _accepted(job_id)
+
+
+@router.post("/batch")
+async def api_batch(data: BatchInput):
+    """
+    Run up to 50 Graph operations in one round trip.
+    Example: create a campaign, then an adset with
+    body {"campaign_id": "{result=create_campaign:$.id}"} and depends_on "create_campaign".
+    """
+    if not data.operations:
+        raise HTTPException(status_code=400, detail="No operations given")
+    if len(data.operations) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} operations per batch")
+
+    batch = GraphBatch()
+    for op in data.operations:
+        batch.add(
+            op.method,
+            op.relative_url,
+            body=op.body,
+            name=op.name,
+            depends_on=op.depends_on,
+            omit_response_on_success=op.omit_response_on_success,
+        )
+
+    try:
+        results = await batch.execute(data.access_token)
+    except GraphAPIError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if any(op.method.upper() != "GET" for op in data.operations):
+            graph_cache.invalidate(data.access_token)
+
+    return FastJSONResponse({
+        "results": results,
+        "succeeded": sum(1 for r in results if r["success"]),
+        "failed": sum(1 for r in results if not r["success"]),
+    })
@@ -1,23 +1,33 @@
-import requests
+import httpx
+from app.services.facebook.client import get_graph_client, GraphAPIError
+from app.services.facebook.cache import graph_cache, CACHE_TTLS
+from app.services.facebook.fields import DEFAULT_FIELDS
 
-def get_user_ad_accounts(access_token: str):
+AD_ACCOUNT_FIELDS = DEFAULT_FIELDS["ad_account"]
+
+
+def iter_user_ad_accounts(access_token: str, fields: str = AD_ACCOUNT_FIELDS):
     """
-    Fetch all Facebook Ad Accounts for a user using their access token.
+    Async iterator over every Facebook Ad Account of a user, across all pages.
     """
-    url = "https://graph.facebook.com/v23.0/me/adaccounts"
     params = {
         "access_token": access_token,
         "limit": 600,
-        "fields": (
-            "name,account_id,account_status,disable_reason,"
-            "timezone_id,timezone_name,timezone_offset_hours_utc,"
-            "currency,id"
-        )
+        "fields": fields,
     }
+    return get_graph_client().paginate("me/adaccounts", params=params)
+
+
+async def get_user_ad_accounts(access_token: str, fields: str = AD_ACCOUNT_FIELDS):
+    """
+    Fetch all Facebook Ad Accounts for a user using their access token.
+    """
+    async def fetch():
+        try:
+            accounts = [account async for account in iter_user_ad_accounts(access_token, fields)]
+            return {"data": accounts}
+        except (GraphAPIError, httpx.HTTPError) as e:
+            return {"error": str(e)}
 
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()  # JSON with ad accounts
-    except requests.exceptions.RequestException as e:
-        return {"error": str(e)}
+    key = graph_cache.key(access_token, "me/adaccounts", {"fields": fields, "pages": "all"})
+    return await graph_cache.get_or_fetch(key, fetch, CACHE_TTLS["ad_accounts"])
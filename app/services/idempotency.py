@@ -0,0 +1,241 @@
+"""
+`Idempotency-Key` support for routes that create objects on Graph.
+
+The first request with a key runs and its response is stored; a retry or
+a concurrent duplicate with the same key gets that response back instead
+of writing to Graph again. Keys live in a SQLite file (WAL mode) so every
+worker on the host sees them, and are scoped per route and access token.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.services.encoding import FastJSONResponse
+from app.services.facebook.cache import token_hash
+from app.services.facebook.client import track_writes
+from app.services.facebook.retry import error_status
+
+_POLL_INTERVAL = 0.25
+
+# Outcomes worth replaying: the Graph write happened, or the request itself
+# is wrong. Anything else (429, 5xx, crashes) lets the client try again,
+# unless a Graph write may already have gone through (see `_UNKNOWN_OUTCOME`).
+_REPLAYABLE_ERRORS = range(400, 500)
+_RETRYABLE_ERRORS = {408, 409, 429}
+
+# Stored when the original request failed after a Graph write may have gone
+# through: retries with the key get this until it expires, never a second write
+_UNKNOWN_OUTCOME = (409, {
+    "detail": "The first request with this Idempotency-Key failed after it may have written to Graph; "
+              "check the object before retrying with a new key",
+})
+
+
+class IdempotencyStore:
+    """
+    key -> (request fingerprint, stored response). A row without a status
+    is in flight; if it stays that way past `stale_after` seconds (worker
+    died mid-request) the next request with the key takes it over.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_hours: float, stale_after: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_hours * 3600
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10, isolation_level=None)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    status_code INTEGER,
+                    response TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idempotency_keys_created ON idempotency_keys (created_at)"
+            )
+        return self._db
+
+    def _begin(self, key: str, fingerprint: str) -> dict | None:
+        """Claim `key` (returns None) or return the existing row."""
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT * FROM idempotency_keys WHERE key = ?", (key,)).fetchone()
+                abandoned = row is not None and (
+                    row["created_at"] < now - self.ttl_seconds
+                    or (row["status_code"] is None and row["updated_at"] < now - self.stale_after)
+                )
+                if row is not None and not abandoned:
+                    db.execute("COMMIT")
+                    return dict(row)
+                db.execute(
+                    "INSERT OR REPLACE INTO idempotency_keys (key, fingerprint, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, fingerprint, now, now),
+                )
+                db.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (now - self.ttl_seconds,))
+                db.execute(
+                    "DELETE FROM idempotency_keys WHERE rowid IN ("
+                    "  SELECT rowid FROM idempotency_keys ORDER BY created_at DESC LIMIT -1 OFFSET ?"
+                    ")",
+                    (self.max_entries,),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return None
+
+    def _finish(self, key: str, status_code: int, response):
+        with self._lock:
+            self._conn().execute(
+                "UPDATE idempotency_keys SET status_code = ?, response = ?, updated_at = ? WHERE key = ?",
+                (status_code, json.dumps(response), time.time(), key),
+            )
+
+    def _abort(self, key: str):
+        with self._lock:
+            self._conn().execute(
+                "DELETE FROM idempotency_keys WHERE key = ? AND status_code IS NULL", (key,)
+            )
+
+    async def begin(self, key: str, fingerprint: str) -> dict | None:
+        return await run_in_threadpool(self._begin, key, fingerprint)
+
+    async def finish(self, key: str, status_code: int, response):
+        await run_in_threadpool(self._finish, key, status_code, response)
+
+    async def abort(self, key: str):
+        await run_in_threadpool(self._abort, key)
+
+
+idempotency_store = IdempotencyStore(
+    path=settings.IDEMPOTENCY_DB_PATH,
+    max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+    ttl_hours=settings.IDEMPOTENCY_TTL_HOURS,
+    stale_after=settings.IDEMPOTENCY_STALE_AFTER,
+)
+
+# Keys this worker is running right now: duplicates here wait on the
+# future instead of polling SQLite
+_running: dict[str, asyncio.Future] = {}
+
+
+def _fingerprint(params: dict) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _check_fingerprint(fingerprint: str, stored_fingerprint: str):
+    if fingerprint != stored_fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with different parameters")
+
+
+def _replay(status_code: int, response):
+    return FastJSONResponse(response, status_code=status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def _final(result) -> bool:
+    """False for Graph errors a retry could fix (throttling, outages)."""
+    return not (isinstance(result, dict) and "error" in result and error_status(result["error"]) != 400)
+
+
+async def run_idempotent(idempotency_key: str | None, route: str, access_token: str, params: dict, create):
+    """
+    Run `create()` (an async callable returning the route's JSON result)
+    at most once per Idempotency-Key. Without a key it simply runs.
+    """
+    if not idempotency_key:
+        return await create()
+
+    key = f"{route}:{token_hash(access_token)}:{idempotency_key}"
+    fingerprint = _fingerprint(params)
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+
+    while True:
+        running = _running.get(key)
+        if running is not None:
+            # shield: this duplicate giving up must not cancel the original
+            status_code, response, stored_fingerprint = await asyncio.shield(running)
+            _check_fingerprint(fingerprint, stored_fingerprint)
+            return _replay(status_code, response)
+
+        row = await idempotency_store.begin(key, fingerprint)
+        if row is None:
+            break
+        _check_fingerprint(fingerprint, row["fingerprint"])
+        if row["status_code"] is not None:
+            return _replay(row["status_code"], json.loads(row["response"]))
+        # In flight on another worker
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        await asyncio.sleep(_POLL_INTERVAL)
+
+    future = asyncio.get_running_loop().create_future()
+    _running[key] = future
+
+    async def settle(error: BaseException | None = None):
+        """After a failure: free the key if Graph can't have changed, else pin the unknown outcome."""
+        if writes.clean:
+            await idempotency_store.abort(key)
+            if error is not None:
+                future.set_exception(error)
+            return
+        status_code, response = _UNKNOWN_OUTCOME
+        await idempotency_store.finish(key, status_code, response)
+        future.set_result((status_code, response, fingerprint))
+
+    try:
+        with track_writes() as writes:
+            try:
+                result = await create()
+            except HTTPException as e:
+                if e.status_code in _REPLAYABLE_ERRORS and e.status_code not in _RETRYABLE_ERRORS:
+                    await idempotency_store.finish(key, e.status_code, {"detail": e.detail})
+                    future.set_result((e.status_code, {"detail": e.detail}, fingerprint))
+                else:
+                    await settle(e)
+                raise
+            except BaseException as e:
+                await asyncio.shield(settle(
+                    e if isinstance(e, Exception) else HTTPException(status_code=503, detail="Request cancelled")
+                ))
+                raise
+
+        if _final(result):
+            await idempotency_store.finish(key, 200, result)
+            future.set_result((200, result, fingerprint))
+        else:
+            # Throttled / transient: a retry may fix it, unless a write already went through
+            await settle()
+            if not future.done():
+                future.set_result((200, result, fingerprint))
+        return FastJSONResponse(result)
+    finally:
+        _running.pop(key, None)
+        if future.done() and not future.cancelled():
+            future.exception()  # mark retrieved when no duplicate was waiting
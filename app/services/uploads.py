@@ -0,0 +1,67 @@
+import hashlib
+import os
+import tempfile
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+
+def _write_chunk(out, digest, chunk: bytes):
+    out.write(chunk)
+    digest.update(chunk)
+
+
+def _too_large():
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {settings.UPLOAD_MAX_BYTES} bytes",
+    )
+
+
+async def spool_upload(file: UploadFile) -> tuple[str, str]:
+    """
+    Copy an upload into UPLOAD_SPOOL_DIR in fixed-size chunks, without
+    holding the whole file in memory or blocking the event loop.
+    Returns (path, sha256 hex digest); the caller must remove the file.
+    """
+    if file.size is not None and file.size > settings.UPLOAD_MAX_BYTES:
+        raise _too_large()
+
+    ext = os.path.splitext(file.filename or "")[1]
+    os.makedirs(settings.UPLOAD_SPOOL_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=ext, dir=settings.UPLOAD_SPOOL_DIR)
+
+    try:
+        written = 0
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(settings.UPLOAD_CHUNK_BYTES):
+                written += len(chunk)
+                if written > settings.UPLOAD_MAX_BYTES:
+                    raise _too_large()
+                await run_in_threadpool(_write_chunk, out, digest, chunk)
+    except BaseException:
+        _remove(path)
+        raise
+
+    return path, digest.hexdigest()
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@asynccontextmanager
+async def spooled_upload(file: UploadFile):
+    """`async with spooled_upload(file) as (path, sha256):` — the file is deleted on exit, success or not."""
+    path, sha256 = await spool_upload(file)
+    try:
+        yield path, sha256
+    finally:
+        _remove(path)
@@ -1,8 +1,181 @@
-# Replace this with real DB later
-USER_STORE = {}  # {user_id: {access_token, email, name}}
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+
+class UserStoreBackend(ABC):
+    """
+    Blocking `get`/`save`, as save_user/get_user always were; async code uses
+    `aget`/`asave`, which run them in the threadpool unless a backend has
+    nothing to block on.
+    """
+
+    @abstractmethod
+    def get(self, user_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def save(self, user_id: str, data: dict):
+        ...
+
+    async def aget(self, user_id: str) -> dict | None:
+        return await run_in_threadpool(self.get, user_id)
+
+    async def asave(self, user_id: str, data: dict):
+        await run_in_threadpool(self.save, user_id, data)
+
+
+class MemoryUserStore(UserStoreBackend):
+    """Single-process store, lost on restart. Fine for local development."""
+
+    def __init__(self):
+        self._users: dict[str, dict] = {}
+
+    def get(self, user_id: str) -> dict | None:
+        return self._users.get(user_id)
+
+    def save(self, user_id: str, data: dict):
+        self._users[user_id] = data
+
+    async def aget(self, user_id: str) -> dict | None:
+        return self.get(user_id)
+
+    async def asave(self, user_id: str, data: dict):
+        self.save(user_id, data)
+
+
+class SQLiteUserStore(UserStoreBackend):
+    """
+    Users in a SQLite file in WAL mode, so every uvicorn worker on the host
+    sees the same users and they survive restarts.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+        return self._db
+
+    def get(self, user_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT data FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, user_id: str, data: dict):
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO users (user_id, data, updated_at) VALUES (?, ?, ?)",
+                (user_id, json.dumps(data), time.time()),
+            )
+            db.commit()
+
+
+class CachedUserStore(UserStoreBackend):
+    """
+    Hot in-process LRU in front of a shared backend. A save goes to the
+    backend and replaces this worker's entry at once; other workers keep
+    serving their cached copy until it expires, so a token refreshed on one
+    worker can be read stale on the others for up to `ttl` seconds
+    (USER_CACHE_TTL; set it to 0 to always read the shared backend).
+    """
+
+    def __init__(self, backend: UserStoreBackend, max_entries: int, ttl: float):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._cache: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+
+    def _cached(self, user_id: str) -> dict | None:
+        entry = self._cache.get(user_id)
+        if entry is not None and time.monotonic() < entry[1]:
+            self._cache.move_to_end(user_id)
+            return entry[0]
+        return None
+
+    def _loaded(self, user_id: str, data: dict | None) -> dict | None:
+        if data is None:
+            self._cache.pop(user_id, None)
+        else:
+            self._remember(user_id, data)
+        return data
+
+    def get(self, user_id: str) -> dict | None:
+        cached = self._cached(user_id)
+        return cached if cached is not None else self._loaded(user_id, self.backend.get(user_id))
+
+    def save(self, user_id: str, data: dict):
+        self.backend.save(user_id, data)
+        self._remember(user_id, data)
+
+    async def aget(self, user_id: str) -> dict | None:
+        cached = self._cached(user_id)
+        return cached if cached is not None else self._loaded(user_id, await self.backend.aget(user_id))
+
+    async def asave(self, user_id: str, data: dict):
+        await self.backend.asave(user_id, data)
+        self._remember(user_id, data)
+
+    def _remember(self, user_id: str, data: dict):
+        if self.ttl <= 0:
+            return
+        self._cache[user_id] = (data, time.monotonic() + self.ttl)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+
+def _build_store() -> UserStoreBackend:
+    if settings.USER_STORE_BACKEND == "memory":
+        backend = MemoryUserStore()
+    else:
+        backend = SQLiteUserStore(settings.USER_STORE_PATH)
+    return CachedUserStore(backend, settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL)
+
+
+USER_STORE = _build_store()  # {user_id: {access_token, email, name}}
+
 
 def save_user(user_id: str, data: dict):
-    USER_STORE[user_id] = data
+    """Blocking; from async code use `asave_user`."""
+    USER_STORE.save(user_id, data)
+
 
 def get_user(user_id: str):
-    return USER_STORE.get(user_id)
\ No newline at end of file
+    """Blocking; from async code use `aget_user`."""
+    return USER_STORE.get(user_id)
+
+
+async def asave_user(user_id: str, data: dict):
+    await USER_STORE.asave(user_id, data)
+
+
+async def aget_user(user_id: str):
+    return await USER_STORE.aget(user_id)
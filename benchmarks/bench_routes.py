@@ -0,0 +1,128 @@
+"""
+Throughput / latency benchmark for the main routes against a mock Graph API.
+
+    python -m benchmarks.bench_routes --requests 500 --concurrency 50 \
+        --latency act_:id/adsets=80 --output bench.json
+
+Prints (or writes) one JSON document with req/s, p50/p95/p99 per route and
+peak RSS, so runs can be diffed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import uuid
+
+from benchmarks.harness import isolate_environment, app_client, run_load, peak_rss_mb
+
+ROUTES = ["pages", "ad_accounts", "adsets_list", "media_upload", "oauth_callback"]
+
+
+def build_senders(client, tokens: int, upload_bytes: int):
+    def token(i: int) -> str:
+        return f"bench_token_{i % tokens}"
+
+    async def pages(i):
+        return await client.get("/facebook/pages", params={"access_token": token(i)})
+
+    async def ad_accounts(i):
+        return await client.get("/ad_accounts/", params={"access_token": token(i)})
+
+    async def adsets_list(i):
+        return await client.get("/facebook/adsets/list", params={"account_id": "3000", "access_token": token(i)})
+
+    async def media_upload(i):
+        # Fresh bytes every time so the dedup index doesn't short-circuit the upload
+        content = os.urandom(upload_bytes)
+        return await client.post(
+            "/facebook/media/upload",
+            data={"account_id": "3000", "page_id": "2000", "access_token": token(i), "media_type": "video"},
+            files={"file": ("bench.mp4", content, "video/mp4")},
+        )
+
+    async def oauth_callback(i):
+        return await client.get("/oauth/callback", params={"code": uuid.uuid4().hex})
+
+    return {
+        "pages": pages,
+        "ad_accounts": ad_accounts,
+        "adsets_list": adsets_list,
+        "media_upload": media_upload,
+        "oauth_callback": oauth_callback,
+    }
+
+
+def parse_latency(values: list[str]) -> dict[str, float]:
+    latency = {}
+    for value in values:
+        endpoint, _, ms = value.partition("=")
+        latency[endpoint] = float(ms)
+    return latency
+
+
+async def main(args) -> dict:
+    from benchmarks.mock_graph import MockGraph
+
+    mock = MockGraph(
+        latency_ms=parse_latency(args.latency),
+        default_latency_ms=args.default_latency,
+        ad_accounts=args.ad_accounts,
+        adsets=args.adsets,
+    )
+
+    results = {}
+    async with app_client(mock) as client:
+        senders = build_senders(client, args.tokens, args.upload_kb * 1024)
+        for route in args.routes:
+            requests = max(1, args.requests // 10) if route == "media_upload" else args.requests
+            results[route] = await run_load(senders[route], requests, args.concurrency)
+
+    return {
+        "benchmark": "routes",
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "tokens": args.tokens,
+            "default_latency_ms": args.default_latency,
+            "latency_ms": mock.latency_ms,
+            "upload_kb": args.upload_kb,
+        },
+        "routes": results,
+        "graph_calls": mock.calls,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="requests per route (media_upload runs 1/10th)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=50, help="distinct access tokens to rotate through")
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=ROUTES)
+    parser.add_argument("--default-latency", type=float, default=30, help="mock Graph latency in ms")
+    parser.add_argument("--latency", action="append", default=[], metavar="ENDPOINT=MS",
+                        help="per-endpoint mock latency, e.g. act_:id/adsets=80 (repeatable)")
+    parser.add_argument("--ad-accounts", type=int, default=250)
+    parser.add_argument("--adsets", type=int, default=100)
+    parser.add_argument("--upload-kb", type=int, default=2048)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    isolate_environment()
+    report = asyncio.run(main(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    cli()
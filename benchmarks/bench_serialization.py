@@ -0,0 +1,145 @@
+"""
+Serialization benchmark for a large adset listing (5,000 adsets by default).
+
+    python -m benchmarks.bench_serialization --adsets 5000 --runs 20 --output ser.json
+
+Two parts:
+
+- encoders: time to turn the listing into bytes with FastAPI's default path
+  (jsonable_encoder + JSONResponse), stdlib json and orjson (if installed),
+  and the time / size of gzip and brotli (if installed) on top.
+- route: GET /facebook/adsets/list against MockGraph per Accept-Encoding,
+  with bytes on the wire and latency for a cold request (fresh Graph cache
+  entry, so the body is encoded and compressed) and warm repeats (memoised).
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import platform
+import statistics
+import sys
+import time
+
+from benchmarks.harness import isolate_environment, app_client, latency_summary
+
+ACCEPT_ENCODINGS = {"identity": "identity", "gzip": "gzip", "br": "br"}
+
+
+def timed(func, runs: int) -> tuple[dict, object]:
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+    return {
+        "median_ms": round(statistics.median(durations) * 1000, 2),
+        "min_ms": round(min(durations) * 1000, 2),
+    }, result
+
+
+def bench_encoders(payload: dict, runs: int) -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from app.services import encoding
+
+    encoders = {
+        "fastapi_default": lambda: JSONResponse(jsonable_encoder(payload)).body,
+        "stdlib_json": lambda: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(),
+    }
+    if encoding.orjson is not None:
+        encoders["orjson"] = lambda: encoding.orjson.dumps(payload)
+
+    results = {}
+    body = b""
+    for name, encode in encoders.items():
+        stats, body = timed(encode, runs)
+        results[name] = {**stats, "bytes": len(body)}
+
+    compressors = {
+        "gzip_1": lambda: gzip.compress(body, compresslevel=1, mtime=0),
+        "gzip_6": lambda: gzip.compress(body, compresslevel=6, mtime=0),
+    }
+    if encoding.brotli is not None:
+        compressors["br_4"] = lambda: encoding.brotli.compress(body, quality=4)
+        compressors["br_5"] = lambda: encoding.brotli.compress(body, quality=5)
+
+    compression = {}
+    for name, compress in compressors.items():
+        stats, compressed = timed(compress, max(1, runs // 4))
+        compression[name] = {**stats, "bytes": len(compressed), "ratio": round(len(body) / len(compressed), 1)}
+
+    return {"encode": results, "compress": compression}
+
+
+async def bench_route(mock, runs: int) -> dict:
+    from app.services.encoding import SUPPORTED_ENCODINGS
+    from app.services.facebook.cache import graph_cache
+
+    params = {"account_id": "3000", "access_token": "bench_token"}
+    results = {}
+    async with app_client(mock) as client:
+        for name, accept in ACCEPT_ENCODINGS.items():
+            if name != "identity" and name not in SUPPORTED_ENCODINGS:
+                continue
+            headers = {"Accept-Encoding": accept}
+
+            graph_cache.clear()  # new dict from Graph: encode + compress from scratch
+            start = time.perf_counter()
+            response = await client.get("/facebook/adsets/list", params=params, headers=headers)
+            cold_ms = round((time.perf_counter() - start) * 1000, 2)
+            response.raise_for_status()
+
+            latencies = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                await client.get("/facebook/adsets/list", params=params, headers=headers)
+                latencies.append(time.perf_counter() - start)
+
+            results[name] = {
+                "content_encoding": response.headers.get("content-encoding", "identity"),
+                "wire_bytes": response.num_bytes_downloaded,
+                "body_bytes": len(response.content),
+                "cold_ms": cold_ms,
+                "warm": latency_summary(latencies),
+            }
+    return results
+
+
+async def main(args) -> dict:
+    from benchmarks.mock_graph import MockGraph, adset_row
+
+    payload = {"data": [adset_row(i) for i in range(args.adsets)]}
+    mock = MockGraph(default_latency_ms=args.default_latency, adsets=args.adsets)
+
+    return {
+        "benchmark": "serialization",
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "config": {"adsets": args.adsets, "runs": args.runs, "default_latency_ms": args.default_latency},
+        "encoders": bench_encoders(payload, args.runs),
+        "route": await bench_route(mock, args.runs),
+    }
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adsets", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--default-latency", type=float, default=0, help="mock Graph latency in ms")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    isolate_environment()
+    report = asyncio.run(main(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    cli()
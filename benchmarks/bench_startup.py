@@ -0,0 +1,103 @@
+"""
+Cold-start benchmark: time and memory to import `app.main` in a fresh
+interpreter, as a new uvicorn worker would.
+
+    python -m benchmarks.bench_startup --runs 10 --output startup.json
+
+Each run is a separate subprocess. Reports median/min/max import time,
+memory allocated by the imports (tracemalloc), peak RSS, the number of
+modules loaded, and whether facebook_business got pulled in. The first-use
+cost of the lazily imported SDK is measured separately.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# argv[1] == "memory" traces allocations; tracemalloc slows imports a lot,
+# so timings come from separate untraced runs
+_PROBE = r"""
+import json, resource, sys, time, tracemalloc
+traced = sys.argv[1] == "memory"
+if traced:
+    tracemalloc.start()
+start = time.perf_counter()
+import app.main
+result = {
+    "import_s": time.perf_counter() - start,
+    "modules": len(sys.modules),
+    "sdk_loaded_at_startup": "facebook_business" in sys.modules,
+}
+if traced:
+    current, peak = tracemalloc.get_traced_memory()
+    result.update(import_alloc_mb=current / 2**20, import_alloc_peak_mb=peak / 2**20)
+    tracemalloc.stop()
+start = time.perf_counter()
+from facebook_business.adobjects.adimage import AdImage
+from facebook_business.adobjects.advideo import AdVideo
+from facebook_business.api import FacebookAdsApi
+result["sdk_first_use_s"] = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+result["peak_rss_mb"] = rss / (2**20 if sys.platform == "darwin" else 2**10)
+print(json.dumps(result))
+"""
+
+
+def probe(env: dict, mode: str = "time") -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE, mode],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(values: list[float], scale: float = 1.0, digits: int = 2) -> dict:
+    return {
+        "median": round(statistics.median(values) * scale, digits),
+        "min": round(min(values) * scale, digits),
+        "max": round(max(values) * scale, digits),
+    }
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    from benchmarks.harness import isolate_environment
+    isolate_environment()
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "0"}
+
+    probe(env)  # warm the bytecode cache so runs measure imports, not compilation
+    runs = [probe(env) for _ in range(args.runs)]
+    traced = [probe(env, "memory") for _ in range(args.runs)]
+
+    report = {
+        "benchmark": "startup",
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "runs": args.runs,
+        "import_ms": summarize([r["import_s"] for r in runs], 1000),
+        "import_alloc_mb": summarize([r["import_alloc_mb"] for r in traced]),
+        "import_alloc_peak_mb": summarize([r["import_alloc_peak_mb"] for r in traced]),
+        "peak_rss_mb": summarize([r["peak_rss_mb"] for r in runs], digits=1),
+        "modules": runs[-1]["modules"],
+        "sdk_loaded_at_startup": runs[-1]["sdk_loaded_at_startup"],
+        "sdk_first_use_ms": summarize([r["sdk_first_use_s"] for r in runs], 1000),
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,97 @@
+"""
+Shared helpers for the benchmarks: an isolated data directory, booting
+`app.main:app` in-process against MockGraph, a concurrent load driver and
+latency/RSS reporting.
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+
+def isolate_environment():
+    """
+    Point every on-disk store at a throwaway directory. Must run before
+    `app` is imported, since settings are read at import time.
+    """
+    data_dir = tempfile.mkdtemp(prefix="fb-bench-")
+    os.environ.setdefault("USER_STORE_PATH", os.path.join(data_dir, "users.db"))
+    os.environ.setdefault("JOBS_DB_PATH", os.path.join(data_dir, "jobs.db"))
+    os.environ.setdefault("MEDIA_INDEX_PATH", os.path.join(data_dir, "media_index.db"))
+    os.environ.setdefault("IDEMPOTENCY_DB_PATH", os.path.join(data_dir, "idempotency.db"))
+    os.environ.setdefault("MIRROR_DB_PATH", os.path.join(data_dir, "mirror.db"))
+    os.environ.setdefault("OAUTH_CALLBACK_DB_PATH", os.path.join(data_dir, "oauth_callbacks.db"))
+    os.environ.setdefault("UPLOAD_SPOOL_DIR", os.path.join(data_dir, "spool"))
+    return data_dir
+
+
+@asynccontextmanager
+async def app_client(mock):
+    """httpx client talking to app.main:app in-process, with Graph replaced by `mock`."""
+    import httpx
+    from app.main import app
+    from app.services.facebook.client import start_graph_client
+
+    # The lifespan keeps an existing client, so this one (with the mock) is used
+    await start_graph_client(transport=mock.transport())
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            yield client
+
+
+async def run_load(send, total: int, concurrency: int) -> dict:
+    """
+    Call `send(i)` `total` times with `concurrency` requests in flight.
+    `send` returns an httpx.Response; anything >= 400 counts as an error.
+    """
+    import asyncio
+
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await send(i)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "req_per_s": round(total / elapsed, 1) if elapsed else None,
+        **latency_summary(latencies),
+    }
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+
+    def pct(p: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return round(ordered[index] * 1000, 2)
+
+    return {"p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99), "max_ms": round(ordered[-1] * 1000, 2)}
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
@@ -0,0 +1,264 @@
+"""
+Local stand-in for graph.facebook.com, plugged into the shared Graph client
+through httpx.MockTransport. Answers the endpoints our routes call with
+canned data after a configurable per-endpoint latency.
+"""
+import asyncio
+import itertools
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs
+
+import httpx
+
+from app.metrics import graph_endpoint
+
+VIDEO_CHUNK_BYTES = 1024 * 1024
+
+_EPOCH = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def _updated_time(i: int) -> str:
+    # Later objects were edited later, like a live account
+    return (_EPOCH + timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%S%z")
+
+
+def _multipart_field(content: bytes, name: str) -> str:
+    return re.search(rb'name="' + name.encode() + rb'"\r\n\r\n(\w+)\r\n', content).group(1).decode()
+
+
+def campaign_row(i: int) -> dict:
+    return {
+        "id": str(23849000000000000 + i),
+        "name": f"Campaign {i} – Summer Sale",
+        "account_id": "3000",
+        "objective": "OUTCOME_SALES",
+        "status": "ACTIVE" if i % 4 else "PAUSED",
+        "effective_status": "ACTIVE" if i % 4 else "PAUSED",
+        "buying_type": "AUCTION",
+        "special_ad_categories": [],
+        "created_time": "2025-03-01T09:00:00+0000",
+        "updated_time": _updated_time(i),
+    }
+
+
+def adset_row(i: int) -> dict:
+    """An adset shaped like a real Graph listing row, targeting included."""
+    return {
+        "id": str(23850000000000000 + i),
+        "name": f"Ad Set {i} – Prospecting (LAL 1%)",
+        "campaign_id": str(23849000000000000 + i // 10),
+        "account_id": "3000",
+        "status": "ACTIVE" if i % 3 else "PAUSED",
+        "effective_status": "ACTIVE" if i % 3 else "CAMPAIGN_PAUSED",
+        "daily_budget": str(1000 + (i % 50) * 100),
+        "billing_event": "IMPRESSIONS",
+        "optimization_goal": "OFFSITE_CONVERSIONS",
+        "bid_strategy": "LOWEST_COST_WITHOUT_CAP",
+        "created_time": "2025-03-01T10:00:00+0000",
+        "updated_time": _updated_time(i),
+        "start_time": "2025-03-02T00:00:00+0000",
+        "targeting": {
+            "age_min": 18 + i % 10,
+            "age_max": 65,
+            "genders": [1, 2],
+            "geo_locations": {"countries": ["US", "CA"], "location_types": ["home", "recent"]},
+            "flexible_spec": [{"interests": [
+                {"id": str(6003000000000 + i % 40 + k), "name": f"Interest {i % 40 + k}"} for k in range(3)
+            ]}],
+            "publisher_platforms": ["facebook", "instagram"],
+        },
+    }
+
+
+def ad_row(i: int) -> dict:
+    return {
+        "id": str(23851000000000000 + i),
+        "name": f"Ad {i} – Video 15s",
+        "account_id": "3000",
+        "campaign_id": str(23849000000000000 + i // 10),
+        "adset_id": str(23850000000000000 + i),
+        "status": "ACTIVE" if i % 3 else "PAUSED",
+        "effective_status": "ACTIVE" if i % 3 else "ADSET_PAUSED",
+        "creative": {"id": str(23852000000000000 + i)},
+        "tracking_specs": [{"action.type": ["offsite_conversion"], "fb_pixel": ["1234567890"]}],
+        "created_time": "2025-03-01T11:00:00+0000",
+        "updated_time": _updated_time(i),
+    }
+
+
+def creative_row(i: int) -> dict:
+    return {
+        "id": str(23852000000000000 + i),
+        "name": f"Creative {i}",
+        "account_id": "3000",
+        "status": "ACTIVE",
+        "title": "Summer Sale",
+        "body": f"Up to {10 + i % 40}% off everything this week.",
+        "object_type": "VIDEO",
+        "call_to_action_type": "SHOP_NOW",
+        "video_id": str(24000000000000000 + i),
+        "thumbnail_url": f"https://scontent.example.com/v/t15/{i}.jpg",
+    }
+
+
+# Account edge -> (row factory, rows per adset)
+EDGES = {
+    "act_:id/campaigns": (campaign_row, 0.1),
+    "act_:id/adsets": (adset_row, 1),
+    "act_:id/ads": (ad_row, 1),
+    "act_:id/adcreatives": (creative_row, 1),
+}
+
+
+class MockGraph:
+    def __init__(
+        self,
+        latency_ms: dict[str, float] | None = None,
+        default_latency_ms: float = 30,
+        ad_accounts: int = 250,
+        adsets: int = 100,
+    ):
+        # keys are endpoint labels as used in metrics, e.g. "act_:id/adsets"
+        self.latency_ms = latency_ms or {}
+        self.default_latency_ms = default_latency_ms
+        self.ad_accounts = ad_accounts
+        self.adsets = adsets
+        self.calls: dict[str, int] = {}
+        self._ids = itertools.count(10_000_000)
+        self._video_sessions: dict[str, int] = {}  # upload_session_id -> file size
+        self.archived: set[int] = set()  # row indexes archived (after every other edit)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        endpoint = graph_endpoint(str(request.url))
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        await asyncio.sleep(self.latency_ms.get(endpoint, self.default_latency_ms) / 1000)
+
+        if request.method == "GET":
+            return self._get(endpoint, request)
+        return self._post(endpoint, request)
+
+    def _get(self, endpoint: str, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+
+        if endpoint == "oauth/access_token":
+            return httpx.Response(200, json={
+                "access_token": f"token_{next(self._ids)}",
+                "token_type": "bearer",
+                "expires_in": 5183944,
+            })
+        if endpoint == "me":
+            return httpx.Response(200, json={"id": "1001", "name": "Bench User", "email": "bench@example.com"})
+        if endpoint == "me/accounts":
+            return httpx.Response(200, json={"data": [
+                {"id": str(2000 + i), "name": f"Page {i}", "category": "Business"} for i in range(10)
+            ]})
+        if endpoint == "me/adaccounts":
+            limit = int(params.get("limit", 25))
+            after = int(params.get("after", 0))
+            page = range(after, min(after + limit, self.ad_accounts))
+            body = {"data": [
+                {
+                    "id": f"act_{3000 + i}",
+                    "account_id": str(3000 + i),
+                    "name": f"Ad Account {i}",
+                    "account_status": 1,
+                    "currency": "USD",
+                    "timezone_name": "America/Los_Angeles",
+                }
+                for i in page
+            ]}
+            if page.stop < self.ad_accounts:
+                body["paging"] = {"next": str(request.url.copy_merge_params({"after": str(page.stop)}))}
+            return httpx.Response(200, json=body)
+        if endpoint == "act_:id":
+            return httpx.Response(200, json={"id": request.url.path.rsplit("/", 1)[-1], "account_status": 1})
+        if endpoint == "act_:id/adimages":
+            return httpx.Response(200, json={"data": [
+                {"hash": image_hash, "status": "ACTIVE"} for image_hash in json.loads(params.get("hashes", "[]"))
+            ]})
+        if endpoint in EDGES:
+            return self._edge(endpoint, request)
+        if endpoint == "/" and "ids" in params:
+            ids = params["ids"].split(",")
+            return httpx.Response(200, json={
+                object_id: creative_row(int(object_id) - 23852000000000000) for object_id in ids
+            })
+        if endpoint == ":id":
+            return httpx.Response(200, json={
+                "id": request.url.path.rsplit("/", 1)[-1],
+                "name": "Campaign",
+                "objective": "OUTCOME_ENGAGEMENT",
+                "status": "PAUSED",
+                "effective_status": "PAUSED",
+                "account_id": "3000",
+            })
+
+        return httpx.Response(404, json={"error": {"message": f"Unknown endpoint {endpoint}", "code": 100}})
+
+    def _edge(self, endpoint: str, request: httpx.Request) -> httpx.Response:
+        """An account edge with cursor paging and `filtering` on updated_time and effective_status."""
+        params = request.url.params
+        row, per_adset = EDGES[endpoint]
+        count = int(self.adsets * per_adset)
+        rows = [
+            {**row(i), "effective_status": "ARCHIVED", "updated_time": _updated_time(count + i)}
+            if i in self.archived else row(i)
+            for i in range(count)
+        ]
+        statuses = None  # like Graph: archived / deleted objects only when asked for
+        for rule in json.loads(params.get("filtering", "[]")):
+            if rule["field"] == "updated_time" and rule["operator"] == "GREATER_THAN":
+                since = datetime.fromtimestamp(int(rule["value"]), timezone.utc)
+                rows = [r for r in rows if datetime.strptime(r["updated_time"], "%Y-%m-%dT%H:%M:%S%z") > since]
+            if rule["field"] == "effective_status" and rule["operator"] == "IN":
+                statuses = set(rule["value"])
+        rows = [
+            r for r in rows
+            if (r.get("effective_status") in statuses if statuses is not None
+                else r.get("effective_status") not in ("ARCHIVED", "DELETED"))
+        ]
+
+        limit = int(params.get("limit", 25))
+        after = int(params.get("after", 0))
+        body = {"data": rows[after:after + limit]}
+        if after + limit < len(rows):
+            body["paging"] = {"next": str(request.url.copy_merge_params({"after": str(after + limit)}))}
+        return httpx.Response(200, json=body)
+
+    def _post(self, endpoint: str, request: httpx.Request) -> httpx.Response:
+        if endpoint == "act_:id/advideos":
+            if request.headers.get("content-type", "").startswith("multipart/"):
+                # upload_phase=transfer: ask for the next chunk, like Graph
+                size = self._video_sessions[_multipart_field(request.content, "upload_session_id")]
+                offset = min(int(_multipart_field(request.content, "start_offset")) + VIDEO_CHUNK_BYTES, size)
+                return httpx.Response(200, json={
+                    "start_offset": str(offset),
+                    "end_offset": str(min(offset + VIDEO_CHUNK_BYTES, size)),
+                })
+            form = {k: v[0] for k, v in parse_qs(request.content.decode()).items()}
+            if form.get("upload_phase") == "start":
+                size = int(form["file_size"])
+                session_id = str(next(self._ids))
+                self._video_sessions[session_id] = size
+                return httpx.Response(200, json={
+                    "upload_session_id": session_id,
+                    "video_id": str(next(self._ids)),
+                    "start_offset": "0",
+                    "end_offset": str(min(VIDEO_CHUNK_BYTES, size)),
+                })
+            return httpx.Response(200, json={"success": True})
+
+        if endpoint == "/":
+            # Batch API: one result per operation
+            form = {k: v[0] for k, v in parse_qs(request.content.decode()).items()}
+            operations = json.loads(form.get("batch", "[]"))
+            return httpx.Response(200, json=[
+                {"code": 200, "body": json.dumps({"id": str(next(self._ids))})} for _ in operations
+            ])
+
+        return httpx.Response(200, json={"id": str(next(self._ids))})
@@ -0,0 +1,64 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from benchmarks.harness import isolate_environment
+
+# Settings are read at import time: isolate the stores and keep retry waits short first
+isolate_environment()
+os.environ.setdefault("GRAPH_RETRY_BASE_DELAY", "0.01")
+os.environ.setdefault("GRAPH_RETRY_MAX_DELAY", "0.02")
+
+from app.services.facebook import circuit_breaker as breaker_module  # noqa: E402
+from app.services.facebook.cache import graph_cache  # noqa: E402
+from app.services.facebook.client import close_graph_client, start_graph_client  # noqa: E402
+from app.services.facebook.rate_limit import rate_limiter  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def reset_graph_state():
+    """Module-level singletons must not leak usage, breaker state or cached reads between tests."""
+    graph_cache.clear()
+    rate_limiter.usage.clear()
+    rate_limiter._blocked_until.clear()
+    rate_limiter._next_slot.clear()
+    rate_limiter._businesses.clear()
+    breaker = breaker_module.circuit_breaker
+    breaker._breakers = {family: breaker_module._Breaker() for family in breaker_module.FAMILIES}
+    yield
+
+
+@pytest.fixture
+def run_graph():
+    """
+    Run `main()` with the shared Graph client answering from `handler`
+    (an httpx.MockTransport handler: request -> response).
+    """
+    def run(main, handler):
+        async def wrapper():
+            await start_graph_client(transport=httpx.MockTransport(handler))
+            try:
+                return await main()
+            finally:
+                await close_graph_client()
+
+        return asyncio.run(wrapper())
+
+    return run
+
+
+@pytest.fixture
+def run_app(run_graph):
+    """Like `run_graph`, but `main(client)` gets an httpx client calling the app in-process."""
+    from app.main import app
+
+    def run(main, handler):
+        async def with_client():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await main(client)
+
+        return run_graph(with_client, handler)
+
+    return run
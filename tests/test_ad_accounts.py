@@ -0,0 +1,49 @@
+import json
+
+import httpx
+
+from benchmarks.mock_graph import MockGraph
+
+
+def _get(run_app, handler, query=""):
+    async def main(client):
+        return await client.get(f"/ad_accounts/?access_token=token-accounts{query}")
+
+    return run_app(main, handler)
+
+
+def test_stream_follows_cursors_across_pages(run_app):
+    graph = MockGraph(default_latency_ms=0, ad_accounts=1500)
+    response = _get(run_app, graph.handle, "&stream=true")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    accounts = [json.loads(line) for line in response.text.splitlines()]
+    assert [a["id"] for a in accounts] == [f"act_{3000 + i}" for i in range(1500)]
+    assert graph.calls["me/adaccounts"] == 3
+
+
+def test_listing_follows_cursors_across_pages(run_app):
+    graph = MockGraph(default_latency_ms=0, ad_accounts=1500)
+    response = _get(run_app, graph.handle)
+
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 1500
+
+
+def test_stream_ends_with_an_error_line_when_paging_fails(run_app):
+    graph = MockGraph(default_latency_ms=0, ad_accounts=1500)
+
+    async def handler(request):
+        if "after" in request.url.params:
+            return httpx.Response(400, json={"error": {"message": "Invalid cursor", "type": "OAuthException", "code": 100}})
+        return await graph.handle(request)
+
+    response = _get(run_app, handler, "&stream=true")
+
+    assert response.status_code == 200  # already sent when the second page fails
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 601
+    assert all("id" in account for account in lines[:-1])
+    assert set(lines[-1]) == {"error"}
+    assert "Invalid cursor" in lines[-1]["error"]
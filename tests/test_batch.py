@@ -0,0 +1,66 @@
+import json
+
+import httpx
+
+from app.services.facebook.batch import GraphBatch, ref
+
+
+def _batch_handler(responses):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=responses)
+    return handler
+
+
+def _execute(run_graph, batch, responses):
+    return run_graph(lambda: batch.execute("token"), _batch_handler(responses))
+
+
+def test_results_are_parsed_per_operation(run_graph):
+    batch = GraphBatch()
+    batch.add("POST", "act_1/campaigns", body={"name": "C"}, name="campaign")
+    batch.add("POST", "act_1/adsets", body={"campaign_id": ref("campaign")}, depends_on="campaign")
+    batch.add("GET", "123")
+
+    results = _execute(run_graph, batch, [
+        {"code": 200, "body": json.dumps({"id": "10"})},
+        {"code": 400, "body": json.dumps({"error": {"message": "Invalid budget", "code": 100}})},
+        {"code": 200, "body": json.dumps({"id": "123", "name": "Ad"})},
+    ])
+
+    assert [r["success"] for r in results] == [True, False, True]
+    assert results[0]["body"] == {"id": "10"}
+    assert results[1]["error"] == "Invalid budget"
+
+
+def test_null_is_a_skipped_dependency(run_graph):
+    batch = GraphBatch()
+    batch.add("POST", "act_1/campaigns", name="campaign")
+    batch.add("POST", "act_1/adsets", depends_on="campaign")
+
+    results = _execute(run_graph, batch, [{"code": 400, "body": json.dumps({"error": {"message": "Bad"}})}, None])
+
+    assert results[1]["success"] is False
+    assert results[1]["error"] == "Not executed (dependency failed)"
+
+
+def test_null_is_success_when_response_was_omitted(run_graph):
+    batch = GraphBatch()
+    batch.add("POST", "act_1/campaigns", name="campaign", omit_response_on_success=True)
+    batch.add("POST", "act_1/adsets", depends_on="campaign", name="adset", omit_response_on_success=True)
+    batch.add("POST", "act_1/ads", depends_on="adset")
+
+    ok = _execute(run_graph, batch, [None, None, {"code": 200, "body": json.dumps({"id": "3"})}])
+    assert [r["success"] for r in ok] == [True, True, True]
+
+    failed = _execute(run_graph, batch, [{"code": 400, "body": json.dumps({"error": {"message": "Bad"}})}, None, None])
+    assert [r["success"] for r in failed] == [False, False, False]
+
+
+def test_retry_safe_only_for_reads_and_updates():
+    batch = GraphBatch()
+    batch.add("GET", "123")
+    batch.add("POST", "456", body={"status": "PAUSED"})
+    assert batch.retry_safe
+
+    batch.add("POST", "act_1/campaigns", body={"name": "C"})
+    assert not batch.retry_safe
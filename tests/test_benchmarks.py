@@ -0,0 +1,44 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import httpx
+
+from benchmarks.harness import latency_summary, run_load
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_latency_summary_percentiles():
+    summary = latency_summary([i / 1000 for i in range(1, 101)])
+    assert summary == {"p50_ms": 50.0, "p95_ms": 95.0, "p99_ms": 99.0, "max_ms": 100.0}
+    assert latency_summary([]) == {}
+
+
+def test_run_load_counts_every_request_and_error():
+    async def send(i):
+        await asyncio.sleep(0)
+        return httpx.Response(500 if i % 4 == 0 else 200)
+
+    report = asyncio.run(run_load(send, total=20, concurrency=3))
+    assert (report["requests"], report["errors"], report["concurrency"]) == (20, 5, 3)
+    assert report["p50_ms"] <= report["max_ms"]
+
+
+def test_route_benchmark_runs_against_the_mock(tmp_path):
+    # A subprocess: the benchmark runs the app lifespan, which shuts the SDK pool down on exit
+    output = tmp_path / "bench.json"
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_routes", "--requests", "10", "--concurrency", "3",
+         "--default-latency", "0", "--upload-kb", "4", "--output", str(output)],
+        cwd=ROOT, check=True, capture_output=True, timeout=120,
+    )
+
+    report = json.loads(output.read_text())
+    assert set(report["routes"]) == {"pages", "ad_accounts", "adsets_list", "media_upload", "oauth_callback"}
+    assert all(route["errors"] == 0 for route in report["routes"].values())
+    assert report["routes"]["pages"]["requests"] == 10
+    assert report["routes"]["media_upload"]["requests"] == 1
+    assert report["graph_calls"]["me/accounts"] >= 1
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from app.services.facebook.cache import GraphCache
+
+
+def test_hit_until_ttl_then_stale_while_revalidate():
+    async def main():
+        cache = GraphCache(max_entries=10, stale_seconds=60)
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return {"n": len(calls)}
+
+        key = cache.key("token", "me/accounts")
+        assert await cache.get_or_fetch(key, fetch, ttl=60) == {"n": 1}
+        assert await cache.get_or_fetch(key, fetch, ttl=60) == {"n": 1}
+
+        cache._entries[key] = (cache._entries[key][0], time.monotonic() - 1)  # expired, still within stale_seconds
+        assert await cache.get_or_fetch(key, fetch, ttl=60) == {"n": 1}
+        await asyncio.sleep(0)
+        assert await cache.get_or_fetch(key, fetch, ttl=60) == {"n": 2}
+        assert cache.stats()["stale_hits"] == 1
+
+    asyncio.run(main())
+
+
+def test_errors_are_not_cached():
+    async def main():
+        cache = GraphCache(max_entries=10, stale_seconds=0)
+
+        async def fetch():
+            return {"error": {"message": "Bad", "code": 100}}
+
+        key = cache.key("token", "me")
+        await cache.get_or_fetch(key, fetch, ttl=60)
+        assert cache.stats()["entries"] == 0
+
+    asyncio.run(main())
+
+
+def test_invalidate_drops_only_that_tokens_reads():
+    async def main():
+        cache = GraphCache(max_entries=10, stale_seconds=0)
+
+        async def fetch():
+            return {"data": []}
+
+        await cache.get_or_fetch(cache.key("a", "me/accounts"), fetch, ttl=60)
+        await cache.get_or_fetch(cache.key("b", "me/accounts"), fetch, ttl=60)
+        cache.invalidate("a")
+        assert [key[0] for key in cache._entries] == [cache.key("b", "")[0]]
+
+    asyncio.run(main())
+
+
+def test_fetch_in_flight_during_invalidate_is_not_stored():
+    async def main():
+        cache = GraphCache(max_entries=10, stale_seconds=0)
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return {"data": ["before write"]}
+
+        key = cache.key("token", "act_1/adsets")
+        read = asyncio.create_task(cache.get_or_fetch(key, fetch, ttl=60))
+        await asyncio.sleep(0)
+        cache.invalidate("token")
+        release.set()
+        await read
+        assert key not in cache._entries
+
+    asyncio.run(main())
+
+
+def test_generations_are_bounded_and_never_reused():
+    cache = GraphCache(max_entries=3, stale_seconds=0)
+    seen = set()
+    for i in range(10):
+        cache.invalidate(f"token-{i}")
+        seen.add(cache.generation(f"token-{i}"))
+
+    assert len(cache._generations) == 3
+    assert len(seen) == 10
+    # An evicted token no longer matches a generation captured before the eviction
+    assert cache.generation("token-0") not in (0, 1)
@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import pytest
+from facebook_business.exceptions import FacebookRequestError
+
+from app.services.facebook import media
+from app.services.facebook.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, GraphCircuitOpenError, circuit_breaker, endpoint_family,
+)
+
+
+def _breaker(**overrides):
+    options = dict(window=30, min_calls=4, error_rate=0.5, slow_seconds=1, slow_rate=0.5, open_seconds=30)
+    return CircuitBreaker(**{**options, **overrides})
+
+
+def _calls(breaker, family, outcomes, seconds=0.01):
+    for failed in outcomes:
+        breaker.allow(family)
+        breaker.record(family, failed, seconds)
+
+
+def _state(breaker, family):
+    return breaker._breakers[family].state
+
+
+def _cool_down(breaker, family):
+    breaker._breakers[family].opened_at -= breaker.open_seconds
+
+
+@pytest.mark.parametrize("method, endpoint, family", [
+    ("GET", "me", "oauth"),
+    ("GET", "oauth/access_token", "oauth"),
+    ("POST", "act_:id/adimages", "uploads"),
+    ("POST", "act_:id/advideos", "uploads"),
+    ("GET", "act_:id/campaigns", "reads"),
+    ("POST", "act_:id/campaigns", "writes"),
+])
+def test_endpoint_family(method, endpoint, family):
+    assert endpoint_family(method, endpoint) == family
+
+
+def test_opens_only_after_min_calls():
+    breaker = _breaker()
+    _calls(breaker, "reads", [True, True, True])
+    assert _state(breaker, "reads") == CLOSED
+    _calls(breaker, "reads", [False])
+    assert _state(breaker, "reads") == OPEN
+
+
+def test_stays_closed_below_the_error_rate():
+    breaker = _breaker()
+    _calls(breaker, "reads", [True, False, False, False, False])
+    assert _state(breaker, "reads") == CLOSED
+
+
+def test_slow_calls_open_it():
+    breaker = _breaker()
+    _calls(breaker, "reads", [False] * 4, seconds=2)
+    assert _state(breaker, "reads") == OPEN
+
+
+def test_open_fails_fast_per_family():
+    breaker = _breaker()
+    _calls(breaker, "uploads", [True] * 4)
+    with pytest.raises(GraphCircuitOpenError) as exc:
+        breaker.allow("uploads")
+    assert exc.value.family == "uploads"
+    assert exc.value.retry_after > 0
+    breaker.allow("reads")  # other families are unaffected
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success():
+    breaker = _breaker()
+    _calls(breaker, "reads", [True] * 4)
+    _cool_down(breaker, "reads")
+
+    breaker.allow("reads")
+    assert _state(breaker, "reads") == HALF_OPEN
+    with pytest.raises(GraphCircuitOpenError):
+        breaker.allow("reads")  # probe still running
+
+    breaker.record("reads", False, 0.01)
+    assert _state(breaker, "reads") == CLOSED
+    assert breaker.snapshot()["reads"]["calls"] == 0
+
+
+def test_failed_probe_reopens_it():
+    breaker = _breaker()
+    _calls(breaker, "reads", [True] * 4)
+    _cool_down(breaker, "reads")
+    _calls(breaker, "reads", [True])
+    assert _state(breaker, "reads") == OPEN
+    with pytest.raises(GraphCircuitOpenError):
+        breaker.allow("reads")
+
+
+def test_cancelled_probe_frees_the_slot():
+    breaker = _breaker()
+    _calls(breaker, "reads", [True] * 4)
+    _cool_down(breaker, "reads")
+    breaker.allow("reads")
+    breaker.record("reads", None, 0.01)
+    assert _state(breaker, "reads") == HALF_OPEN
+    breaker.allow("reads")  # a new probe may go
+
+
+def _sdk_error(code, status=400, transient=False):
+    body = json.dumps({"error": {"message": "x", "code": code, "is_transient": transient}})
+    return FacebookRequestError("x", {}, status, {}, body)
+
+
+def _upload(monkeypatch, outcome):
+    def upload_media_service(**kwargs):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(media, "upload_media_service", upload_media_service)
+    return asyncio.run(media._sdk_upload(account_id="act_1", media_type="image", access_token="t", temp_path="x"))
+
+
+@pytest.mark.parametrize("error, failed", [
+    (_sdk_error(2, status=500, transient=True), True),
+    (_sdk_error(100, status=500), True),
+    (_sdk_error(100), False),  # rejected file: Graph is up
+    (_sdk_error(17), False),   # throttled
+    (ConnectionError("reset"), True),
+])
+def test_sdk_errors_count_against_the_uploads_breaker(error, failed):
+    assert media._sdk_failed(error) is failed
+
+
+def test_sdk_uploads_are_recorded_and_fail_fast(monkeypatch):
+    min_calls = circuit_breaker.min_calls
+    for _ in range(min_calls):
+        with pytest.raises(FacebookRequestError):
+            _upload(monkeypatch, _sdk_error(2, status=500, transient=True))
+    assert _state(circuit_breaker, "uploads") == OPEN
+
+    with pytest.raises(GraphCircuitOpenError):
+        _upload(monkeypatch, {"image_hash": "abc"})
+
+    _cool_down(circuit_breaker, "uploads")
+    assert _upload(monkeypatch, {"image_hash": "abc"}) == {"image_hash": "abc"}
+    assert _state(circuit_breaker, "uploads") == CLOSED
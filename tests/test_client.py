@@ -0,0 +1,104 @@
+import asyncio
+
+import httpx
+
+from app.config import settings
+from app.services.facebook import client as client_module
+from app.services.facebook.client import GraphClient, close_graph_client, get_graph_client, start_graph_client
+from benchmarks.mock_graph import MockGraph
+
+
+def _slow_handler(calls, delay=0.05):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"id": "1", "call": len(calls)})
+    return handler
+
+
+def test_identical_concurrent_gets_share_one_request(run_graph):
+    calls = []
+
+    async def main():
+        graph = get_graph_client()
+        results = await asyncio.gather(*(graph.get("me", params={"access_token": "t"}) for _ in range(5)))
+        return results, graph.coalesced
+
+    results, coalesced = run_graph(main, _slow_handler(calls))
+    assert len(calls) == 1
+    assert coalesced == 4
+    assert all(result == results[0] for result in results)
+
+
+def test_different_params_are_not_coalesced(run_graph):
+    calls = []
+
+    async def main():
+        graph = get_graph_client()
+        await asyncio.gather(
+            graph.get("me", params={"access_token": "a"}),
+            graph.get("me", params={"access_token": "b"}),
+        )
+
+    run_graph(main, _slow_handler(calls))
+    assert len(calls) == 2
+
+
+def test_caller_arriving_as_last_waiter_leaves_gets_a_fresh_request(run_graph):
+    calls = []
+
+    async def main():
+        graph = get_graph_client()
+        first = asyncio.create_task(graph.get("me", params={"access_token": "t"}))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0)
+        # `first` has left and cancelled the shared request, which hasn't finished
+        # cancelling yet: this caller must not join it
+        assert first.done()
+        return await graph.get("me", params={"access_token": "t"}), graph._inflight
+
+    result, inflight = run_graph(main, _slow_handler(calls))
+    assert result["id"] == "1"
+    assert len(calls) == 2
+    assert inflight == {}
+
+
+def test_routes_reuse_the_shared_client(run_app, monkeypatch):
+    created = []
+    init = client_module.GraphClient.__init__
+
+    def counting_init(self, **kwargs):
+        created.append(self)
+        init(self, **kwargs)
+
+    monkeypatch.setattr(client_module.GraphClient, "__init__", counting_init)
+
+    async def main(client):
+        for path in ("/facebook/pages", "/facebook/ad_accounts", "/ad_accounts/", "/facebook/pages"):
+            assert (await client.get(f"{path}?access_token=token-shared")).status_code == 200
+        return get_graph_client()
+
+    graph = run_app(main, MockGraph(default_latency_ms=0).handle)
+    assert created == [graph]
+
+
+def test_start_graph_client_keeps_an_existing_client():
+    async def main():
+        first = await start_graph_client()
+        try:
+            assert await start_graph_client() is first
+            assert get_graph_client() is first
+        finally:
+            await close_graph_client()
+
+    asyncio.run(main())
+    assert client_module._graph_client is None
+
+
+def test_client_pool_uses_the_configured_limits():
+    graph = GraphClient()
+    pool = graph.http._transport._pool
+    assert pool._max_connections == settings.GRAPH_MAX_CONNECTIONS
+    assert pool._max_keepalive_connections == settings.GRAPH_MAX_KEEPALIVE
+    asyncio.run(graph.aclose())
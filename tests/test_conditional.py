@@ -0,0 +1,75 @@
+import pytest
+
+from app.services.conditional import CACHE_CONTROL
+from benchmarks.mock_graph import MockGraph
+
+ROUTES = [
+    ("/facebook/pages", "pages"),
+    ("/facebook/ad_accounts", "ad_accounts"),
+    ("/ad_accounts/", "ad_accounts"),
+    ("/facebook/campaigns/get?campaign_id=23849000000000001", "campaign"),
+    ("/facebook/campaigns/list?account_id=3000", "campaigns"),
+    ("/facebook/adsets/list?account_id=3000", "adsets"),
+    ("/facebook/ads/list?account_id=3000", "ads"),
+]
+
+
+def _url(path):
+    return f"{path}{'&' if '?' in path else '?'}access_token=token-etag"
+
+
+def _get_twice(run_app, path, headers_for):
+    """GET `path`, then again with the headers `headers_for(first_response)` builds."""
+    async def main(client):
+        first = await client.get(_url(path))
+        second = await client.get(_url(path), headers=headers_for(first))
+        return first, second
+
+    return run_app(main, MockGraph(default_latency_ms=0, adsets=20).handle)
+
+
+@pytest.mark.parametrize("path, route", ROUTES)
+def test_each_route_sends_an_etag_and_its_cache_control(run_app, path, route):
+    first, second = _get_twice(run_app, path, lambda r: {"If-None-Match": r.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert first.headers["ETag"].startswith('"')
+    assert first.headers["Cache-Control"] == CACHE_CONTROL[route]
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.headers["Cache-Control"] == CACHE_CONTROL[route]
+
+
+@pytest.mark.parametrize("if_none_match, status_code", [
+    (lambda etag: etag, 304),
+    (lambda etag: f"W/{etag}", 304),
+    (lambda etag: f'"other", {etag}', 304),
+    (lambda etag: "*", 304),
+    (lambda etag: '"0123456789abcdef0123456789abcdef"', 200),
+    (lambda etag: "", 200),
+])
+def test_if_none_match_forms(run_app, if_none_match, status_code):
+    first, second = _get_twice(
+        run_app, "/facebook/adsets/list?account_id=3000", lambda r: {"If-None-Match": if_none_match(r.headers["ETag"])},
+    )
+    assert second.status_code == status_code
+    assert (second.content == b"") == (status_code == 304)
+    if status_code == 200:
+        assert second.json() == first.json()
+
+
+def test_compressed_representation_has_its_own_etag(run_app):
+    async def main(client):
+        url = _url("/facebook/adsets/list?account_id=3000")
+        plain = await client.get(url, headers={"Accept-Encoding": "identity"})
+        gzipped = await client.get(url, headers={"Accept-Encoding": "gzip"})
+        revalidated = await client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["ETag"]})
+        return plain, gzipped, revalidated
+
+    plain, gzipped, revalidated = run_app(main, MockGraph(default_latency_ms=0, adsets=20).handle)
+    assert "Content-Encoding" not in plain.headers
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    assert gzipped.json() == plain.json()
+    assert revalidated.status_code == 304
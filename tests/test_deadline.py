@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app import deadline
+from app.config import settings
+from app.deadline import DeadlineExceeded, DeadlineMiddleware, route_timeout
+from app.services.facebook.client import get_graph_client
+
+
+def _granted(path="/facebook/pages", headers=None) -> float:
+    """Seconds of deadline DeadlineMiddleware grants a GET of `path`."""
+    seen = []
+
+    async def endpoint(scope, receive, send):
+        seen.append(deadline.remaining())
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def main():
+        transport = httpx.ASGITransport(app=DeadlineMiddleware(endpoint))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get(path, headers=headers)
+
+    asyncio.run(main())
+    return seen[0]
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/facebook/pages", settings.REQUEST_TIMEOUT),
+    ("/facebook/media/upload", settings.UPLOAD_REQUEST_TIMEOUT),
+    ("/facebook/launch/video/abc", settings.UPLOAD_REQUEST_TIMEOUT),
+    ("/ad_accounts/", settings.REQUEST_TIMEOUT),
+    ("/ad_accounts/?stream=false", settings.REQUEST_TIMEOUT),
+    ("/ad_accounts/?access_token=t&stream=true", settings.STREAM_REQUEST_TIMEOUT),
+    ("/ad_accounts?stream=1", settings.STREAM_REQUEST_TIMEOUT),
+    ("/facebook/pages?stream=true", settings.REQUEST_TIMEOUT),
+])
+def test_route_timeout(path, expected):
+    path, _, query = path.partition("?")
+    assert route_timeout(path, query.encode()) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, settings.REQUEST_TIMEOUT),
+    ("5", 5),
+    ("0.5", 0.5),
+    (str(settings.REQUEST_TIMEOUT * 10), settings.REQUEST_TIMEOUT),  # never longer than the route's
+    ("soon", settings.REQUEST_TIMEOUT),
+    ("0", settings.REQUEST_TIMEOUT),
+    ("-3", settings.REQUEST_TIMEOUT),
+])
+def test_request_timeout_header(header, expected):
+    headers = {"X-Request-Timeout": header} if header is not None else None
+    assert _granted(headers=headers) == pytest.approx(expected, abs=0.5)
+
+
+def test_streamed_listing_gets_the_stream_deadline():
+    assert _granted("/ad_accounts/?stream=true") == pytest.approx(settings.STREAM_REQUEST_TIMEOUT, abs=0.5)
+
+
+def test_no_deadline_outside_a_request():
+    assert deadline.remaining() is None
+    deadline.check()
+
+
+def test_slow_graph_call_maps_to_504(run_app):
+    async def handler(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"data": []})
+
+    async def main(client):
+        return await client.get("/facebook/pages?access_token=t", headers={"X-Request-Timeout": "0.05"})
+
+    response = run_app(main, handler)
+    assert response.status_code == 504
+    assert response.json()["detail"] == "Request deadline exceeded"
+
+
+def test_coalesced_get_outlives_the_first_callers_deadline(run_graph):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"id": "1"})
+
+    async def call(timeout=None):
+        if timeout is not None:
+            deadline._deadline.set(time.monotonic() + timeout)
+        return await get_graph_client().get("me", {"access_token": "t"})
+
+    async def main():
+        impatient = asyncio.create_task(call(0.05))
+        patient = asyncio.create_task(call())
+        results = await asyncio.gather(impatient, patient, return_exceptions=True)
+        return results, get_graph_client().coalesced
+
+    (impatient, patient), coalesced = run_graph(main, handler)
+    assert isinstance(impatient, DeadlineExceeded)
+    assert patient == {"id": "1"}
+    assert coalesced == 1
+    assert len(calls) == 1
@@ -0,0 +1,78 @@
+import gzip
+import json
+
+import pytest
+
+from app.config import settings
+from app.services import encoding
+from app.services.conditional import EncodedBodies
+from app.services.encoding import compress, dumps, negotiate_encoding, should_compress
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=abc, gzip;q=0.1", "gzip"),  # unparseable q counts as 0
+    ("gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0.2, br;q=0", "gzip"),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_negotiate_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(encoding, "SUPPORTED_ENCODINGS", ("gzip",))
+    assert negotiate_encoding("br, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("br") is None
+
+
+def test_compression_threshold(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_COMPRESS_MIN_BYTES", 100)
+    assert not should_compress(b"x" * 99)
+    assert should_compress(b"x" * 100)
+
+
+def test_gzip_output_is_stable():
+    body = dumps({"data": list(range(500))})
+    assert compress(body, "gzip") == compress(body, "gzip")  # no timestamp, so ETags stay valid
+    assert gzip.decompress(compress(body, "gzip")) == body
+
+
+@pytest.mark.parametrize("data", [
+    {"name": "Café – Summer", "n": [1, 2.5, None, True]},
+    {"big": 2 ** 70},  # beyond orjson's 64-bit ints
+])
+def test_dumps_with_and_without_orjson(monkeypatch, data):
+    fast = dumps(data)
+    monkeypatch.setattr(encoding, "orjson", None)
+    assert json.loads(fast) == json.loads(dumps(data)) == data
+    assert b" " not in dumps({"a": [1, 2]})
+
+
+def test_encoded_bodies_reuse_by_identity():
+    bodies = EncodedBodies(max_entries=10, max_bytes=10_000)
+    data = {"data": [1, 2, 3]}
+    body, etag, variants = bodies.encode(data)
+    assert bodies.encode(data)[0] is body
+    assert bodies.encode({"data": [1, 2, 3]})[1] == etag  # equal content, same ETag
+    assert bodies.compressed(data, body, variants, "gzip") is bodies.compressed(data, body, variants, "gzip")
+
+
+def test_encoded_bodies_are_bounded_by_bytes():
+    bodies = EncodedBodies(max_entries=100, max_bytes=2_500)
+    items = [{"data": "x" * 1000, "i": i} for i in range(5)]
+    for data in items:
+        body, _, variants = bodies.encode(data)
+        bodies.compressed(data, body, variants, "gzip")
+    assert bodies.bytes <= 2_500
+    assert len(bodies._entries) == 2
+    assert bodies.bytes == sum(len(e[1]) + sum(map(len, e[3].values())) for e in bodies._entries.values())
+
+    huge = {"data": "x" * 5_000}
+    bodies.encode(huge)
+    assert id(huge) not in bodies._entries  # larger than the whole budget: not kept
@@ -0,0 +1,48 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.facebook.cache import graph_cache
+from app.services.facebook.fields import ALLOWED_FIELDS, DEFAULT_FIELDS, resolve_fields
+from benchmarks.mock_graph import MockGraph
+
+
+@pytest.mark.parametrize("object_type", sorted(DEFAULT_FIELDS))
+def test_defaults_when_no_fields_are_asked_for(object_type):
+    assert resolve_fields(object_type, None) == DEFAULT_FIELDS[object_type]
+    assert resolve_fields(object_type, "") == DEFAULT_FIELDS[object_type]
+    assert set(DEFAULT_FIELDS[object_type].split(",")) <= ALLOWED_FIELDS[object_type]
+
+
+def test_id_is_always_included_and_the_result_is_canonical():
+    assert resolve_fields("campaign", "status, name") == "id,name,status"
+    assert resolve_fields("campaign", "name,status,name,id") == "id,name,status"
+    assert resolve_fields("campaign", " ,name,") == "id,name"
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(HTTPException) as exc:
+        resolve_fields("adset", "name,access_token,secret")
+    assert exc.value.status_code == 400
+    assert "access_token, secret" in exc.value.detail
+    with pytest.raises(HTTPException):
+        resolve_fields("ad", "targeting")  # an adset field, not an ad one
+
+
+def test_field_sets_get_their_own_cache_entries():
+    def key(fields):
+        return graph_cache.key("token", "act_1/campaigns", {"fields": resolve_fields("campaign", fields)})
+
+    assert key("name,status") == key("status,name,id")
+    assert key("name") != key("name,status")
+    assert key(None) != key("name")
+
+
+def test_route_answers_400_for_unknown_fields(run_app):
+    async def main(client):
+        return await client.get("/facebook/campaigns/list", params={
+            "account_id": "3000", "access_token": "token", "fields": "name,password",
+        })
+
+    response = run_app(main, MockGraph(default_latency_ms=0).handle)
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
@@ -0,0 +1,141 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.services.facebook.client import get_graph_client
+from app.services.facebook.rate_limit import rate_limiter
+from app.services.idempotency import run_idempotent
+
+TOKEN = "token-idem"
+
+
+def _graph(calls, *answers):
+    """Handler answering POSTs with `answers` in turn (the last one repeats); exceptions are raised."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        await asyncio.sleep(0.01)
+        answer = answers[min(len(calls), len(answers)) - 1]
+        if isinstance(answer, type) and issubclass(answer, Exception):
+            raise answer("boom", request=request)
+        return answer
+    return handler
+
+
+def _created(object_id="1"):
+    return httpx.Response(200, json={"id": object_id})
+
+
+def _throttled():
+    return httpx.Response(400, json={"error": {"code": 4, "message": "Application request limit reached"}})
+
+
+def _create_campaign(name="Spring"):
+    async def create():
+        return await get_graph_client().post("act_1/campaigns", data={"name": name, "access_token": TOKEN})
+    return create
+
+
+def _run(key, create, params=None):
+    return run_idempotent(key, "create_campaign", TOKEN, params or {"name": "Spring"}, create)
+
+
+def test_repeat_is_replayed_without_writing_again(run_graph):
+    calls = []
+
+    async def main():
+        first = await _run("replay", _create_campaign())
+        second = await _run("replay", _create_campaign())
+        return first, second
+
+    first, second = run_graph(main, _graph(calls, _created()))
+    assert len(calls) == 1
+    assert json.loads(second.body) == json.loads(first.body) == {"id": "1"}
+    assert second.headers["Idempotent-Replayed"] == "true"
+
+
+def test_key_reused_with_other_parameters_is_rejected(run_graph):
+    async def main():
+        await _run("fingerprint", _create_campaign())
+        await _run("fingerprint", _create_campaign("Autumn"), {"name": "Autumn"})
+
+    with pytest.raises(HTTPException) as exc:
+        run_graph(main, _graph([], _created()))
+    assert exc.value.status_code == 422
+
+
+def test_concurrent_duplicates_write_once(run_graph):
+    calls = []
+
+    async def main():
+        return await asyncio.gather(*(_run("concurrent", _create_campaign()) for _ in range(3)))
+
+    responses = run_graph(main, _graph(calls, _created()))
+    assert len(calls) == 1
+    assert {json.loads(r.body)["id"] for r in responses} == {"1"}
+
+
+def test_key_is_freed_when_the_write_never_left(run_graph):
+    calls = []
+
+    async def main():
+        with pytest.raises(httpx.ConnectError):
+            await _run("not-sent", _create_campaign())
+        sent = len(calls)
+        return sent, await _run("not-sent", _create_campaign())
+
+    sent, response = run_graph(main, _graph(calls, httpx.ConnectError, httpx.ConnectError, httpx.ConnectError, _created()))
+    assert len(calls) == sent + 1  # the retry with the key wrote
+    assert json.loads(response.body) == {"id": "1"}
+
+
+def test_timeout_after_send_keeps_the_key(run_graph):
+    calls = []
+
+    async def main():
+        with pytest.raises(httpx.ReadTimeout):
+            await _run("timeout", _create_campaign())
+        sent = len(calls)
+        return sent, await _run("timeout", _create_campaign())
+
+    sent, response = run_graph(main, _graph(calls, httpx.ReadTimeout, _created()))
+    assert len(calls) == sent  # no second write
+    assert response.status_code == 409
+
+
+def test_partial_write_then_throttle_keeps_the_key(run_graph):
+    calls = []
+
+    def create():
+        async def two_steps():
+            client = get_graph_client()
+            await client.post("act_1/campaigns", data={"name": "Spring", "access_token": TOKEN})
+            return await client.post("act_1/adsets", data={"name": "Spring", "access_token": TOKEN})
+        return two_steps
+
+    async def main():
+        first = await _run("partial", create())
+        second = await _run("partial", create())
+        return first, second
+
+    first, second = run_graph(main, _graph(calls, _created(), _throttled()))
+    assert json.loads(first.body)["error"]["code"] == 4
+    assert len(calls) == 2
+    assert second.status_code == 409
+
+
+def test_throttled_before_any_write_frees_the_key(run_graph):
+    calls = []
+
+    async def main():
+        first = await _run("throttled", _create_campaign())
+        rate_limiter._blocked_until.clear()  # as if the throttle had worn off
+        second = await _run("throttled", _create_campaign())
+        return first, second
+
+    first, second = run_graph(main, _graph(calls, _throttled(), _created()))
+    assert json.loads(first.body)["error"]["code"] == 4
+    assert json.loads(second.body) == {"id": "1"}
+    assert len(calls) == 2
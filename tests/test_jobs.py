@@ -0,0 +1,155 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from app.jobs.queue import JobManager
+from app.jobs.store import JobStore
+
+
+def _manager(tmp_path, max_attempts=3):
+    manager = JobManager(
+        JobStore(str(tmp_path / "jobs.db")),
+        workers=1, poll_interval=0.01, stale_after=60, max_attempts=max_attempts, retention_hours=1,
+    )
+    cleaned = []
+
+    @manager.handler("upload", cleanup=lambda payload: cleaned.append(payload["path"]))
+    async def upload(payload, ctx):
+        if payload.get("fail"):
+            raise RuntimeError("Graph said no")
+        return {"ok": True}
+
+    return manager, cleaned
+
+
+async def _run_next(manager):
+    job = await manager.store.claim(manager.owner, stale_before=time.time() - 60)
+    await manager._run(job)
+    return await manager.store.get(job["id"])
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_finished_job_is_cleaned_up_and_loses_its_token(tmp_path, fail):
+    manager, cleaned = _manager(tmp_path)
+
+    async def main():
+        await manager.submit("upload", {"path": "/tmp/spooled", "access_token": "secret", "fail": fail})
+        return await _run_next(manager)
+
+    job = asyncio.run(main())
+    assert job["status"] == ("failed" if fail else "succeeded")
+    assert cleaned == ["/tmp/spooled"]
+    assert "access_token" not in job["payload"]
+
+
+def test_job_given_up_is_cleaned_up_without_running(tmp_path):
+    manager, cleaned = _manager(tmp_path, max_attempts=0)
+
+    async def main():
+        await manager.submit("upload", {"path": "/tmp/spooled", "access_token": "secret", "fail": True})
+        return await _run_next(manager)
+
+    job = asyncio.run(main())
+    assert job["error"] == "Gave up after too many attempts"
+    assert cleaned == ["/tmp/spooled"]
+
+
+def test_failed_submit_cleans_up(tmp_path, monkeypatch):
+    manager, cleaned = _manager(tmp_path)
+
+    async def broken_create(kind, payload):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(manager.store, "create", broken_create)
+    with pytest.raises(OSError):
+        asyncio.run(manager.submit("upload", {"path": "/tmp/spooled"}))
+    assert cleaned == ["/tmp/spooled"]
+
+
+def test_purge_only_drops_old_finished_jobs(tmp_path):
+    manager, _ = _manager(tmp_path)
+
+    async def main():
+        done = await manager.submit("upload", {"path": "a"})
+        await _run_next(manager)
+        queued = await manager.submit("upload", {"path": "b"})
+        await manager.store.purge(finished_before=time.time() + 1)
+        return await manager.store.get(done), await manager.store.get(queued)
+
+    done, queued = asyncio.run(main())
+    assert done is None
+    assert queued["status"] == "queued"
+
+
+def _flaky(monkeypatch, store, name, failures=1):
+    """Make `store.<name>` raise like a locked SQLite file the first `failures` times."""
+    original = getattr(store, name)
+    calls = []
+
+    async def flaky(*args, **kwargs):
+        calls.append(name)
+        if len(calls) <= failures:
+            raise sqlite3.OperationalError("database is locked")
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(store, name, flaky)
+    return calls
+
+
+def test_heartbeat_survives_store_errors(tmp_path, monkeypatch):
+    manager, _ = _manager(tmp_path)
+    manager.stale_after = 0.03
+    calls = _flaky(monkeypatch, manager.store, "heartbeat")
+
+    async def main():
+        task = asyncio.create_task(manager._heartbeat())
+        await asyncio.sleep(0.1)
+        assert not task.done()
+        task.cancel()
+
+    asyncio.run(main())
+    assert len(calls) >= 2
+
+
+def test_worker_survives_store_errors(tmp_path, monkeypatch):
+    manager, _ = _manager(tmp_path)
+    _flaky(monkeypatch, manager.store, "claim")
+
+    async def main():
+        job_id = await manager.submit("upload", {"path": "a"})
+        manager._wakeup = asyncio.Event()
+        task = asyncio.create_task(manager._worker())
+        for _ in range(100):
+            job = await manager.store.get(job_id)
+            if job["status"] == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        return job
+
+    assert asyncio.run(main())["status"] == "succeeded"
+
+
+def test_event_stream_ends_when_the_job_is_purged(monkeypatch):
+    from app.jobs import router
+
+    jobs = [{
+        "id": "j1", "kind": "upload", "status": "running", "progress": {}, "result": None, "error": None,
+        "attempts": 1, "created_at": 1.0, "updated_at": 1.0,
+    }, None]
+
+    class PurgingStore:
+        async def get(self, job_id):
+            return jobs.pop(0)
+
+    monkeypatch.setattr(router, "job_store", PurgingStore())
+    monkeypatch.setattr(router, "SSE_POLL_INTERVAL", 0)
+
+    async def main():
+        return [event async for event in router._job_events("j1")]
+
+    events = asyncio.run(main())
+    assert events[0].startswith("event: running")
+    assert events[-1].startswith("event: gone")
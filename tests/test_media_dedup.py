@@ -0,0 +1,100 @@
+import asyncio
+
+import httpx
+
+from app.services.facebook.media import upload_media_file
+from app.services.facebook.media_index import media_index
+
+
+def _graph(image_status="ACTIVE", account_error=None, video_error=None):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.split("/", 2)[-1]
+        calls.append(path)
+        if path.endswith("/adimages"):
+            if account_error:
+                return httpx.Response(400, json={"error": account_error})
+            images = [{"hash": "h1", "status": image_status}] if image_status else []
+            return httpx.Response(200, json={"data": images})
+        if path.startswith("act_"):
+            if account_error:
+                return httpx.Response(400, json={"error": account_error})
+            return httpx.Response(200, json={"id": path})
+        if video_error:
+            return httpx.Response(400, json={"error": video_error})
+        return httpx.Response(200, json={"id": path})
+
+    return handler, calls
+
+
+def _known(account_id, media_type, result):
+    asyncio.run(media_index.store(account_id, media_type, f"sha-{account_id}", result))
+
+
+def _upload(run_graph, monkeypatch, handler, account_id, media_type):
+    import app.services.facebook.media as media
+
+    uploads = []
+
+    async def fake_upload(**kwargs):
+        uploads.append(kwargs)
+        return {"video_id": "new"}
+
+    async def fake_sdk(fn, **kwargs):
+        uploads.append(kwargs)
+        return {"image_hash": "new"}
+
+    monkeypatch.setattr(media, "upload_video", fake_upload)
+    monkeypatch.setattr(media, "run_sdk", fake_sdk)
+    result = run_graph(lambda: upload_media_file(
+        account_id=account_id, access_token="token", media_type=media_type, path="/dev/null",
+        sha256=f"sha-{account_id}",
+    ), handler)
+    return result, uploads
+
+
+def test_image_hit_is_verified_against_the_account(run_graph, monkeypatch):
+    _known("101", "image", {"image_hash": "h1"})
+    handler, calls = _graph()
+
+    result, uploads = _upload(run_graph, monkeypatch, handler, "101", "image")
+
+    assert result == {"image_hash": "h1", "deduplicated": True}
+    assert calls == ["act_101/adimages"]
+    assert uploads == []
+
+
+def test_token_without_account_access_gets_no_hit(run_graph, monkeypatch):
+    _known("102", "image", {"image_hash": "h1"})
+    handler, _ = _graph(account_error={"message": "Invalid OAuth access token", "code": 190})
+
+    result, uploads = _upload(run_graph, monkeypatch, handler, "102", "image")
+
+    assert "deduplicated" not in result
+    assert len(uploads) == 1
+    assert asyncio.run(media_index.lookup("102", "image", "sha-102")) is not None  # kept for valid tokens
+
+
+def test_deleted_assets_are_forgotten(run_graph, monkeypatch):
+    _known("103", "image", {"image_hash": "h1"})
+    _known("104", "video", {"video_id": "v1"})
+
+    image, _ = _upload(run_graph, monkeypatch, _graph(image_status=None)[0], "103", "image")
+    video, _ = _upload(run_graph, monkeypatch, _graph(video_error={"message": "Object does not exist", "code": 100})[0], "104", "video")
+
+    assert image == {"image_hash": "new"}
+    assert video == {"video_id": "new"}
+    # Replaced by the fresh upload's result
+    assert asyncio.run(media_index.lookup("103", "image", "sha-103")) == {"image_hash": "new"}
+    assert asyncio.run(media_index.lookup("104", "video", "sha-104")) == {"video_id": "new"}
+
+
+def test_video_hit_checks_account_and_video(run_graph, monkeypatch):
+    _known("105", "video", {"video_id": "v1"})
+    handler, calls = _graph()
+
+    result, uploads = _upload(run_graph, monkeypatch, handler, "105", "video")
+
+    assert result == {"video_id": "v1", "deduplicated": True}
+    assert calls == ["act_105", "v1"]
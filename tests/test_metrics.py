@@ -0,0 +1,76 @@
+import pytest
+
+from app import metrics
+from app.metrics import Counter, Gauge, Histogram, graph_endpoint
+from benchmarks.mock_graph import MockGraph
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """A private registry, so these metrics don't show up on the app's /metrics."""
+    monkeypatch.setattr(metrics, "_REGISTRY", [])
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    latency = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value, "/x")
+
+    assert latency.render() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/x",le="0.1"} 2',  # a bound is inclusive
+        'latency_seconds_bucket{route="/x",le="1"} 3',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+        'latency_seconds_sum{route="/x"} 3.65',
+        'latency_seconds_count{route="/x"} 4',
+    ]
+
+
+def test_counters_gauges_and_label_escaping(registry):
+    errors = Counter("errors_total", "Errors", ("code",))
+    errors.inc('say "hi"\n')
+    errors.inc('say "hi"\n', amount=2)
+    in_flight = Gauge("in_flight", "In flight")
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    assert metrics.render() == "\n".join([
+        "# HELP errors_total Errors",
+        "# TYPE errors_total counter",
+        'errors_total{code="say \\"hi\\"\\n"} 3',
+        "# HELP in_flight In flight",
+        "# TYPE in_flight gauge",
+        "in_flight 1",
+    ]) + "\n"
+
+
+@pytest.mark.parametrize("path, label", [
+    ("act_123/adsets", "act_:id/adsets"),
+    ("/23849/insights?fields=spend", ":id/insights"),
+    ("https://graph.facebook.com/v19.0/me/adaccounts?after=abc", "me/adaccounts"),
+    ("https://graph-video.facebook.com/act_1/advideos", "act_:id/advideos"),
+    ("", "/"),
+])
+def test_graph_endpoint_labels(path, label):
+    assert graph_endpoint(path) == label
+
+
+def test_metrics_route_reports_inbound_and_graph_calls(run_app):
+    async def main(client):
+        await client.get("/facebook/pages?access_token=token-metrics")
+        return await client.get("/metrics")
+
+    response = run_app(main, MockGraph(default_latency_ms=0).handle)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert "# TYPE http_request_duration_seconds histogram" in lines
+    assert any(
+        line.startswith('http_request_duration_seconds_bucket{method="GET",route="/facebook/pages",status="200",le="+Inf"}')
+        for line in lines
+    )
+    assert any(line.startswith('graph_request_duration_seconds_count{method="GET",endpoint="me/accounts"') for line in lines)
+    assert "graph_pool_max_connections" in response.text
@@ -0,0 +1,163 @@
+import json
+
+import pytest
+
+from app.services.facebook import mirror
+from app.services.facebook.cache import graph_cache
+from app.services.facebook.mirror import AccountMirror, MirrorStore
+from benchmarks.mock_graph import MockGraph
+
+FIELDS = "id,name,updated_time"
+
+
+@pytest.fixture
+def graph():
+    """MockGraph that also keeps the query params of every adset listing call."""
+    mock = MockGraph(default_latency_ms=0, adsets=30)
+    mock.listings = []
+
+    async def handle(request):
+        if request.url.path.endswith("/adsets"):
+            mock.listings.append(dict(request.url.params))
+        return await mock.handle(request)
+
+    mock.handler = handle
+    return mock
+
+
+def _mirror(tmp_path, max_age=60, page_size=10):
+    return AccountMirror(
+        MirrorStore(str(tmp_path / "mirror.db")),
+        max_age=max_age, full_sync_hours=24, access_ttl=900, page_size=page_size,
+    )
+
+
+def test_first_read_syncs_every_page_then_serves_locally(tmp_path, run_graph, graph):
+    account_mirror = _mirror(tmp_path)
+
+    async def main():
+        first = await account_mirror.list("3000", "adset", "token-a", FIELDS)
+        second = await account_mirror.list("3000", "adset", "token-a", FIELDS)
+        return first, second
+
+    first, second = run_graph(main, graph.handler)
+    assert len(first["data"]) == 30
+    assert second is first  # same view, no re-read
+    assert len(graph.listings) == 3  # 30 adsets, 10 per page
+    assert "filtering" not in graph.listings[0]
+
+
+def test_later_syncs_are_incremental(tmp_path, run_graph, graph):
+    account_mirror = _mirror(tmp_path)
+
+    async def main():
+        await account_mirror.list("3000", "adset", "token-a", FIELDS)
+        graph.listings.clear()
+        return await account_mirror.sync("3000", "adset", "token-a")
+
+    assert run_graph(main, graph.handler) == 0  # re-fetched rows are unchanged
+    rule = json.loads(graph.listings[0]["filtering"])[0]
+    assert rule["field"] == "updated_time" and rule["operator"] == "GREATER_THAN"
+    assert len(graph.listings) == 1  # only objects near the newest updated_time came back
+
+
+def test_other_token_must_prove_access(tmp_path, run_graph, graph):
+    account_mirror = _mirror(tmp_path)
+
+    async def main():
+        await account_mirror.list("3000", "adset", "token-a", FIELDS)
+        graph.listings.clear()
+        await account_mirror.list("3000", "adset", "token-b", FIELDS)
+
+    run_graph(main, graph.handler)
+    assert graph.listings and {p["access_token"] for p in graph.listings} == {"token-b"}
+
+
+def test_write_through_this_worker_forces_a_sync(tmp_path, run_graph, graph):
+    account_mirror = _mirror(tmp_path)
+
+    async def main():
+        await account_mirror.list("3000", "adset", "token-a", FIELDS)
+        graph.listings.clear()
+        graph_cache.invalidate("token-a")
+        await account_mirror.list("3000", "adset", "token-a", FIELDS)
+
+    run_graph(main, graph.handler)
+    assert len(graph.listings) == 1
+
+
+def test_full_sync_drops_deleted_objects(tmp_path, run_graph, graph):
+    account_mirror = _mirror(tmp_path)
+
+    async def main():
+        await account_mirror.list("3000", "adset", "token-a", FIELDS)
+        graph.adsets = 20
+        await account_mirror.sync("3000", "adset", "token-a", full=True)
+        return await account_mirror.list("3000", "adset", "token-a", FIELDS)
+
+    assert len(run_graph(main, graph.handler)["data"]) == 20
+
+
+def test_generations_and_views_are_bounded(tmp_path, run_graph, graph, monkeypatch):
+    monkeypatch.setattr(mirror, "_GENERATIONS_MAX", 2)
+    monkeypatch.setattr(mirror, "_VIEWS_MAX", 2)
+    account_mirror = _mirror(tmp_path)
+
+    async def main():
+        for token in ("token-a", "token-b", "token-c"):
+            await account_mirror.list("3000", "adset", token, FIELDS)
+        for fields in ("id", "id,name", FIELDS):
+            await account_mirror.list("3000", "adset", "token-c", fields)
+        graph.listings.clear()
+        # Evicted: token-a syncs again instead of trusting a forgotten generation
+        await account_mirror.list("3000", "adset", "token-a", FIELDS)
+
+    run_graph(main, graph.handler)
+    assert len(account_mirror._generations) == 2
+    assert len(account_mirror._views) == 2
+    assert graph.listings
+
+
+def test_views_expire_with_max_age(tmp_path, run_graph, graph):
+    account_mirror = _mirror(tmp_path)
+    key = ("3000", "adset", FIELDS)
+
+    async def main():
+        first = await account_mirror.list("3000", "adset", "token-a", FIELDS)
+        version, stored_at, data = account_mirror._views[key]
+        account_mirror._views[key] = (version, stored_at - account_mirror.max_age, data)
+        graph.listings.clear()
+        return first, await account_mirror.list("3000", "adset", "token-a", FIELDS)
+
+    first, second = run_graph(main, graph.handler)
+    assert second is not first and second == first  # re-read from SQLite
+    assert graph.listings == []  # the mirror itself was still fresh
+
+
+def test_incremental_sync_drops_archived_objects(tmp_path, run_graph, graph):
+    account_mirror = _mirror(tmp_path)
+
+    async def main():
+        await account_mirror.list("3000", "adset", "token-a", FIELDS)
+        graph.archived = {3, 7}
+        changed = await account_mirror.sync("3000", "adset", "token-a")
+        return changed, await account_mirror.list("3000", "adset", "token-a", FIELDS)
+
+    changed, data = run_graph(main, graph.handler)
+    assert changed == 2
+    assert len(data["data"]) == 28
+    rules = json.loads(graph.listings[-1]["filtering"])
+    assert {"ARCHIVED", "DELETED"} <= set(next(r["value"] for r in rules if r["field"] == "effective_status"))
+
+
+def test_heavy_fields_are_not_mirrored(tmp_path, run_graph, graph):
+    account_mirror = _mirror(tmp_path)
+
+    async def main():
+        await account_mirror.list("3000", "adset", "token-a", FIELDS)
+        return await account_mirror.get("adset", "23850000000000000", "token-a", "id,targeting")
+
+    assert run_graph(main, graph.handler) is None  # read live instead
+    assert "targeting" not in graph.listings[0]["fields"].split(",")
+    assert account_mirror.covers("adset", "id,name,status")
+    assert not account_mirror.covers("adset", "id,targeting")
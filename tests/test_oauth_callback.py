@@ -0,0 +1,49 @@
+import asyncio
+
+import httpx
+
+from app.oauth import fb_token_service
+from app.oauth.fb_token_service import finalize_oauth
+
+
+def _graph(calls):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.rsplit("/", 1)[-1]
+        calls.append(path)
+        await asyncio.sleep(0.02)
+        if path == "me":
+            return httpx.Response(200, json={"id": "42", "name": "User", "email": "u@example.com"})
+        if "code" in request.url.params:
+            return httpx.Response(200, json={"access_token": "short"})
+        return httpx.Response(200, json={"access_token": "long-lived"})
+    return handler
+
+
+def test_duplicate_callbacks_exchange_the_code_once(run_graph):
+    calls = []
+
+    async def main():
+        return await asyncio.gather(*(finalize_oauth("code-1") for _ in range(3)))
+
+    results = run_graph(main, _graph(calls))
+    assert calls.count("access_token") == 2  # code exchange + long-lived exchange
+    assert {r["access_token"] for r in results} == {"long-lived"}
+
+
+def test_repeat_on_another_worker_is_replayed_from_the_shared_store(run_graph):
+    calls = []
+    run_graph(lambda: finalize_oauth("code-2"), _graph(calls))
+    assert fb_token_service._running == {}  # what another worker would see
+
+    result = run_graph(lambda: finalize_oauth("code-2"), _graph(calls))
+    assert result["user_id"] == "42"
+    assert calls.count("access_token") == 2
+
+
+def test_result_is_not_replayed_after_the_window(run_graph, monkeypatch):
+    calls = []
+    run_graph(lambda: finalize_oauth("code-3"), _graph(calls))
+
+    monkeypatch.setattr(fb_token_service.callback_results, "ttl_seconds", 0)
+    run_graph(lambda: finalize_oauth("code-3"), _graph(calls))
+    assert calls.count("access_token") == 4  # exchanged again (Graph would now refuse the code)
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.services.facebook import pipeline
+from app.services.facebook.circuit_breaker import GraphCircuitOpenError
+from app.services.facebook.pipeline import PipelineError, launch_video_ad
+
+
+class FakeGraph:
+    """Stand-ins for the stage functions, recording when each one starts and ends."""
+
+    def __init__(self, monkeypatch, delay=0.05, fail: dict | None = None):
+        self.delay = delay
+        self.fail = fail or {}
+        self.events: list[tuple[str, str]] = []
+        self.calls: list[str] = []
+        monkeypatch.setattr(pipeline, "create_campaign", self._stage("campaign", "c1"))
+        monkeypatch.setattr(pipeline, "create_adset", self._stage("adset", "s1"))
+        monkeypatch.setattr(pipeline, "upload_media_file", self._stage("media_upload", "v1", key="video_id"))
+        monkeypatch.setattr(pipeline, "create_video_creative", self._stage("creative", "cr1"))
+        monkeypatch.setattr(pipeline, "create_ad", self._stage("ad", "a1"))
+
+    def _stage(self, name, object_id, key="id"):
+        async def run(*args, **kwargs):
+            self.calls.append(name)
+            self.events.append(("start", name))
+            await asyncio.sleep(self.delay)
+            self.events.append(("end", name))
+            if name in self.fail:
+                raise self.fail[name]
+            return {key: object_id}
+        return run
+
+
+def _launch(resume=None):
+    return asyncio.run(launch_video_ad(
+        account_id="1",
+        access_token="token",
+        campaign={"name": "C", "objective": "OUTCOME_SALES"},
+        adset={"name": "S"},
+        creative={"ad_name": "Ad", "page_id": "2", "message": "m", "link": "https://example.com"},
+        ad={"ad_name": "Ad"},
+        video_path="video.mp4",
+        video_sha256="sha",
+        resume=resume,
+    ))
+
+
+def test_independent_stages_overlap(monkeypatch):
+    graph = FakeGraph(monkeypatch)
+    report = _launch()
+
+    assert (report["campaign_id"], report["adset_id"], report["video_id"], report["ad_id"]) == ("c1", "s1", "v1", "a1")
+    # The upload starts before the campaign has finished, and the ad waits for both branches
+    assert graph.events.index(("start", "media_upload")) < graph.events.index(("end", "campaign"))
+    assert graph.events.index(("start", "ad")) > max(
+        graph.events.index(("end", "adset")), graph.events.index(("end", "creative")),
+    )
+    assert report["total_ms"] < 4 * graph.delay * 1000  # 3 stages deep, not 5
+
+
+def test_resume_skips_finished_stages(monkeypatch):
+    graph = FakeGraph(monkeypatch, fail={"creative": RuntimeError("Invalid page")})
+    with pytest.raises(PipelineError) as failure:
+        _launch()
+    report = failure.value.report
+    assert report["stages"]["creative"]["status"] == "failed"
+    assert report["stages"]["ad"]["status"] == "skipped"
+
+    graph = FakeGraph(monkeypatch)
+    resumed = _launch(resume=report)
+    assert graph.calls == ["creative", "ad"]
+    assert (resumed["campaign_id"], resumed["video_id"], resumed["ad_id"]) == ("c1", "v1", "a1")
+
+
+def test_fail_fast_errors_keep_their_type_and_carry_the_report(monkeypatch):
+    FakeGraph(monkeypatch, fail={"media_upload": GraphCircuitOpenError("uploads", 30)})
+    with pytest.raises(GraphCircuitOpenError) as failure:
+        _launch()
+    report = failure.value.report
+    assert report["adset_id"] == "s1"
+    assert report["stages"]["media_upload"]["status"] == "failed"
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.facebook.rate_limit import GraphRateLimitError, RateLimitScheduler, call_scope
+
+
+def _scheduler():
+    return RateLimitScheduler(slow_pct=75, block_pct=95, max_spacing=2, max_wait=5)
+
+
+def _response(status=200, error_code=None, headers=None):
+    body = {"error": {"message": "Too many calls", "code": error_code}} if error_code else {"id": "1"}
+    return httpx.Response(status, json=body, headers={k: json.dumps(v) for k, v in (headers or {}).items()})
+
+
+def _blocked(scheduler, scope):
+    try:
+        asyncio.run(scheduler.acquire(scope, max_wait=1))
+    except GraphRateLimitError:
+        return True
+    return False
+
+
+def test_scopes():
+    assert call_scope("act_123/adsets", "token") == "act_123"
+    assert call_scope("me/accounts", "token-a") != call_scope("me/accounts", "token-b")
+    assert call_scope("me/accounts", "token-a").startswith("token:")
+    assert call_scope("me/accounts") == "app"
+
+
+def test_user_throttle_only_blocks_that_token():
+    scheduler = _scheduler()
+    alice, bob = call_scope("me", "alice"), call_scope("me", "bob")
+
+    scheduler.record(alice, _response(400, error_code=17))
+
+    assert _blocked(scheduler, alice)
+    assert not _blocked(scheduler, bob)
+    assert not _blocked(scheduler, "act_1")
+
+
+def test_app_is_blocked_by_app_usage_only():
+    scheduler = _scheduler()
+    scheduler.record(call_scope("me", "alice"), _response(headers={"x-app-usage": {"call_count": 97}}))
+
+    assert _blocked(scheduler, call_scope("me", "bob"))
+    assert _blocked(scheduler, "act_1")
+
+
+def test_account_usage_blocks_only_that_account():
+    scheduler = _scheduler()
+    scheduler.record("act_1", _response(headers={
+        "x-ad-account-usage": {"acc_id_util_pct": 99, "reset_time_duration": 30},
+    }))
+
+    assert _blocked(scheduler, "act_1")
+    assert not _blocked(scheduler, "act_2")
+
+
+def test_business_use_case_usage_is_kept_per_business():
+    scheduler = _scheduler()
+    scheduler.record("act_1", _response(headers={"x-business-use-case-usage": {
+        "111": [{"type": "ads_management", "call_count": 99, "estimated_time_to_regain_access": 2}],
+        "222": [{"type": "ads_management", "call_count": 10, "estimated_time_to_regain_access": 0}],
+    }}))
+    scheduler.record("act_2", _response(headers={"x-business-use-case-usage": {
+        "222": [{"type": "ads_management", "call_count": 12, "estimated_time_to_regain_access": 0}],
+    }}))
+
+    assert scheduler.usage["buc:111"]["pct"] == 99
+    assert scheduler.usage["buc:222"]["pct"] == 12
+    assert _blocked(scheduler, "act_1")  # charged to business 111
+    assert not _blocked(scheduler, "act_2")
+
+
+def test_rejected_call_does_not_keep_its_slot():
+    scheduler = _scheduler()
+    scheduler.record("act_1", _response(headers={"x-ad-account-usage": {"acc_id_util_pct": 90}}))
+
+    asyncio.run(scheduler.acquire("act_1"))  # first call goes now, reserving the next slot
+    reserved = scheduler._next_slot["act_1"]
+
+    with pytest.raises(GraphRateLimitError):
+        asyncio.run(scheduler.acquire("act_1", max_wait=0))
+    assert scheduler._next_slot["act_1"] == reserved
+
+
+def test_client_records_usage_under_the_calls_token(run_graph):
+    from app.services.facebook.client import get_graph_client
+    from app.services.facebook.rate_limit import rate_limiter
+
+    def handler(request):
+        return _response(400, error_code=32)
+
+    async def main():
+        await get_graph_client().get("me/accounts", params={"access_token": "alice"})
+
+    run_graph(main, handler)
+    assert rate_limiter._blocked_until.keys() == {call_scope("me", "alice")}
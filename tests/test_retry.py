@@ -0,0 +1,76 @@
+import httpx
+import pytest
+
+from app.services.facebook.client import get_graph_client
+from app.services.facebook.retry import RetryPolicy, classify, classify_exception, error_status
+
+
+def _error(code, status=400, **extra):
+    return httpx.Response(status, json={"error": {"message": "x", "code": code, **extra}})
+
+
+@pytest.mark.parametrize("response, reason", [
+    (httpx.Response(200, json={"id": "1"}), None),
+    (_error(17), "throttled"),
+    (_error(80004), "throttled"),
+    (_error(2), "transient"),
+    (_error(100, status=500), "transient"),
+    (_error(100), None),
+    (_error(2, is_transient=False), None),
+    (_error(100, is_transient=True), "transient"),
+])
+def test_classify(response, reason):
+    assert classify(response) == reason
+
+
+def test_classify_exception():
+    request = httpx.Request("POST", "https://graph.facebook.com/act_1/campaigns")
+    assert classify_exception(httpx.ConnectError("refused", request=request)) == "not_sent"
+    assert classify_exception(httpx.ReadTimeout("slow", request=request)) == "network"
+
+
+def test_error_status():
+    assert error_status({"code": 17}) == 429
+    assert error_status({"code": 2}) == 503
+    assert error_status({"code": 100}) == 400
+
+
+def test_retryable_depends_on_method():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.02)
+    assert policy.retryable("transient", "GET", "act_:id/adsets")
+    assert not policy.retryable("transient", "POST", "act_:id/campaigns")
+    assert policy.retryable("transient", "POST", ":id")
+    assert policy.retryable("transient", "POST", "act_:id/campaigns", retry_safe=True)
+    assert policy.retryable("not_sent", "POST", "act_:id/campaigns")
+    assert policy.retryable("throttled", "POST", "act_:id/campaigns")
+
+
+def test_backoff_stays_within_bounds():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.1, max_delay=1)
+    delay = policy.base_delay
+    for _ in range(20):
+        delay = policy.backoff(delay)
+        assert 0.1 <= delay <= 1
+
+
+def _flaky(failures, calls):
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) <= failures:
+            return _error(2, status=500)
+        return httpx.Response(200, json={"id": "1"})
+    return handler
+
+
+def test_transient_get_is_retried(run_graph):
+    calls = []
+    result = run_graph(lambda: get_graph_client().get("me", params={"access_token": "t"}), _flaky(2, calls))
+    assert result == {"id": "1"}
+    assert len(calls) == 3
+
+
+def test_transient_create_is_not_retried(run_graph):
+    calls = []
+    result = run_graph(lambda: get_graph_client().post("act_1/campaigns", data={"access_token": "t"}), _flaky(1, calls))
+    assert result["error"]["code"] == 2
+    assert len(calls) == 1
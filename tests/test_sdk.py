@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import deadline
+from app.config import settings
+from app.deadline import DeadlineExceeded
+from app.services.facebook import sdk
+from app.services.facebook.sdk import new_api, run_sdk
+
+
+def test_sdk_calls_run_on_the_bounded_pool():
+    lock = threading.Lock()
+    running = peak = 0
+    threads = set()
+
+    def blocking_call():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+            threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    async def main():
+        await asyncio.gather(*(run_sdk(blocking_call) for _ in range(settings.SDK_MAX_WORKERS + 4)))
+
+    asyncio.run(main())
+    assert sdk._sdk_executor._max_workers == settings.SDK_MAX_WORKERS
+    assert peak == settings.SDK_MAX_WORKERS
+    assert all(name.startswith("fb-sdk") for name in threads)
+
+
+def test_run_sdk_does_not_start_past_the_deadline():
+    called = []
+
+    async def main():
+        deadline._deadline.set(time.monotonic() - 1)
+        await run_sdk(called.append, 1)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(main())
+    assert called == []
+
+
+def test_each_call_gets_its_own_session():
+    from facebook_business.api import FacebookAdsApi
+
+    default = FacebookAdsApi.get_default_api()
+    first = new_api("token-a", timeout=5)
+    second = new_api("token-b")
+
+    assert first is not second
+    assert first._session is not second._session
+    assert (first._session.access_token, second._session.access_token) == ("token-a", "token-b")
+    assert first._session.timeout == 5
+    assert FacebookAdsApi.get_default_api() is default  # the process-wide default is left alone
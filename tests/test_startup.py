@@ -0,0 +1,23 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = r"""
+import json, sys
+import app.main
+loaded_at_startup = "facebook_business" in sys.modules
+from app.services.facebook.sdk import new_api
+new_api("token")
+print(json.dumps({"startup": loaded_at_startup, "first_use": "facebook_business" in sys.modules}))
+"""
+
+
+def test_sdk_is_imported_on_first_use_only():
+    # A fresh interpreter, as a new worker would start: this one has imported everything already
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=ROOT, check=True, capture_output=True, text=True, timeout=60,
+    ).stdout
+    assert json.loads(output.strip().splitlines()[-1]) == {"startup": False, "first_use": True}
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import pytest
+
+from app import storage
+from app.storage import CachedUserStore, MemoryUserStore, SQLiteUserStore, UserStoreBackend
+
+
+def test_backend_missing_a_method_fails_when_built():
+    class Incomplete(UserStoreBackend):
+        def get(self, user_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "users.db")
+    asyncio.run(SQLiteUserStore(path).asave("1", {"access_token": "t"}))
+
+    assert asyncio.run(SQLiteUserStore(path).aget("1")) == {"access_token": "t"}
+    assert SQLiteUserStore(path).get("2") is None
+
+
+def test_cached_store_expires_entries():
+    async def main():
+        backend = MemoryUserStore()
+        store = CachedUserStore(backend, max_entries=10, ttl=0)
+        await store.asave("1", {"access_token": "old"})
+        await backend.asave("1", {"access_token": "refreshed elsewhere"})
+        return await store.aget("1")
+
+    assert asyncio.run(main()) == {"access_token": "refreshed elsewhere"}
+
+
+def test_cached_store_serves_another_workers_save_after_the_ttl(tmp_path, monkeypatch):
+    path = str(tmp_path / "users.db")
+    worker_a = CachedUserStore(SQLiteUserStore(path), max_entries=10, ttl=30)
+    worker_b = CachedUserStore(SQLiteUserStore(path), max_entries=10, ttl=30)
+
+    worker_a.save("1", {"access_token": "old"})
+    assert worker_b.get("1") == {"access_token": "old"}
+    worker_a.save("1", {"access_token": "refreshed"})
+    assert worker_a.get("1") == {"access_token": "refreshed"}  # the writer sees it at once
+    assert worker_b.get("1") == {"access_token": "old"}  # others within the TTL bound
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+    assert worker_b.get("1") == {"access_token": "refreshed"}
+
+
+def test_sync_api_is_kept_next_to_the_async_one(monkeypatch):
+    monkeypatch.setattr(storage, "USER_STORE", CachedUserStore(MemoryUserStore(), max_entries=10, ttl=30))
+
+    storage.save_user("1", {"access_token": "t"})
+    assert storage.get_user("1") == {"access_token": "t"}
+    assert asyncio.run(storage.aget_user("1")) == {"access_token": "t"}
+    asyncio.run(storage.asave_user("2", {"access_token": "u"}))
+    assert storage.get_user("2") == {"access_token": "u"}
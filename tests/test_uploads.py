@@ -0,0 +1,69 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.config import settings
+from app.services.uploads import spool_upload, spooled_upload
+
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_BYTES", 1024)
+    return tmp_path
+
+
+def _upload(data: bytes, size: int | None = None) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename="clip.mp4", size=size)
+
+
+def test_spool_copies_in_chunks_and_hashes(spool_dir):
+    data = os.urandom(5000)
+    path, sha256 = asyncio.run(spool_upload(_upload(data)))
+
+    assert path.startswith(str(spool_dir)) and path.endswith(".mp4")
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert sha256 == hashlib.sha256(data).hexdigest()
+
+
+def test_spooled_file_is_removed_on_exit_even_on_error(spool_dir):
+    async def main():
+        async with spooled_upload(_upload(b"x" * 3000)) as (path, _):
+            assert os.path.exists(path)
+            raise RuntimeError("Graph said no")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
+    assert list(spool_dir.iterdir()) == []
+
+
+@pytest.mark.parametrize("declared_size", [None, 100])  # size unknown, or understated by the client
+def test_body_over_the_cap_is_413_and_leaves_nothing_behind(spool_dir, monkeypatch, declared_size):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 2048)
+
+    with pytest.raises(HTTPException) as failure:
+        asyncio.run(spool_upload(_upload(b"x" * 3000, size=declared_size)))
+    assert failure.value.status_code == 413
+    assert list(spool_dir.iterdir()) == []
+
+
+def test_declared_size_over_the_cap_is_rejected_before_reading(spool_dir, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 2048)
+    upload = _upload(b"x" * 10, size=10_000)
+
+    with pytest.raises(HTTPException) as failure:
+        asyncio.run(spool_upload(upload))
+    assert failure.value.status_code == 413
+    assert upload.file.tell() == 0
+    assert list(spool_dir.iterdir()) == []
+
+
+def test_body_at_the_cap_is_accepted(spool_dir, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 2048)
+    path, _ = asyncio.run(spool_upload(_upload(b"x" * 2048)))
+    assert os.path.getsize(path) == 2048
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from app.services.facebook.circuit_breaker import OPEN, GraphCircuitOpenError, circuit_breaker
+from app.services.facebook.video_upload import VideoUploadError, upload_video
+
+
+class VideoGraph:
+    """advideos endpoint asking for `chunk` bytes at a time; `fail_at` answers one transfer with an error."""
+
+    def __init__(self, chunk: int, fail_at: int | None = None):
+        self.chunk = chunk
+        self.fail_at = fail_at
+        self.size = 0
+        self.starts = 0
+        self.transfers: list[tuple[int, int]] = []  # (start_offset, bytes sent)
+        self.finished = False
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.headers["content-type"].startswith("multipart/"):
+            start = int(re.search(rb'name="start_offset"\r\n\r\n(\d+)', request.content).group(1))
+            chunk = request.content.split(b'filename="')[1].split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n--", 1)[0]
+            if start == self.fail_at:
+                self.fail_at = None
+                return httpx.Response(400, json={"error": {"message": "Invalid chunk", "code": 100}})
+            self.transfers.append((start, len(chunk)))
+            offset = start + len(chunk)
+            return httpx.Response(200, json={
+                "start_offset": str(offset), "end_offset": str(min(offset + self.chunk, self.size)),
+            })
+
+        form = {k: v[0] for k, v in parse_qs(request.content.decode()).items()}
+        if form["upload_phase"] == "start":
+            self.starts += 1
+            self.size = int(form["file_size"])
+            return httpx.Response(200, json={
+                "upload_session_id": "s1", "video_id": "v1",
+                "start_offset": "0", "end_offset": str(min(1000, self.size)),
+            })
+        self.finished = True
+        return httpx.Response(200, json={"success": True})
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(bytes(range(256)) * 20)  # 5120 bytes
+    return str(path)
+
+
+def test_transfers_follow_the_offsets_graph_returns(run_graph, video):
+    graph = VideoGraph(chunk=1500)
+    result = run_graph(lambda: upload_video("act_1", "token", video), graph.handle)
+
+    assert result == {"video_id": "v1"}
+    # The first range comes from `start`, the rest from each transfer's answer
+    assert graph.transfers == [(0, 1000), (1000, 1500), (2500, 1500), (4000, 1120)]
+    assert graph.finished
+
+
+def test_failed_upload_resumes_from_the_last_range(run_graph, video):
+    graph = VideoGraph(chunk=1500, fail_at=2500)
+
+    with pytest.raises(VideoUploadError) as failure:
+        run_graph(lambda: upload_video("act_1", "token", video), graph.handle)
+    session = failure.value.session
+    assert (session["start_offset"], session["end_offset"]) == (2500, 4000)
+
+    result = run_graph(lambda: upload_video("act_1", "token", video, resume=session), graph.handle)
+    assert result == {"video_id": "v1"}
+    assert graph.starts == 1
+    assert [start for start, _ in graph.transfers] == [0, 1000, 2500, 4000]
+
+
+def _breaker_opens_after_first_chunk(graph):
+    def handler(request: httpx.Request) -> httpx.Response:
+        response = graph.handle(request)
+        if graph.transfers:
+            circuit_breaker._set_state("uploads", circuit_breaker._breakers["uploads"], OPEN)
+        return response
+    return handler
+
+
+def test_breaker_opening_mid_transfer_fails_fast_with_the_session(run_graph, video):
+    graph = VideoGraph(chunk=1500)
+
+    with pytest.raises(GraphCircuitOpenError) as failure:
+        run_graph(lambda: upload_video("act_1", "token", video), _breaker_opens_after_first_chunk(graph))
+    assert failure.value.resume_session["start_offset"] == 1000
+    assert graph.transfers == [(0, 1000)]
+
+
+def test_upload_route_answers_503_when_the_breaker_opens_mid_transfer(run_graph, video):
+    from app.main import app
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            with open(video, "rb") as f:
+                return await client.post("/facebook/media/upload", data={
+                    "account_id": "1", "page_id": "2", "access_token": "token", "media_type": "video",
+                }, files={"file": ("video.mp4", f.read())})
+
+    response = run_graph(main, _breaker_opens_after_first_chunk(VideoGraph(chunk=1500)))
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) > 0
+    assert response.json()["resume_session"]["start_offset"] == 1000
+
+
+def test_upload_route_rejects_a_bad_resume_session(video):
+    from app.main import app
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            responses = []
+            for resume_session in ("{not json", json.dumps({
+                "upload_session_id": "s1", "video_id": "v1", "file_size": 10, "start_offset": 8, "end_offset": 4,
+            })):
+                responses.append(await client.post("/facebook/media/upload", data={
+                    "account_id": "1", "page_id": "2", "access_token": "token", "media_type": "video",
+                    "resume_session": resume_session,
+                }, files={"file": ("video.mp4", b"1234567890")}))
+            return responses
+
+    for response in asyncio.run(main()):
+        assert response.status_code == 400
+        assert response.json()["detail"]["message"] == "Invalid resume_session"